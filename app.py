@@ -1,6 +1,7 @@
+import os
+
 from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
-import simplejson as json
 from src.callbacks.accueil_click_map_callback import register_click_map_callback, plein_ecran_carte
 from src.callbacks.carte_ligne_bus_update_callback import carte_ligne_bus
 from src.callbacks.detail_callback import detail_callback
@@ -15,27 +16,8 @@ from src.components.accueil.header import header
 
 from src.callbacks.accueil_carte_update_callback import carte_update_callback
 from src.callbacks.update_selected_thematique import register_callbacks
-from src.data.traitement_data_bus import getAllLigne, getLigneByOsmId
-from src.data.traitement_data_spatiale import loadPopulationCarte, loadRepartitionZonale, loadRevenuCarte, \
-    get_congestion_point
-from src.data.utils import extract_lat_lon
-from src.figure.bus_graph import prepare_dataframe, extract_bus_stops_from_geojson
-from src.figure.carte import load_and_prepare_traffic_data
-
- # Remplacez par le chemin de votre répertoire
-combined_dataframe = getAllLigne()
-prepared_dataframe = prepare_dataframe(combined_dataframe)
-gdf_merged = loadPopulationCarte()
-density = json.loads(gdf_merged.to_json())
-gdf_geojson = loadRepartitionZonale()
-df = loadRevenuCarte()
-congestion = get_congestion_point()
-lats, lons = extract_lat_lon()
-df_filtre = load_and_prepare_traffic_data(
-        geojson_path=r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson",
-        traffic_data_function=get_congestion_point
-    )
-stops = r"data/bus_lines_and_stops.xml"
+from src.data.jeux_donnees import registre
+from src.sante import enregistrer_sante, marquer_pret
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css'], suppress_callback_exceptions=True)
 app.layout = html.Div([
@@ -47,22 +29,22 @@ app.layout = html.Div([
 
 
 # loadCallback
-carte_update_callback(app, gdf_merged,df, density,gdf_geojson,lats, lons,congestion,df_filtre)
+carte_update_callback(app, registre)
 graphique_update_callback(app)
 register_callbacks(app)
 page_callback(app)
-register_click_map_callback(app,gdf_merged)
+register_click_map_callback(app, registre)
 # register_double_click(app)
 register_legend_callback(app)
 plein_ecran_carte(app)
 selection_callback(app)
 detail_callback(app)
 scenario_callback(app)
-ligne_bus_map_callback(app)
+ligne_bus_map_callback(app, registre)
 
 scenario_content_callback(app)
 
-carte_ligne_bus(app,prepared_dataframe,gdf_geojson,stops)
+carte_ligne_bus(app, registre)
 
 # def get_resource_usage():
 #     pid = os.getpid()
@@ -75,6 +57,14 @@ carte_ligne_bus(app,prepared_dataframe,gdf_geojson,stops)
 # print(getLigneByOsmId('566974050'))
 
 server = app.server
+enregistrer_sante(server)
+# Aucune donnée n'est lue à l'import et aucun chargement n'y est lancé : les points d'entrée du serveur
+# (wsgi.py, gunicorn.conf.py, ci-dessous) démarrent le préchargement en arrière-plan, et /ready annonce
+# le processus une fois tout chargé
+
 if __name__ == '__main__':
     # get_resource_usage()
+    # Le rechargeur du mode debug relance ce script dans un processus enfant : seul celui-ci sert les requêtes
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        registre.prechauffer(apres=marquer_pret)
     app.run_server(debug=True)
@@ -5,7 +5,7 @@ CREATE TABLE zones (
     id SERIAL PRIMARY KEY,
     nom VARCHAR(255) NOT NULL,  -- Nom de la zone géographique
     id_OSM VARCHAR(50),
-    identifiant_commune VARCHAR(50) NOT NULL
+    identifiant_commune VARCHAR(50) NOT NULL UNIQUE  -- Clé naturelle (chargement incrémental)
 );
 
 CREATE TABLE periodes_temps (
@@ -24,7 +24,7 @@ CREATE TABLE types_vehicules (
 
 CREATE TABLE typologie_modale (
     id SERIAL PRIMARY KEY,
-    nom_mode VARCHAR(255) NOT NULL,  -- Nom du mode de transport (ex : "Bus", "Vélo")
+    nom_mode VARCHAR(255) NOT NULL UNIQUE,  -- Nom du mode de transport (ex : "Bus", "Vélo")
     description TEXT,  -- Description du mode de transport
     vitesse_moyenne DECIMAL(5, 2) NOT NULL,  -- Vitesse moyenne en km/h
     capacite INTEGER NOT NULL -- Capacité moyenne (ex : nombre de passagers pour un bus)
@@ -45,8 +45,8 @@ VALUES
 
 CREATE TABLE population (
     id SERIAL PRIMARY KEY,
-    id_zone INTEGER REFERENCES zones(id),  -- Référence à la zone géographique
-    id_tranche_age INTEGER NOT NULL REFERENCES tranche_age(id),  -- Référence à la tranche d'âge
+    id_zone INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone géographique
+    id_tranche_age INTEGER NOT NULL REFERENCES tranche_age(id) DEFERRABLE,  -- Référence à la tranche d'âge
     annee INTEGER NOT NULL,  -- Année de la donnée de population
     population_masculine INTEGER NOT NULL,  -- Nombre d'hommes dans la zone
   	population_feminine INTEGER NOT NULL -- Nombre de femmes dans la zone
@@ -56,21 +56,21 @@ CREATE TABLE population (
 
 CREATE TABLE activite (
     id SERIAL PRIMARY KEY,
-    nom_activite VARCHAR(255) NOT NULL  -- Nom de l'activité (ex : "Commerciale", "Industrielle")
+    nom_activite VARCHAR(255) NOT NULL UNIQUE  -- Nom de l'activité (ex : "Commerciale", "Industrielle")
 );
 
 CREATE TABLE zone_activite (
     id SERIAL PRIMARY KEY,
-    id_zone INTEGER REFERENCES zones(id),  -- Référence à la zone géographique
-    id_activite INTEGER REFERENCES activite(id),  -- Référence à l'activité
+    id_zone INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone géographique
+    id_activite INTEGER REFERENCES activite(id) DEFERRABLE,  -- Référence à l'activité
     pourcentage DECIMAL(5, 2) NOT NULL CHECK (pourcentage >= 0 AND pourcentage <= 100)  -- Importance de l'activité dans la zone en pourcentage
 );
 
 CREATE TABLE menage (
     id SERIAL PRIMARY KEY,
-    id_zone INTEGER REFERENCES zones(id),  -- Référence à la zone géographique
+    id_zone INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone géographique
     annee INTEGER NOT NULL,  -- Année de la donnée statistique
-    id_typologie_modale INTEGER REFERENCES typologie_modale(id), -- Référence à la typologie modale
+    id_typologie_modale INTEGER REFERENCES typologie_modale(id) DEFERRABLE, -- Référence à la typologie modale
     total_menages INTEGER NOT NULL,  -- Nombre total de ménages dans la zone
     taille_moyenne_menage DECIMAL(4, 2) NOT NULL,  -- Taille moyenne des ménages (nombre moyen de personnes par ménage)
     vehicules_par_menage DECIMAL(4, 2) NOT NULL -- Nombre moyen de véhicules par ménage
@@ -79,7 +79,7 @@ CREATE TABLE menage (
 
 CREATE TABLE revenu (
     id SERIAL PRIMARY KEY,
-    id_zone INTEGER REFERENCES zones(id),  -- Référence à la zone géographique
+    id_zone INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone géographique
     annee INTEGER NOT NULL,  -- Année de la donnée statistique
     revenu_moyen DECIMAL(10, 2) NOT NULL,  -- Revenu moyen des ménages dans la zone
     revenu_median DECIMAL(10, 2) NOT NULL,  -- Revenu médian des ménages dans la zone
@@ -88,7 +88,7 @@ CREATE TABLE revenu (
 
 CREATE TABLE emploi (
     id SERIAL PRIMARY KEY,
-    id_zone INTEGER REFERENCES zones(id),  -- Référence à la zone géographique
+    id_zone INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone géographique
     annee INTEGER NOT NULL,  -- Année de la donnée statistique
     taux_chomage DECIMAL(5, 2) NOT NULL,  -- Taux de chômage dans la zone
     taux_participation DECIMAL(5, 2) NOT NULL  -- Taux de participation à la force de travail
@@ -96,29 +96,29 @@ CREATE TABLE emploi (
 
 CREATE TABLE matrice_od (
     id SERIAL PRIMARY KEY,
-    id_origine INTEGER REFERENCES zones(id),  -- Référence à la zone d'origine
-    id_destination INTEGER REFERENCES zones(id),  -- Référence à la zone de destination
-    id_type_vehicule INTEGER REFERENCES types_vehicules(id),  -- Référence au type de véhicule
+    id_origine INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone d'origine
+    id_destination INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à la zone de destination
+    id_type_vehicule INTEGER REFERENCES types_vehicules(id) DEFERRABLE,  -- Référence au type de véhicule
     nombre INTEGER NOT NULL  -- Nombre de déplacements pour cette combinaison
 );
 
 CREATE TABLE hierarchie_fonctionnelle (
     id SERIAL PRIMARY KEY,
-    nom_niveau VARCHAR(255) NOT NULL  -- Nom de la hiérarchie (ex : "Autoroute", "Route Principale", "Route Secondaire")
+    nom_niveau VARCHAR(255) NOT NULL UNIQUE  -- Nom de la hiérarchie (ex : "Autoroute", "Route Principale", "Route Secondaire")
 );
 
 CREATE TABLE route(
    id SERIAL PRIMARY KEY,
-   id_hierarchie INTEGER REFERENCES hierarchie_fonctionnelle(id),
-   id_OSM VARCHAR(50)
+   id_hierarchie INTEGER REFERENCES hierarchie_fonctionnelle(id) DEFERRABLE,
+   id_OSM VARCHAR(50) UNIQUE  -- Clé naturelle (chargement incrémental)
 );
 
 CREATE TABLE flux_trafic (
     id SERIAL PRIMARY KEY,
-    id_departed INTEGER REFERENCES route(id),  -- Référence à la zone d'origine
-    id_arrived INTEGER REFERENCES route(id),  -- Référence à la zone de destination
-    id_typologie_modale INTEGER REFERENCES typologie_modale(id),  -- Référence au mode de transport
-    id_periode_temps INTEGER REFERENCES periodes_temps(id),  -- Référence à la période de temps (ex : "Matin", "Soir")
+    id_departed INTEGER REFERENCES route(id) DEFERRABLE,  -- Référence à la zone d'origine
+    id_arrived INTEGER REFERENCES route(id) DEFERRABLE,  -- Référence à la zone de destination
+    id_typologie_modale INTEGER REFERENCES typologie_modale(id) DEFERRABLE,  -- Référence au mode de transport
+    id_periode_temps INTEGER REFERENCES periodes_temps(id) DEFERRABLE,  -- Référence à la période de temps (ex : "Matin", "Soir")
     volume INTEGER NOT NULL,  -- Volume de trafic (nombre de véhicules ou de piétons)
     date DATE NOT NULL,  -- Date de l'enregistrement
     vitesse_moyenne DECIMAL(5, 2),  -- Vitesse moyenne du flux de trafic (en km/h)
@@ -128,7 +128,7 @@ CREATE TABLE flux_trafic (
 
 CREATE TABLE debit_vitesse (
     id SERIAL PRIMARY KEY,
-    id_route INTEGER REFERENCES route(id),  -- Référence à la zone géographique
+    id_route INTEGER REFERENCES route(id) DEFERRABLE,  -- Référence à la zone géographique
     vitesse_moyenne DECIMAL(5, 2) NOT NULL,  -- Vitesse moyenne observée (en km/h)
     vitesse_maximale DECIMAL(5, 2) NOT NULL,  -- Vitesse maximale autorisée (en km/h)
     vitesse_minimale DECIMAL(5, 2) NOT NULL,  -- Vitesse minimale observée (en km/h)
@@ -138,7 +138,7 @@ CREATE TABLE debit_vitesse (
 
 CREATE TABLE iri (
     id SERIAL PRIMARY KEY,
-    id_route INTEGER REFERENCES route(id),  -- Référence à la zone géographique
+    id_route INTEGER REFERENCES route(id) DEFERRABLE,  -- Référence à la zone géographique
     valeur_iri DECIMAL(6, 2) NOT NULL,  -- Valeur de l'IRI (Indice de Rugosité Internationale) en m/km
     date_observation TIMESTAMP NOT NULL  -- Date et heure de l'observation
 );
@@ -146,15 +146,35 @@ CREATE TABLE iri (
 
 CREATE  TABLE lignebus ( 
 	id                   serial  NOT NULL PRIMARY KEY ,
-	numero_ligne         varchar(50)    
+	numero_ligne         varchar(50)   UNIQUE 
  );
 
 CREATE  TABLE ligneroute ( 
 	id                   serial  NOT NULL PRIMARY KEY ,
-	id_ligne             integer   REFERENCES lignebus(id) ,
-	id_route             integer   REFERENCES route(id) 
+	id_ligne             integer   REFERENCES lignebus(id) DEFERRABLE ,
+	id_route             integer   REFERENCES route(id) DEFERRABLE ,
+	UNIQUE (id_ligne, id_route)
  );
 
+-- Empreinte (sha1) des fichiers sources au dernier chargement : une étape dont les sources
+-- n'ont pas changé est sautée par le chargement incrémental (src/data/etl.py)
+CREATE TABLE etl_sources (
+    nom VARCHAR(50) PRIMARY KEY,  -- Étape du chargement (ex : "zones", "routes", "lignes")
+    empreinte VARCHAR(40) NOT NULL,
+    date_chargement TIMESTAMP NOT NULL DEFAULT now()
+);
+
+
+-- index --
+-- Index secondaires des jointures des vues (voir migrations/003_index.sql pour le détail)
+CREATE INDEX flux_trafic_id_departed_idx ON flux_trafic (id_departed) INCLUDE (volume);
+CREATE INDEX flux_trafic_id_arrived_idx ON flux_trafic (id_arrived) INCLUDE (volume);
+CREATE INDEX matrice_od_origine_type_idx ON matrice_od (id_origine, id_type_vehicule) INCLUDE (nombre);
+CREATE INDEX matrice_od_destination_idx ON matrice_od (id_destination);
+CREATE INDEX matrice_od_type_vehicule_idx ON matrice_od (id_type_vehicule);
+CREATE INDEX population_id_zone_idx ON population (id_zone);
+CREATE INDEX ligneroute_id_route_idx ON ligneroute (id_route);
+
 
 -- view --
 CREATE OR REPLACE VIEW population_view AS 
@@ -239,8 +259,8 @@ GROUP BY
 
 CREATE TABLE zone_vehicules (
     id SERIAL PRIMARY KEY,
-    zone_id INTEGER REFERENCES zones(id),  -- Référence à l'ID de la zone
-    type_vehicule_id INTEGER REFERENCES types_vehicules(id)  -- Référence à l'ID du type de véhicule
+    zone_id INTEGER REFERENCES zones(id) DEFERRABLE,  -- Référence à l'ID de la zone
+    type_vehicule_id INTEGER REFERENCES types_vehicules(id) DEFERRABLE  -- Référence à l'ID du type de véhicule
 );
 
 -- Insérer les combinaisons de chaque zone avec chaque type de véhicule
@@ -376,4 +396,103 @@ LEFT JOIN
     ON (origine.nom_origine = tvpo.nom_origine 
         AND destination.nom_destination = tvpo.nom_destination)
 GROUP BY 
-    origine.nom_origine, destination.nom_destination, tv.nom_type, tvpo.nombre_total_somme_vehicule;
\ No newline at end of file
+    origine.nom_origine, destination.nom_destination, tv.nom_type, tvpo.nombre_total_somme_vehicule;
+
+
+-- Vues matérialisées lues par le tableau de bord à la place des vues analytiques de base.sql.
+-- Elles sont rafraîchies après chaque chargement (src/data/vues_materialisees.py) ; l'index UNIQUE
+-- de chaque vue est requis par REFRESH MATERIALIZED VIEW CONCURRENTLY.
+
+-- Volume total de trafic par route (départs + arrivées)
+CREATE MATERIALIZED VIEW mv_congestion AS
+WITH total_volume AS (
+    SELECT id_departed AS route_id, SUM(volume) AS total_volume
+    FROM flux_trafic
+    GROUP BY id_departed
+
+    UNION ALL
+
+    SELECT id_arrived AS route_id, SUM(volume) AS total_volume
+    FROM flux_trafic
+    GROUP BY id_arrived
+)
+SELECT
+    tv.route_id,
+    r.id_osm,
+    SUM(tv.total_volume) AS total_traffic_volume
+FROM
+    total_volume tv
+JOIN
+    route r ON tv.route_id = r.id
+GROUP BY
+    tv.route_id, r.id_osm;
+
+CREATE UNIQUE INDEX mv_congestion_route_idx ON mv_congestion (route_id);
+CREATE INDEX mv_congestion_volume_idx ON mv_congestion (total_traffic_volume DESC);
+
+
+-- Déplacements par couple origine-destination, avec les ids des zones
+CREATE MATERIALIZED VIEW mv_vue_matrice_od AS
+SELECT
+    id_origine,
+    nom_origine,
+    id_destination,
+    nom_destination,
+    SUM(nombre) AS nombre_deplacements,
+    SUM(SUM(nombre)) OVER (PARTITION BY id_origine) AS somme_totale_par_origine
+FROM
+    vue_matrice
+GROUP BY
+    id_origine, nom_origine, id_destination, nom_destination;
+
+CREATE UNIQUE INDEX mv_vue_matrice_od_od_idx ON mv_vue_matrice_od (id_origine, id_destination);
+CREATE INDEX mv_vue_matrice_od_page_idx
+    ON mv_vue_matrice_od (nombre_deplacements DESC, id_origine DESC, id_destination DESC);
+
+-- Matrice complète origine x destination x type de véhicule, calculée sur les ids
+CREATE MATERIALIZED VIEW mv_vue_matrice_complete AS
+WITH od AS (
+    SELECT id_origine, id_destination, id_type_vehicule, SUM(nombre) AS nombre
+    FROM matrice_od
+    GROUP BY id_origine, id_destination, id_type_vehicule
+),
+total AS (
+    SELECT id_origine, id_destination, SUM(nombre) AS nombre_total
+    FROM od
+    GROUP BY id_origine, id_destination
+)
+SELECT
+    o.id AS id_origine,
+    o.identifiant_commune AS origine,
+    d.id AS id_destination,
+    d.identifiant_commune AS destination,
+    tv.id AS id_type_vehicule,
+    tv.nom_type AS typevehicule,
+    COALESCE(od.nombre, 0) AS nombre,
+    COALESCE(total.nombre_total, 0) AS nombre_total_somme_vehicule
+FROM
+    zones o
+CROSS JOIN
+    zones d
+CROSS JOIN
+    types_vehicules tv
+LEFT JOIN
+    od ON od.id_origine = o.id AND od.id_destination = d.id AND od.id_type_vehicule = tv.id
+LEFT JOIN
+    total ON total.id_origine = o.id AND total.id_destination = d.id
+WHERE
+    o.id IN (SELECT id_origine FROM matrice_od)
+    AND d.id IN (SELECT id_destination FROM matrice_od);
+
+CREATE UNIQUE INDEX mv_vue_matrice_complete_odt_idx
+    ON mv_vue_matrice_complete (id_origine, id_destination, id_type_vehicule);
+CREATE INDEX mv_vue_matrice_complete_page_idx
+    ON mv_vue_matrice_complete (nombre_total_somme_vehicule DESC, id_origine DESC, id_destination DESC, id_type_vehicule DESC);
+
+-- Nombre de déplacements par zone et type de véhicule
+CREATE MATERIALIZED VIEW mv_resultat_jointure AS
+SELECT * FROM resultat_jointure;
+
+CREATE UNIQUE INDEX mv_resultat_jointure_zone_type_idx ON mv_resultat_jointure (zone_id, type_vehicule_id);
+CREATE INDEX mv_resultat_jointure_page_idx
+    ON mv_resultat_jointure (nombre_total DESC, zone_id DESC, type_vehicule_id DESC);
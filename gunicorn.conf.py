@@ -0,0 +1,40 @@
+# Configuration gunicorn, lue automatiquement depuis la racine du projet : gunicorn wsgi:server
+# (ou python wsgi.py avec SERVEUR_CONFIG['serveur'] = 'gunicorn')
+from src.config import SERVEUR_CONFIG
+from src.data.registre import preparer_fork, registre
+
+bind = f"{SERVEUR_CONFIG['hote']}:{SERVEUR_CONFIG['port']}"
+workers = SERVEUR_CONFIG['workers']
+# Workers multi-threads : les callbacks Dash d'une même page s'exécutent en parallèle
+worker_class = 'gthread'
+threads = SERVEUR_CONFIG['threads']
+
+# Le maître importe l'application (et charge les jeux de données) une seule fois avant de forker :
+# les workers partagent ces pages mémoire en copie sur écriture au lieu de tout recharger
+preload_app = True
+
+timeout = SERVEUR_CONFIG['timeout']
+graceful_timeout = SERVEUR_CONFIG['graceful_timeout']
+# Recyclage progressif des workers : chaque worker termine ses requêtes avant d'être remplacé
+max_requests = SERVEUR_CONFIG['max_requests']
+max_requests_jitter = SERVEUR_CONFIG['max_requests_jitter']
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Appelé dans le maître, après le chargement de l'application (preload_app) et avant le premier fork :
+    # les jeux de données se chargent en arrière-plan et pre_fork attend la fin du chargement
+    from src.sante import marquer_pret
+
+    registre.prechauffer(apres=marquer_pret)
+
+
+def pre_fork(server, worker):
+    # Les connexions ouvertes par le maître pendant le chargement ne doivent pas être partagées
+    # avec les workers (sockets communes) : chaque worker ouvre son propre pool.
+    # Le préchargement des jeux de données est attendu avant le premier fork pour que les workers les
+    # partagent (jamais lors des remplacements de workers), puis ils sont gelés pour le ramasse-miettes
+    # (voir src/data/registre.py)
+    preparer_fork(SERVEUR_CONFIG['prechauffage_max'])
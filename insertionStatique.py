@@ -1,20 +1,9 @@
-from src.data.insertion import *
+import sys
+
+from src.data.etl import charger_base
 regionale = r"data/Zonage_interne_externe_PMUD.geojson"
 route = r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson"
-insert_zones(regionale)
-insert_random_population()
-insert_vehicules()
-insert_matriceOD()
-insert_activite()
-insert_zone_activite()
-insert_hierarchie_fonctionnelle()
-insert_typologie_modale()
-insert_routes_from_geojson_with_hierarchy(route)
-insert_menage()
-insert_revenu()
-insert_emploi()
-insert_flux_trafic()
-insert_iri()
-insert_debit_vitesse()
-insert_ligne_bus()
-insert_ligne_route()
\ No newline at end of file
+
+# Chargement incrémental en une seule transaction (voir src/data/etl.py) : seules les sources modifiées
+# depuis le dernier lancement sont retraitées ; --forcer retraite toutes les sources
+charger_base(regionale, route, forcer='--forcer' in sys.argv)
\ No newline at end of file
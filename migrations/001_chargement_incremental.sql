@@ -0,0 +1,17 @@
+-- Chargement incrémental (src/data/etl.py) sur une base créée avant les clés naturelles de base.sql.
+-- Les contraintes UNIQUE échouent si la base contient déjà des doublons (anciens chargements répétés) :
+-- dans ce cas, recréer la base avec base.sql puis lancer insertionStatique.py.
+
+ALTER TABLE zones ADD CONSTRAINT zones_identifiant_commune_key UNIQUE (identifiant_commune);
+ALTER TABLE activite ADD CONSTRAINT activite_nom_activite_key UNIQUE (nom_activite);
+ALTER TABLE hierarchie_fonctionnelle ADD CONSTRAINT hierarchie_fonctionnelle_nom_niveau_key UNIQUE (nom_niveau);
+ALTER TABLE typologie_modale ADD CONSTRAINT typologie_modale_nom_mode_key UNIQUE (nom_mode);
+ALTER TABLE route ADD CONSTRAINT route_id_osm_key UNIQUE (id_osm);
+ALTER TABLE lignebus ADD CONSTRAINT lignebus_numero_ligne_key UNIQUE (numero_ligne);
+ALTER TABLE ligneroute ADD CONSTRAINT ligneroute_id_ligne_id_route_key UNIQUE (id_ligne, id_route);
+
+CREATE TABLE IF NOT EXISTS etl_sources (
+    nom VARCHAR(50) PRIMARY KEY,
+    empreinte VARCHAR(40) NOT NULL,
+    date_chargement TIMESTAMP NOT NULL DEFAULT now()
+);
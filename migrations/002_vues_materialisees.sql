@@ -0,0 +1,66 @@
+-- Vues matérialisées lues par le tableau de bord à la place des vues analytiques de base.sql.
+-- Elles sont rafraîchies après chaque chargement (src/data/vues_materialisees.py) ; l'index UNIQUE
+-- de chaque vue est requis par REFRESH MATERIALIZED VIEW CONCURRENTLY.
+
+-- Volume total de trafic par route (départs + arrivées)
+CREATE MATERIALIZED VIEW mv_congestion AS
+WITH total_volume AS (
+    SELECT id_departed AS route_id, SUM(volume) AS total_volume
+    FROM flux_trafic
+    GROUP BY id_departed
+
+    UNION ALL
+
+    SELECT id_arrived AS route_id, SUM(volume) AS total_volume
+    FROM flux_trafic
+    GROUP BY id_arrived
+)
+SELECT
+    tv.route_id,
+    r.id_osm,
+    SUM(tv.total_volume) AS total_traffic_volume
+FROM
+    total_volume tv
+JOIN
+    route r ON tv.route_id = r.id
+GROUP BY
+    tv.route_id, r.id_osm;
+
+CREATE UNIQUE INDEX mv_congestion_route_idx ON mv_congestion (route_id);
+CREATE INDEX mv_congestion_volume_idx ON mv_congestion (total_traffic_volume DESC);
+
+
+-- Déplacements par couple origine-destination ; le total par origine est une fonction de fenêtre
+-- calculée une fois au rafraîchissement (au lieu d'une sous-requête corrélée par ligne)
+CREATE MATERIALIZED VIEW mv_vue_matrice_od AS
+SELECT
+    nom_origine,
+    nom_destination,
+    SUM(nombre) AS nombre_deplacements,
+    SUM(SUM(nombre)) OVER (PARTITION BY nom_origine) AS somme_totale_par_origine
+FROM
+    vue_matrice
+GROUP BY
+    nom_origine, nom_destination;
+
+CREATE UNIQUE INDEX mv_vue_matrice_od_od_idx ON mv_vue_matrice_od (nom_origine, nom_destination);
+CREATE INDEX mv_vue_matrice_od_origine_idx ON mv_vue_matrice_od (lower(nom_origine));
+CREATE INDEX mv_vue_matrice_od_nombre_idx ON mv_vue_matrice_od (nombre_deplacements DESC);
+
+
+-- Matrice complète origine x destination x type de véhicule (produit cartésien matérialisé une seule fois)
+CREATE MATERIALIZED VIEW mv_vue_matrice_complete AS
+SELECT * FROM vue_matrice_complete;
+
+CREATE UNIQUE INDEX mv_vue_matrice_complete_odt_idx ON mv_vue_matrice_complete (origine, destination, typevehicule);
+CREATE INDEX mv_vue_matrice_complete_origine_idx ON mv_vue_matrice_complete (lower(origine));
+CREATE INDEX mv_vue_matrice_complete_total_idx ON mv_vue_matrice_complete (nombre_total_somme_vehicule DESC);
+
+
+-- Nombre de déplacements par zone et type de véhicule
+CREATE MATERIALIZED VIEW mv_resultat_jointure AS
+SELECT * FROM resultat_jointure;
+
+CREATE UNIQUE INDEX mv_resultat_jointure_zone_type_idx ON mv_resultat_jointure (zone_id, type_vehicule_id);
+CREATE INDEX mv_resultat_jointure_zone_nom_idx ON mv_resultat_jointure (lower(zone_nom));
+CREATE INDEX mv_resultat_jointure_nombre_idx ON mv_resultat_jointure (nombre_total DESC);
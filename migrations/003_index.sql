@@ -0,0 +1,25 @@
+-- Index secondaires des clés étrangères et des jointures utilisées par les vues du tableau de bord.
+-- CONCURRENTLY : la création ne bloque pas les écritures (exécuter hors transaction, ex : psql sans -1).
+-- Vérifier l'effet avec le harnais src/test/harnais_plans.py avant et après la migration.
+
+-- congestion : agrégation du volume par route de départ / d'arrivée (parcours d'index seul grâce à INCLUDE)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS flux_trafic_id_departed_idx ON flux_trafic (id_departed) INCLUDE (volume);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS flux_trafic_id_arrived_idx ON flux_trafic (id_arrived) INCLUDE (volume);
+
+-- resultat_jointure : jointure sur (origine, type de véhicule) ; le préfixe id_origine sert aussi vue_matrice
+CREATE INDEX CONCURRENTLY IF NOT EXISTS matrice_od_origine_type_idx ON matrice_od (id_origine, id_type_vehicule) INCLUDE (nombre);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS matrice_od_destination_idx ON matrice_od (id_destination);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS matrice_od_type_vehicule_idx ON matrice_od (id_type_vehicule);
+
+-- population_view : agrégation par zone
+CREATE INDEX CONCURRENTLY IF NOT EXISTS population_id_zone_idx ON population (id_zone);
+
+-- Correspondances ligne-route par route (l'index UNIQUE (id_ligne, id_route) couvre déjà id_ligne)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ligneroute_id_route_idx ON ligneroute (id_route);
+
+-- route(id_osm) : déjà indexé par la contrainte UNIQUE de migrations/001 (route_id_osm_key) ;
+-- créé ici seulement pour une base où cette migration n'a pas été appliquée
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS route_id_osm_key ON route (id_osm);
+
+-- Chargement incrémental : population des zones sans données (NOT EXISTS par zone)
+-- est servi par population_id_zone_idx ; les autres tables sont petites et restent sans index.
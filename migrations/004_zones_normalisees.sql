@@ -0,0 +1,87 @@
+-- Identifiants de zones normalisés et filtres par id de zone.
+-- Le tableau de bord filtre les vues par id de zone (index B-tree) au lieu de lower(nom) IN (...),
+-- et pagine les classements par clé (keyset) sur un index (valeur DESC, clé DESC).
+-- À appliquer sur une base créée avant cette version (les vues recréées sont remplies à la fin).
+
+BEGIN;
+
+-- identifiant_commune en minuscules, sans espaces superflus : même forme que la clé des cartes
+UPDATE zones
+SET identifiant_commune = lower(regexp_replace(btrim(identifiant_commune), '\s+', ' ', 'g'))
+WHERE identifiant_commune <> lower(regexp_replace(btrim(identifiant_commune), '\s+', ' ', 'g'));
+
+DROP MATERIALIZED VIEW IF EXISTS mv_vue_matrice_od;
+DROP MATERIALIZED VIEW IF EXISTS mv_vue_matrice_complete;
+
+-- Déplacements par couple origine-destination, avec les ids des zones
+CREATE MATERIALIZED VIEW mv_vue_matrice_od AS
+SELECT
+    id_origine,
+    nom_origine,
+    id_destination,
+    nom_destination,
+    SUM(nombre) AS nombre_deplacements,
+    SUM(SUM(nombre)) OVER (PARTITION BY id_origine) AS somme_totale_par_origine
+FROM
+    vue_matrice
+GROUP BY
+    id_origine, nom_origine, id_destination, nom_destination
+WITH NO DATA;
+
+CREATE UNIQUE INDEX mv_vue_matrice_od_od_idx ON mv_vue_matrice_od (id_origine, id_destination);
+CREATE INDEX mv_vue_matrice_od_page_idx
+    ON mv_vue_matrice_od (nombre_deplacements DESC, id_origine DESC, id_destination DESC);
+
+-- Matrice complète origine x destination x type de véhicule, calculée sur les ids
+CREATE MATERIALIZED VIEW mv_vue_matrice_complete AS
+WITH od AS (
+    SELECT id_origine, id_destination, id_type_vehicule, SUM(nombre) AS nombre
+    FROM matrice_od
+    GROUP BY id_origine, id_destination, id_type_vehicule
+),
+total AS (
+    SELECT id_origine, id_destination, SUM(nombre) AS nombre_total
+    FROM od
+    GROUP BY id_origine, id_destination
+)
+SELECT
+    o.id AS id_origine,
+    o.identifiant_commune AS origine,
+    d.id AS id_destination,
+    d.identifiant_commune AS destination,
+    tv.id AS id_type_vehicule,
+    tv.nom_type AS typevehicule,
+    COALESCE(od.nombre, 0) AS nombre,
+    COALESCE(total.nombre_total, 0) AS nombre_total_somme_vehicule
+FROM
+    zones o
+CROSS JOIN
+    zones d
+CROSS JOIN
+    types_vehicules tv
+LEFT JOIN
+    od ON od.id_origine = o.id AND od.id_destination = d.id AND od.id_type_vehicule = tv.id
+LEFT JOIN
+    total ON total.id_origine = o.id AND total.id_destination = d.id
+WHERE
+    o.id IN (SELECT id_origine FROM matrice_od)
+    AND d.id IN (SELECT id_destination FROM matrice_od)
+WITH NO DATA;
+
+CREATE UNIQUE INDEX mv_vue_matrice_complete_odt_idx
+    ON mv_vue_matrice_complete (id_origine, id_destination, id_type_vehicule);
+CREATE INDEX mv_vue_matrice_complete_page_idx
+    ON mv_vue_matrice_complete (nombre_total_somme_vehicule DESC, id_origine DESC, id_destination DESC, id_type_vehicule DESC);
+
+-- mv_resultat_jointure a déjà zone_id : remplacer les index par nom par l'index de pagination
+DROP INDEX IF EXISTS mv_resultat_jointure_zone_nom_idx;
+DROP INDEX IF EXISTS mv_resultat_jointure_nombre_idx;
+CREATE INDEX mv_resultat_jointure_page_idx
+    ON mv_resultat_jointure (nombre_total DESC, zone_id DESC, type_vehicule_id DESC);
+
+COMMIT;
+
+-- Remplir les vues recréées (hors transaction : la vue mv_resultat_jointure reste lisible)
+REFRESH MATERIALIZED VIEW mv_vue_matrice_od;
+REFRESH MATERIALIZED VIEW mv_vue_matrice_complete;
+REFRESH MATERIALIZED VIEW mv_resultat_jointure;
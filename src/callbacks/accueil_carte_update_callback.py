@@ -1,59 +1,176 @@
-from dash.dependencies import Input, Output
+import dash
+from dash import Patch
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 
 from src.figure.carte import create_density_map, create_revenue_map, create_default_map, create_route, \
     create_traffic_markers, create_traffic_density_map, create_route_with_traffic, create_contour_map, \
-    create_route_with_traffic_colored
+    create_route_with_traffic_colored, NB_CLASSES_TRAFIC
+from src.data.geometrie import niveau_pour_zoom
+from src.figure.cache_figure import nouveau_cache_figures
 import plotly.graph_objs as go
 
+# Couches thématiques dans leur ordre d'affichage (les suivantes sont dessinées au-dessus),
+# avec le nombre maximal de traces de chacune : une place fixe par couche dans la figure
+COUCHES = ['densite', 'revenu', 'densitetrafic', 'segment', 'itineraire', 'congestion']
+NB_TRACES = {'densite': 1, 'revenu': 1, 'densitetrafic': 1, 'segment': 1,
+             'itineraire': NB_CLASSES_TRAFIC, 'congestion': NB_CLASSES_TRAFIC}
+
+# Traces toujours présentes en tête de figure : le réseau routier puis la carte par défaut
+INDEX_ROUTE = 0
+INDEX_DEFAUT = 1
+
+# Index de la première trace de chaque couche, connus sans construire les couches
+EMPLACEMENTS = {}
+_index = INDEX_DEFAUT + 1
+for _nom in COUCHES:
+    EMPLACEMENTS[_nom] = _index
+    _index += NB_TRACES[_nom]
+
+# Emplacement d'une trace pas encore envoyée (ou inutilisée par sa couche)
+TRACE_VIDE = {'type': 'scattermapbox', 'visible': False}
+
+ZOOM_INITIAL = 9
+
+
+def carte_update_callback(app, registre):
+    # Les données sont statiques entre deux rechargements : chaque couche n'est construite qu'une fois,
+    # à partir des jeux du registre lus à la première demande
+    cache_figures = nouveau_cache_figures()
+    obtenir = registre.obtenir
+
+    # Traces choroplèthes dont le GeoJSON (simplifié pour chaque niveau de zoom, réduit aux identifiants
+    # utilisés par featureidkey) est remplacé selon le zoom courant, quand elles sont visibles
+    ZONAGES = {'defaut': 'zonage_defaut', 'densite': 'zonage_communes', 'revenu': 'zonage_communes'}
+
+    constructeurs = {
+        'densite': lambda: [create_density_map(obtenir('zonage_communes')[0], obtenir('population_carte'))],
+        'revenu': lambda: [create_revenue_map(obtenir('zonage_communes')[0], obtenir('revenu_carte'))],
+        'densitetrafic': lambda: [create_traffic_density_map(obtenir('congestion'))],
+        'segment': lambda: [create_traffic_markers(obtenir('congestion'))],
+        'itineraire': lambda: create_route_with_traffic_colored(obtenir('trafic')),
+        'congestion': lambda: create_route_with_traffic(obtenir('trafic')),
+    }
+
+    def traces_couche(nom):
+        """Traces de la couche, ou None si elle n'a pas pu être construite (rien n'est mis en cache)."""
+        try:
+            return cache_figures.obtenir(nom, lambda: go.Figure(data=constructeurs[nom]()))['data'][:NB_TRACES[nom]]
+        except Exception as e:
+            # Une couche en erreur reste vide sans empêcher l'affichage des autres, et sera reconstruite
+            # à sa prochaine activation
+            print(f"Erreur lors de la construction de la couche {nom} : {e}")
+            return None
+
+    def traces_au_niveau(nom, niveau):
+        traces = traces_couche(nom)
+        if traces is not None and nom in ZONAGES:
+            traces = [dict(trace, geojson=obtenir(ZONAGES[nom])[niveau]) for trace in traces]
+        return traces
+
+    def figure_de_base():
+        def construire():
+            fig = go.Figure()
+            fig.update_layout(
+                mapbox=dict(
+                    style="carto-positron",
+                    center=dict(lat=-18.8792, lon=47.5079),
+                    zoom=ZOOM_INITIAL
+                ),
+                # Conserver le zoom et le centrage de l'utilisateur lors des mises à jour de la figure
+                uirevision='accueil',
+                paper_bgcolor="lightgrey",
+                showlegend=False,
+                margin={"r": 0, "t": 0, "l": 0, "b": 0}
+            )
+            fig.add_trace(create_route(*obtenir('routes')))
+            fig.add_trace(create_default_map(obtenir('repartition_zonale'), obtenir('zonage_defaut')[0]))
+            return fig
+
+        return cache_figures.obtenir('base', construire)
 
-def carte_update_callback(app, gdf_merged,df, density, gdf_geojson,lats, lons,congestion,df_filtered):
     @app.callback(
-        Output('map', 'figure'),
-        [Input('selected-thematiques', 'data')]
+        [Output('map', 'figure'),
+         Output('map-couches', 'data')],
+        [Input('selected-thematiques', 'data'),
+         Input('map', 'relayoutData')],
+        [State('map-couches', 'data')]
     )
-    def update_figure(selected_thematiques):
-        fig = go.Figure()
-
-        fig.update_layout(
-            mapbox=dict(
-                style="carto-positron",
-                center=dict(lat=-18.8792, lon=47.5079),
-                zoom=9
-            ),
-            paper_bgcolor="lightgrey",
-            showlegend=False,
-            margin={"r": 0, "t": 0, "l": 0, "b": 0}
-        )
-        fig.add_trace(create_route(lats, lons))
-        if selected_thematiques:
-            if 'densite' in selected_thematiques:
-                fig.add_trace(create_density_map(density, gdf_merged))
-                # traces =create_contour_map((gdf_merged))
-                # for trace in traces:
-                #     fig.add_trace(trace)
-
-            if 'revenu' in selected_thematiques:
-                fig.add_trace(create_revenue_map(density,df))
-
-            if 'densitetrafic' in selected_thematiques:
-                fig.add_trace(create_traffic_density_map(congestion))
-
-            if 'segment' in selected_thematiques:
-                fig.add_trace(create_traffic_markers(congestion))
-
-            if 'itineraire' in selected_thematiques:
-                traces = create_route_with_traffic_colored(df_filtered)
-                fig.add_traces(traces)
-
-            if 'congestion' in selected_thematiques:
-                traces = create_route_with_traffic(df_filtered)
-                fig.add_traces(traces)
-
-            # if 'bus' in selected_thematiques:
-            #     traces = generate_map(bus)
-            #     fig.add_traces(traces)
+    def update_figure(selected_thematiques, relayout, etat_carte):
+        selection = [nom for nom in COUCHES if nom in (selected_thematiques or [])]
+        generation = cache_figures.generation
 
+        zoom = (relayout or {}).get('mapbox.zoom')
+        if zoom is not None:
+            niveau = niveau_pour_zoom(zoom)
+        elif etat_carte is not None:
+            niveau = etat_carte.get('niveau', 0)
         else:
-            fig.add_trace(create_default_map(gdf_geojson))
+            niveau = niveau_pour_zoom(ZOOM_INITIAL)
+
+        declencheur = dash.callback_context.triggered[0]['prop_id'] if dash.callback_context.triggered else ''
+        if (declencheur == 'map.relayoutData' and etat_carte is not None
+                and etat_carte['generation'] == generation and etat_carte.get('niveau') == niveau):
+            # Déplacement ou zoom sans changement de niveau de détail : rien à renvoyer
+            raise PreventUpdate
+
+        if etat_carte is None or etat_carte['generation'] != generation:
+            # Premier affichage de la carte : figure complète, les couches non sélectionnées (ou en erreur)
+            # sont de simples emplacements vides qui seront remplis à leur première activation
+            base = figure_de_base()
+            data = [base['data'][INDEX_ROUTE],
+                    dict(base['data'][INDEX_DEFAUT], geojson=obtenir('zonage_defaut')[niveau], visible=not selection)]
+            couches = []
+            for nom in COUCHES:
+                traces = traces_au_niveau(nom, niveau) if nom in selection else None
+                if traces is not None:
+                    couches.append(nom)
+                else:
+                    traces = []
+                data.extend(traces + [TRACE_VIDE] * (NB_TRACES[nom] - len(traces)))
+            # Niveau de zoom du GeoJSON envoyé pour chaque trace choroplèthe
+            niveaux = {nom: niveau for nom in ['defaut'] + couches if nom in ZONAGES}
+            etat = {'generation': generation, 'couches': couches, 'niveau': niveau, 'niveaux': niveaux}
+            return {'data': data, 'layout': base['layout']}, etat
+
+        # Carte déjà affichée : n'envoyer que les différences (visibilité, couches jamais envoyées, zonage
+        # des traces visibles dont le GeoJSON n'est pas au niveau courant)
+        couches = list(etat_carte['couches'])
+        niveaux = dict(etat_carte.get('niveaux', {}))
+        patch = Patch()
+
+        patch['data'][INDEX_DEFAUT]['visible'] = not selection
+        if not selection and niveaux.get('defaut') != niveau:
+            patch['data'][INDEX_DEFAUT]['geojson'] = obtenir('zonage_defaut')[niveau]
+            niveaux['defaut'] = niveau
+
+        for nom in COUCHES:
+            debut = EMPLACEMENTS[nom]
+            if nom in selection and nom not in couches:
+                traces = traces_au_niveau(nom, niveau)
+                if traces is None:
+                    continue
+                for i, trace in enumerate(traces):
+                    patch['data'][debut + i] = trace
+                couches.append(nom)
+                if nom in ZONAGES:
+                    niveaux[nom] = niveau
+            elif nom in couches:
+                # Couche déjà envoyée : seules ses traces réelles changent de visibilité
+                traces = traces_couche(nom)
+                if traces is None:
+                    # Sortie du cache puis en erreur à la reconstruction : masquer ses emplacements,
+                    # elle sera renvoyée à sa prochaine activation
+                    for i in range(NB_TRACES[nom]):
+                        patch['data'][debut + i]['visible'] = False
+                    couches.remove(nom)
+                    continue
+                for i in range(len(traces)):
+                    patch['data'][debut + i]['visible'] = nom in selection
+                    if nom in selection and nom in ZONAGES and niveaux.get(nom) != niveau:
+                        patch['data'][debut + i]['geojson'] = obtenir(ZONAGES[nom])[niveau]
+                if nom in selection and nom in ZONAGES:
+                    niveaux[nom] = niveau
 
-        return fig
+        couches = sorted(couches, key=COUCHES.index)
+        return patch, {'generation': generation, 'couches': couches, 'niveau': niveau, 'niveaux': niveaux}
@@ -1,9 +1,7 @@
 from dash.dependencies import Input, Output, State
 
-from src.data.utils import find_zone_by_coordinates
-
 # callback pour detecter le zone cliqué sur le carte
-def register_click_map_callback(app, gdf_communes):
+def register_click_map_callback(app, registre):
     @app.callback(
         Output('clicked-zones', 'data'),
         [Input('map', 'clickData')],
@@ -20,7 +18,7 @@ def register_click_map_callback(app, gdf_communes):
             # Récupérer lat et lon si 'location' n'est pas présent
             lat = clickData['points'][0]['lat']
             lon = clickData['points'][0]['lon']
-            clicked_location = find_zone_by_coordinates(lat, lon, gdf_communes)
+            clicked_location = registre.obtenir('localisateur_zones').localiser(lat, lon)
 
         # Si une zone est trouvée, ajouter à la liste des zones cliquées
         if clicked_location and clicked_location not in clicked_zones:
@@ -1,4 +1,7 @@
+from functools import partial
+
 from dash.dependencies import Input, Output
+from src.data.database import rassembler
 from src.figure.graphique import generate_graph_density, generate_graph_deplacement, generate_graph_vehicules, \
     generate_sankey_diagram
 from dash import html
@@ -13,36 +16,36 @@ def graphique_update_callback(app):
             return generate_graph_density()
         return html.Div()
 
-    @app.callback(
-        Output('typologie', 'children'),
-        [Input('selected-thematiques', 'data'),
-         Input('clicked-zones', 'data')]
-    )
-    def update_typology_graph(selected_thematiques, clicked_zones):
-        # Vérifier si selected_thematiques et clicked_zones ne sont pas None
-        if selected_thematiques and 'typologie' in selected_thematiques:
-            return generate_graph_vehicules(noms_zones=clicked_zones)
-        return html.Div()
+    # Panneaux qui dépendent des zones cliquées : (sortie, thématiques qui l'affichent, générateur)
+    panneaux = [
+        ('typologie', ['typologie'], generate_graph_vehicules),
+        ('matrice', ['matrice'], generate_sankey_diagram),
+        ('volumes', ['densitetrafic', 'itineraire', 'segment'], generate_graph_deplacement),
+    ]
 
     @app.callback(
-        Output('matrice', 'children'),
+        [Output(sortie, 'children') for sortie, _, _ in panneaux],
         [Input('selected-thematiques', 'data'),
          Input('clicked-zones', 'data')]
     )
-    def update_matrice_graph(selected_thematiques, clicked_zones):
-        # Vérifier si selected_thematiques et clicked_zones ne sont pas None
-        if selected_thematiques and 'matrice' in selected_thematiques:
-            return generate_sankey_diagram(noms_zones=clicked_zones)
-        return html.Div()
+    def update_panneaux_zones(selected_thematiques, clicked_zones):
+        # Les panneaux changent ensemble à chaque clic : leurs requêtes sont lancées en parallèle
+        # et la mise à jour attend la plus lente au lieu de la somme des trois
+        selected_thematiques = selected_thematiques or []
+        affiches = [(sortie, generateur) for sortie, thematiques, generateur in panneaux
+                    if any(thematique in selected_thematiques for thematique in thematiques)]
+        resultats = dict(zip(
+            [sortie for sortie, _ in affiches],
+            rassembler(*[partial(generateur, noms_zones=clicked_zones) for _, generateur in affiches],
+                       exceptions=True)
+        ))
 
-    @app.callback(
-        Output('volumes', 'children'),
-        [Input('selected-thematiques', 'data'),
-         Input('clicked-zones', 'data')]
-    )
-    def update_finances_graph(selected_thematiques, clicked_zones):
-        # Vérifier si au moins une des thématiques est sélectionnée
-        if selected_thematiques and any(
-                thematique in selected_thematiques for thematique in ['densitetrafic', 'itineraire', 'segment']):
-            return generate_graph_deplacement(noms_zones=clicked_zones)
-        return html.Div()
+        enfants = []
+        for sortie, _, _ in panneaux:
+            resultat = resultats.get(sortie)
+            if isinstance(resultat, Exception):
+                # Un panneau en erreur reste vide sans empêcher l'affichage des autres
+                print(f"Erreur lors de la construction du panneau {sortie} : {resultat}")
+                resultat = None
+            enfants.append(resultat if resultat is not None else html.Div())
+        return enfants
@@ -2,11 +2,15 @@ from dash.dependencies import Input, Output
 
 import plotly.graph_objs as go
 
-from src.figure.bus_graph import generate_map, create_bus_stops_map, create_bus_stops_map_from_xml
+from src.figure.bus_graph import generate_map, create_bus_stops_map, create_bus_stops_map_from_depot
+from src.data.jeux_donnees import ZOOM_BUS
 from src.figure.carte import create_default_map
 
 
-def carte_ligne_bus(app, prepared_dataframe,gdf_geojson,stops):
+def carte_ligne_bus(app, registre):
+    # Zonage simplifié, tracés des lignes et centre de la carte : jeux dérivés du registre, calculés une seule fois
+    obtenir = registre.obtenir
+
     @app.callback(
         Output('selected-affichage', 'data'),
         Input('bus-visual-options', 'value')
@@ -25,8 +29,8 @@ def carte_ligne_bus(app, prepared_dataframe,gdf_geojson,stops):
         fig.update_layout(
             mapbox=dict(
                 style='carto-positron',
-                center=dict(lat=prepared_dataframe['centroid_lat'].mean(), lon=prepared_dataframe['centroid_lon'].mean()),
-                zoom=12
+                center=obtenir('centre_lignes'),
+                zoom=ZOOM_BUS
             ),
             margin={"r": 0, "t": 0, "l": 0, "b": 0},
             hovermode='closest',
@@ -35,12 +39,12 @@ def carte_ligne_bus(app, prepared_dataframe,gdf_geojson,stops):
 
         if selected_affichage:
             if 'repartition' in selected_affichage:
-                fig.add_trace(create_default_map(gdf_geojson))
+                fig.add_trace(create_default_map(obtenir('repartition_zonale'), obtenir('zonage_bus')))
             if 'stops' in selected_affichage:
-                fig.add_trace(create_bus_stops_map_from_xml(stops))
+                fig.add_trace(create_bus_stops_map_from_depot(obtenir('arrets_bus'), selected_lines))
 
 
-        traces = generate_map(prepared_dataframe, bus_lines=selected_lines)
+        traces = generate_map(obtenir('traces_lignes'), bus_lines=selected_lines)
         fig.add_traces(traces)
 
         return fig
@@ -1,13 +1,38 @@
-import time
-
 from dash import html, dcc, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State, MATCH, ALL
-import pandas as pd
-from src.data.traitement_data_bus import getLigneByOsmId, getAllLigneDB, getAllLigne
+from src.data.traitement_data_bus import getAllLigneDB
+
 
+def ligne_bus_map_callback(app, registre):
+    def panneau_ligne(stats):
+        # Construit à chaque clic depuis les statistiques de l'index courant : reflète un rechargement des données
+        ligne = stats['taxibe_lin']
+        # Le numéro de ligne sert d'index au modal : identifiant stable quel que soit le segment cliqué
+        return html.Div([
+            html.P(f"Ligne de bus : {ligne}"),
+            dbc.Button("Voir détails", id={'type': 'open-modal', 'index': ligne}, n_clicks=0,
+                       className="mb-2"),
+
+            # Modal dynamique
+            dbc.Modal(
+                [
+                    dbc.ModalHeader(f"Détails de la ligne {ligne}"),
+                    dbc.ModalBody([
+                        html.P(f"Distance (km) : {stats['km']:.2f}"),
+                        html.P(f"Vitesse moyenne (km/h) : {stats['vitesse_moyenne']:.2f}"),
+                        html.P(f"Durée de trajet (minute) : {stats['duree_trajet']:.2f}"),
+                    ]),
+                    dbc.ModalFooter(
+                        dbc.Button("Fermer", id={'type': 'close-modal', 'index': ligne},
+                                   className="ml-auto")
+                    ),
+                ],
+                id={'type': 'modal', 'index': ligne},
+                is_open=False,  # Fermé par défaut
+            ),
+        ])
 
-def ligne_bus_map_callback(app):
     # Callback pour stocker les données de la ligne cliquée
     @app.callback(
         Output('clicked-line-data', 'data'),
@@ -19,11 +44,8 @@ def ligne_bus_map_callback(app):
             # Vérification si 'customdata' est dans le point cliqué
             if 'customdata' in point_data:
                 osm_id = point_data['customdata']
-                ligne_data = getLigneByOsmId(osm_id)  # Convertir en entier si nécessaire
-
-                if ligne_data is not None:
-                    # Convertir le DataFrame en dictionnaire pour le stockage
-                    return ligne_data.to_dict('records')
+                # Simple recherche dans l'index construit au démarrage (déjà au format 'records')
+                return registre.obtenir('index_lignes').lignes_pour_osm(osm_id)
 
             # Retourner None si les conditions ne sont pas remplies
         return None
@@ -33,38 +55,9 @@ def ligne_bus_map_callback(app):
         Input('clicked-line-data', 'data')
     )
     def display_clicked_line_data(data):
-        time.sleep(1)
+        # Quelques composants par ligne cliquée : aucun travail bloquant sur le thread de requête
         if data:
-            ligne_data = pd.DataFrame(data)
-
-            if not ligne_data.empty:
-                lignes_affichage = []
-                for index, row in ligne_data.iterrows():
-                    lignes_affichage.append(html.Div([
-                        html.P(f"Ligne de bus : {row['taxibe_lin']}"),
-                        dbc.Button("Voir détails", id={'type': 'open-modal', 'index': index}, n_clicks=0,
-                                   className="mb-2"),
-
-                        # Modal dynamique
-                        dbc.Modal(
-                            [
-                                dbc.ModalHeader(f"Détails de la ligne {row['taxibe_lin']}"),
-                                dbc.ModalBody([
-                                    html.P(f"Distance (km) : {row['km']:.2f}"),
-                                    html.P(f"Vitesse moyenne (km/h) : {row['vitesse_moyenne']:.2f}"),
-                                    html.P(f"Durée de trajet (minute) : {row['duree_trajet']:.2f}"),
-                                ]),
-                                dbc.ModalFooter(
-                                    dbc.Button("Fermer", id={'type': 'close-modal', 'index': index},
-                                               className="ml-auto")
-                                ),
-                            ],
-                            id={'type': 'modal', 'index': index},
-                            is_open=False,  # Fermé par défaut
-                        ),
-                    ]))
-
-                return html.Div(lignes_affichage)
+            return html.Div([panneau_ligne(stats) for stats in data])
 
         return html.Div([
             html.P("Distance totale : 10 km", className="mb-2"),
@@ -1,3 +1,5 @@
+import os
+
 DATABASE_CONFIG = {
     'dbname': 'mob',
     'user': 'postgres',
@@ -5,3 +7,51 @@ DATABASE_CONFIG = {
     'host': 'localhost',
     'port': '5432',
 }
+
+# Pool de connexions partagé par processus (voir src/data/database.py)
+POOL_CONFIG = {
+    'pool_size': 5,  # Connexions gardées ouvertes en permanence
+    'max_overflow': 10,  # Connexions supplémentaires autorisées lors des pics
+    'pool_timeout': 30,  # Attente maximale (secondes) d'une connexion libre
+    'pool_pre_ping': True,  # Vérifie la connexion avant usage (redémarrage de PostgreSQL)
+    'pool_recycle': 1800,  # Renouvelle les connexions de plus de 30 minutes
+}
+
+# Cache disque des jeux de données préparés (voir src/data/cache.py)
+CACHE_CONFIG = {
+    'repertoire': 'cache',
+}
+
+# Générateur de données fictives pour les tests de charge (voir src/data/synthetique.py)
+SYNTHETIQUE_CONFIG = {
+    'beta_distance': 0.35,  # Décroissance de l'attractivité entre zones par km (modèle gravitaire)
+    'parts_vehicules': {'Voiture': 0.30, 'Moto': 0.25, 'Bus': 0.45},
+    'parts_modales': {'Bus': 0.45, 'Voiture': 0.25, 'Marche': 0.20, 'Vélo': 0.05, 'Tramway': 0.03, 'Train': 0.02},
+    # Part des comptages et facteur de volume par période (pointes du matin et du soir)
+    'periodes': {'matin': (0.55, 1.0), 'soir': (0.45, 0.85)},
+    # Volume moyen d'un comptage selon la hiérarchie de la route
+    'volume_hierarchie': {'primary': 1500, 'secondary': 700, 'tertiary': 300},
+    'nombre_moyen_od': 40,  # Déplacements moyens par enregistrement de matrice_od
+    'duree_campagne': 30,  # Jours couverts par la campagne de comptage simulée
+}
+
+# Matrice OD gardée en mémoire pour les pages de détail (voir src/data/moteur_od.py)
+MOTEUR_OD_CONFIG = {
+    'actif': True,  # False : les requêtes OD sont envoyées à PostgreSQL à chaque affichage
+    'verification': 60,  # Intervalle minimal (secondes) entre deux vérifications de changement des données
+}
+
+# Serveur de production (voir wsgi.py et gunicorn.conf.py)
+SERVEUR_CONFIG = {
+    # 'gunicorn' (Linux, workers forkés) ou 'waitress' (Windows, un processus multi-thread)
+    'serveur': 'waitress' if os.name == 'nt' else 'gunicorn',
+    'hote': '0.0.0.0',
+    'port': 8050,
+    'workers': 4,  # Processus gunicorn : les données chargées par le maître sont partagées en copie sur écriture
+    'threads': 8,  # Threads par worker gunicorn, ou threads de waitress
+    'timeout': 120,  # Un worker bloqué plus longtemps est redémarré
+    'graceful_timeout': 30,  # Délai laissé aux requêtes en cours lors d'un redémarrage de worker
+    'max_requests': 2000,  # Recyclage des workers après ce nombre de requêtes (fuites mémoire)
+    'max_requests_jitter': 200,  # Étale les recyclages pour ne pas redémarrer tous les workers ensemble
+    'prechauffage_max': 300,  # Attente max du préchargement des données avant le fork des workers (s)
+}
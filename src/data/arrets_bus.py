@@ -0,0 +1,157 @@
+import re
+import xml.etree.ElementTree as ET
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from src.data.cache import charger_depuis_cache
+
+ARRETS_XML_PATH = r"data/bus_lines_and_stops.xml"
+ARRETS_GEOJSON_PATH = r"data/Bus-stop_V2.geojson"
+
+# Un arrêt du GeoJSON (sans lignes renseignées) dessert une ligne s'il est à moins de cette distance de son tracé
+DISTANCE_ARRET_LIGNE = 30  # mètres
+
+# UTM zone 38S : CRS métrique de Antananarivo, déjà utilisé pour les tracés des lignes
+CRS_METRIQUE = "EPSG:32738"
+
+
+def _decouper_lignes(attribut):
+    """'015 194_maintso' ou '140, 015, 109' -> ['015', '194_maintso'] / ['140', '015', '109']."""
+    return [ligne for ligne in re.split(r'[\s,]+', attribut or '') if ligne and ligne.lower() != 'none']
+
+
+def code_ligne(libelle):
+    """
+    Numéros de ligne (3 chiffres) contenus dans un libellé, pour rapprocher les deux nomenclatures :
+    '015_BIS' -> ['015'], 'tj_bus_109_ambohitrarahaba' -> ['109'], '122-139' -> ['122', '139'].
+    """
+    return re.findall(r'\d{3}', str(libelle or ''))
+
+
+def lireArretsXml(xml_path=ARRETS_XML_PATH):
+    """
+    Arrêts de bus du fichier XML, dédoublonnés par osm_id : un arrêt cité par plusieurs routes
+    (ou sous plusieurs noms) n'apparaît qu'une fois avec l'union de ses lignes.
+    """
+    root = ET.parse(xml_path).getroot()
+
+    arrets = {}
+    for route in root.findall('route'):
+        # Les arrêts d'une route desservent au moins la ligne de cette route
+        lignes_route = code_ligne(route.get('id'))
+        for stop in route.findall('stop'):
+            coordinates = stop.get('coordinates')
+            # Les arrêts sans coordonnées ('None') ne peuvent pas être affichés
+            if not coordinates or coordinates.lower() == 'none':
+                continue
+
+            osm_id = stop.get('osm_id')
+            arret = arrets.get(osm_id)
+            if arret is None:
+                lon, lat = map(float, coordinates.split(','))
+                arret = arrets[osm_id] = {'osm_id': osm_id, 'noms': [], 'lignes': [], 'lon': lon, 'lat': lat}
+
+            name = stop.get('name')
+            if name and name not in arret['noms']:
+                arret['noms'].append(name)
+            for ligne in lignes_route + _decouper_lignes(stop.get('lines')):
+                if ligne not in arret['lignes']:
+                    arret['lignes'].append(ligne)
+
+    df = pd.DataFrame({
+        'osm_id': [a['osm_id'] for a in arrets.values()],
+        # Les listes sont stockées en texte pour le cache Parquet
+        'name': ['<br>'.join(a['noms']) for a in arrets.values()],
+        'lines': [' '.join(a['lignes']) for a in arrets.values()],
+    })
+    geometry = shapely.points([a['lon'] for a in arrets.values()], [a['lat'] for a in arrets.values()])
+    return gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
+
+
+def lireArretsGeojson(geojson_path=ARRETS_GEOJSON_PATH):
+    """Arrêts OSM du GeoJSON : positions et noms, sans lignes (déduites du tracé des lignes)."""
+    gdf = gpd.read_file(geojson_path)
+    if gdf.crs != "EPSG:4326":
+        gdf = gdf.to_crs(epsg=4326)
+    gdf = gdf.assign(name=gdf['name'].fillna(''), lines='')
+    return gdf[['osm_id', 'name', 'lines', 'geometry']]
+
+
+def lireArrets():
+    """Arrêts du XML complétés par ceux du GeoJSON absents du XML (dédoublonnés par osm_id)."""
+    arrets_xml = lireArretsXml()
+    arrets_geojson = lireArretsGeojson()
+    arrets_geojson = arrets_geojson[~arrets_geojson['osm_id'].isin(arrets_xml['osm_id'])]
+    arrets_geojson = arrets_geojson.drop_duplicates('osm_id')
+    return pd.concat([arrets_xml, arrets_geojson], ignore_index=True)
+
+
+def loadArretsBus(forcer=False):
+    """Arrêts de bus (XML et GeoJSON), depuis le cache disque tant que les fichiers n'ont pas changé."""
+    return charger_depuis_cache('arrets_bus', [ARRETS_XML_PATH, ARRETS_GEOJSON_PATH], lireArrets, forcer)
+
+
+class ArretsBus:
+    """
+    Dépôt des arrêts de bus chargé une seule fois au démarrage : coordonnées et textes de survol
+    en tableaux NumPy, et index inversé ligne (taxibe_lin) -> indices des arrêts qui la desservent.
+    """
+
+    def __init__(self, gdf_arrets, lignes_bus=None):
+        coords = shapely.get_coordinates(gdf_arrets.geometry.values)
+        self.lons = coords[:, 0]
+        self.lats = coords[:, 1]
+        self.osm_ids = gdf_arrets['osm_id'].to_numpy(dtype=object)
+        self.textes = np.array([
+            name if name else f"Bus Stop: {osm_id}"
+            for name, osm_id in zip(gdf_arrets['name'], self.osm_ids)
+        ], dtype=object)
+
+        self.arrets_par_ligne = {}
+        if lignes_bus is not None:
+            self._indexer(gdf_arrets, lignes_bus)
+
+    def _indexer(self, gdf_arrets, lignes_bus):
+        lignes_bus = lignes_bus[lignes_bus['taxibe_lin'].notna() & (lignes_bus['taxibe_lin'] != '')]
+        membres = {}
+
+        # 1. Lignes déclarées dans le XML, rapprochées des taxibe_lin par leur numéro
+        arrets_par_code = {}
+        for i, lines in enumerate(gdf_arrets['lines']):
+            for code in {code for ligne in str(lines or '').split() for code in code_ligne(ligne)}:
+                arrets_par_code.setdefault(code, []).append(i)
+        for taxibe_lin in lignes_bus['taxibe_lin'].unique():
+            for code in code_ligne(taxibe_lin):
+                membres.setdefault(taxibe_lin, []).extend(arrets_par_code.get(code, []))
+
+        # 2. Arrêts à proximité du tracé de chaque ligne, en un seul appel vectorisé sur un R-tree
+        points = gdf_arrets.geometry.to_crs(CRS_METRIQUE).values
+        segments = lignes_bus.geometry.to_crs(CRS_METRIQUE).values
+        idx_arrets, idx_segments = shapely.STRtree(segments).query(
+            points, predicate='dwithin', distance=DISTANCE_ARRET_LIGNE
+        )
+        couples = pd.DataFrame({
+            'taxibe_lin': lignes_bus['taxibe_lin'].to_numpy(dtype=object)[idx_segments],
+            'arret': idx_arrets,
+        })
+        for taxibe_lin, arrets in couples.groupby('taxibe_lin')['arret']:
+            membres.setdefault(taxibe_lin, []).extend(arrets.tolist())
+
+        self.arrets_par_ligne = {
+            taxibe_lin: np.unique(np.asarray(arrets, dtype=np.intp)) for taxibe_lin, arrets in membres.items()
+        }
+
+    def __len__(self):
+        return len(self.osm_ids)
+
+    def indices(self, lignes=None):
+        """Indices des arrêts desservant au moins une des lignes (tous les arrêts si aucune ligne n'est choisie)."""
+        if not lignes:
+            return np.arange(len(self))
+        trouves = [self.arrets_par_ligne[ligne] for ligne in lignes if ligne in self.arrets_par_ligne]
+        if not trouves:
+            return np.array([], dtype=np.intp)
+        return np.unique(np.concatenate(trouves))
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+
+from src.config import CACHE_CONFIG
+
+# Version du format du cache : l'incrémenter quand la préparation d'un jeu de données change
+CACHE_VERSION = 1
+
+
+def lister_sources(repertoire, extension=".geojson"):
+    """Liste triée des fichiers d'un répertoire source (ex : data/Ligne)."""
+    return sorted(
+        os.path.join(repertoire, nom) for nom in os.listdir(repertoire) if nom.endswith(extension)
+    )
+
+
+def hash_fichier(chemin):
+    sha1 = hashlib.sha1()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(bloc)
+    return sha1.hexdigest()
+
+
+def _repertoire_cache():
+    return os.path.join(CACHE_CONFIG['repertoire'], f"v{CACHE_VERSION}")
+
+
+def _chemins(nom):
+    base = os.path.join(_repertoire_cache(), nom)
+    return base + ".parquet", base + ".json"
+
+
+def _ecrire_atomique(chemin, ecrire):
+    # Écrire dans un fichier temporaire puis renommer : un autre worker ne lit jamais un fichier partiel
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    ecrire(tmp)
+    os.replace(tmp, chemin)
+
+
+def _signature(sources, ancienne=None):
+    """Signature (mtime, taille, sha1) des sources ; le sha1 n'est recalculé que si le mtime a bougé."""
+    ancienne = ancienne or {}
+    signature = {}
+    for chemin in sources:
+        stat = os.stat(chemin)
+        precedent = ancienne.get(chemin)
+        if precedent and precedent['mtime_ns'] == stat.st_mtime_ns and precedent['taille'] == stat.st_size:
+            sha1 = precedent['sha1']
+        else:
+            sha1 = hash_fichier(chemin)
+        signature[chemin] = {'mtime_ns': stat.st_mtime_ns, 'taille': stat.st_size, 'sha1': sha1}
+    return signature
+
+
+def _cache_valide(manifeste, signature):
+    if manifeste.get('version') != CACHE_VERSION:
+        return False
+    anciennes = manifeste.get('sources', {})
+    if anciennes.keys() != signature.keys():
+        return False
+    return all(anciennes[chemin]['sha1'] == signature[chemin]['sha1'] for chemin in signature)
+
+
+def charger_depuis_cache(nom, sources, loader, forcer=False):
+    """
+    Retourne le GeoDataFrame préparé `nom` depuis le cache disque (lecture en memory-map).
+    Les sources ne sont relues par `loader()` que si leur contenu a changé depuis l'écriture du cache.
+    """
+    chemin_donnees, chemin_manifeste = _chemins(nom)
+
+    manifeste = {}
+    if os.path.exists(chemin_manifeste):
+        try:
+            with open(chemin_manifeste, 'r', encoding='utf-8') as f:
+                manifeste = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Manifeste de cache illisible pour {nom} : {e}")
+
+    signature = _signature(sources, manifeste.get('sources'))
+
+    if not forcer and os.path.exists(chemin_donnees) and _cache_valide(manifeste, signature):
+        try:
+            gdf = gpd.read_parquet(chemin_donnees, memory_map=True)
+            if manifeste['sources'] != signature:
+                # Sources touchées mais contenu identique : mettre à jour les mtime pour ne plus rehasher
+                _ecrire_manifeste(chemin_manifeste, signature)
+            return gdf
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache {nom}, reconstruction : {e}")
+
+    gdf = loader()
+    if gdf is None:
+        return None
+
+    try:
+        os.makedirs(_repertoire_cache(), exist_ok=True)
+        _ecrire_atomique(chemin_donnees, lambda tmp: gdf.to_parquet(tmp, index=False))
+        _ecrire_manifeste(chemin_manifeste, signature)
+    except Exception as e:
+        # Le cache est une optimisation : une erreur d'écriture ne doit pas empêcher le démarrage
+        print(f"Impossible d'écrire le cache {nom} : {e}")
+
+    return gdf
+
+
+def _ecrire_manifeste(chemin, signature):
+    def ecrire(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'sources': signature}, f)
+
+    _ecrire_atomique(chemin, ecrire)
+
+
+def construire_cache(forcer=False):
+    """Étape de build : prépare tous les jeux de données statiques utilisés au démarrage de l'application."""
+    from src.data.arrets_bus import loadArretsBus
+    from src.data.traitement_data_bus import getAllLigne
+    from src.data.utils import loadZonage, loadRoutesPrincipales, loadCentroidesRoutes
+    from src.figure.bus_graph import loadLignesPreparees
+
+    for nom, loader in [
+        ('lignes_bus', getAllLigne),
+        ('lignes_preparees', loadLignesPreparees),
+        ('zonage', loadZonage),
+        ('routes_principales', loadRoutesPrincipales),
+        ('routes_centroides', loadCentroidesRoutes),
+        ('arrets_bus', loadArretsBus),
+    ]:
+        try:
+            gdf = loader(forcer=forcer)
+            print(f"Cache {nom} : {0 if gdf is None else len(gdf)} lignes")
+        except Exception as e:
+            print(f"Erreur lors de la construction du cache {nom} : {e}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    construire_cache(forcer='--forcer' in sys.argv)
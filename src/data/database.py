@@ -1,17 +1,154 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from src.config import DATABASE_CONFIG
+from src.config import DATABASE_CONFIG, POOL_CONFIG
+
+# Un seul engine (et donc un seul pool de connexions) par processus
+_engine = None
+_Session = None
+_lock = threading.Lock()
+
+_stats = {
+    'connexions': 0,  # Connexions physiques ouvertes vers PostgreSQL
+    'checkouts': 0,
+    'checkins': 0,
+    'duree_connexion_totale': 0.0,  # Temps passé à établir les connexions (secondes)
+    'duree_utilisation_totale': 0.0,  # Temps pendant lequel les connexions sont restées empruntées (secondes)
+    'duree_utilisation_max': 0.0,
+}
+_stats_lock = threading.Lock()
+
+# Threads des requêtes lancées en parallèle par rassembler(), créés au premier appel dans chaque processus
+_executeur = None
+
+
+def _enregistrer_evenements(engine):
+    @event.listens_for(engine, 'do_connect')
+    def debut_connexion(dialect, conn_rec, cargs, cparams):
+        conn_rec.info['debut_connexion'] = time.perf_counter()
+
+    @event.listens_for(engine, 'connect')
+    def connexion(dbapi_connection, connection_record):
+        debut = connection_record.info.pop('debut_connexion', None)
+        with _stats_lock:
+            _stats['connexions'] += 1
+            if debut is not None:
+                _stats['duree_connexion_totale'] += time.perf_counter() - debut
+
+    @event.listens_for(engine, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['debut_checkout'] = time.perf_counter()
+        with _stats_lock:
+            _stats['checkouts'] += 1
+
+    @event.listens_for(engine, 'checkin')
+    def checkin(dbapi_connection, connection_record):
+        debut = connection_record.info.pop('debut_checkout', None)
+        with _stats_lock:
+            _stats['checkins'] += 1
+            if debut is not None:
+                duree = time.perf_counter() - debut
+                _stats['duree_utilisation_totale'] += duree
+                _stats['duree_utilisation_max'] = max(_stats['duree_utilisation_max'], duree)
+
 
 # Fonction pour obtenir l'objet engine
 def get_engine():
-    db_url = f"postgresql://{DATABASE_CONFIG['user']}:{DATABASE_CONFIG['password']}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['dbname']}"
-    return create_engine(db_url)
+    global _engine, _Session
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                db_url = f"postgresql+psycopg2://{DATABASE_CONFIG['user']}:{DATABASE_CONFIG['password']}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['dbname']}"
+                engine = create_engine(db_url, **POOL_CONFIG)
+                _enregistrer_evenements(engine)
+                _Session = sessionmaker(bind=engine)
+                _engine = engine
+    return _engine
 
 
 # Fonction pour obtenir une session
 def get_session():
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+    get_engine()
+    return _Session()
+
+
+@contextmanager
+def session_scope():
+    """Session transactionnelle : commit en fin de bloc, rollback en cas d'erreur, fermeture dans tous les cas."""
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def dispose_engine(close=True):
+    """
+    Ferme les connexions du pool (ex : avant un fork, pour ne pas partager de sockets entre processus).
+    Dans un processus forké, close=False abandonne sans les fermer les connexions héritées du parent.
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
+
+
+def rassembler(*appels, exceptions=False):
+    """
+    Exécute en parallèle des fonctions sans argument qui interrogent la base (une session chacune) et
+    retourne leurs résultats dans l'ordre : la durée totale est celle de la plus lente, pas la somme.
+    La première s'exécute dans le thread appelant, les autres sur au plus pool_size threads par processus.
+    Avec exceptions=True, une erreur est retournée à la place du résultat au lieu d'être levée.
+    """
+    global _executeur
+    if _executeur is None:
+        with _lock:
+            if _executeur is None:
+                _executeur = ThreadPoolExecutor(max_workers=POOL_CONFIG['pool_size'], thread_name_prefix='requete')
+
+    futures = [_executeur.submit(appel) for appel in appels[1:]]
+    resultats = []
+    for i, appel in enumerate(appels):
+        try:
+            resultats.append(appel() if i == 0 else futures[i - 1].result())
+        except Exception as e:
+            if not exceptions:
+                raise
+            resultats.append(e)
+    return resultats
+
+
+def _apres_fork():
+    # Les threads de l'exécuteur n'existent pas dans le processus forké : en recréer au premier appel
+    global _executeur
+    _executeur = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apres_fork)
 
 
+def get_pool_stats():
+    """Statistiques d'utilisation du pool de connexions du processus courant."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['duree_connexion_moyenne'] = (
+        stats['duree_connexion_totale'] / stats['connexions'] if stats['connexions'] else 0.0
+    )
+    stats['duree_utilisation_moyenne'] = (
+        stats['duree_utilisation_totale'] / stats['checkins'] if stats['checkins'] else 0.0
+    )
+    if _engine is not None:
+        pool = _engine.pool
+        stats['taille_pool'] = pool.size()
+        stats['connexions_empruntees'] = pool.checkedout()
+        stats['overflow'] = pool.overflow()
+        stats['etat'] = pool.status()
+    return stats
@@ -0,0 +1,198 @@
+import hashlib
+import io
+import time
+
+import pandas as pd
+
+from src.data.cache import hash_fichier, lister_sources
+from src.data.database import get_engine
+from src.data.insertion import donnees_zones, donnees_population, donnees_vehicules, donnees_matrice_od, \
+    donnees_activite, donnees_zone_activite, donnees_hierarchie_fonctionnelle, donnees_typologie_modale, \
+    donnees_routes, donnees_menage, donnees_revenu, donnees_emploi, donnees_flux_trafic, donnees_iri, \
+    donnees_debit_vitesse, donnees_ligne_bus, donnees_ligne_route
+from src.data.traitement_data_bus import getAllLigne, LIGNES_PATH
+from src.data.vues_materialisees import rafraichir_vues_materialisees
+
+# Nombre de lignes envoyées par commande COPY : le CSV d'un lot est construit en mémoire
+TAILLE_LOT_COPY = 100_000
+
+
+def copier_dataframe(curseur, table, df, taille_lot=TAILLE_LOT_COPY):
+    """Envoie un DataFrame dans `table` par COPY FROM STDIN (CSV), par lots, sur le curseur psycopg2 donné."""
+    if df.empty:
+        return 0
+
+    colonnes = ', '.join(df.columns)
+    commande = f"COPY {table} ({colonnes}) FROM STDIN WITH (FORMAT csv)"
+    for debut in range(0, len(df), taille_lot):
+        tampon = io.StringIO()
+        # Les valeurs manquantes deviennent des champs vides non quotés, lus comme NULL par COPY
+        df.iloc[debut:debut + taille_lot].to_csv(tampon, index=False, header=False)
+        tampon.seek(0)
+        curseur.copy_expert(commande, tampon)
+    return len(df)
+
+
+def upsert_dataframe(curseur, table, df, cle, mise_a_jour=()):
+    """
+    Insère ou met à jour les lignes de `df` selon la clé naturelle `cle` (contrainte UNIQUE) :
+    COPY dans une table temporaire puis INSERT ... ON CONFLICT. Les colonnes `mise_a_jour` d'une ligne
+    existante ne sont réécrites que si leur valeur a changé. Retourne le nombre de lignes insérées ou modifiées.
+    """
+    if df.empty:
+        return 0
+
+    colonnes = ', '.join(df.columns)
+    cles = ', '.join(cle)
+    # Qualifiée par pg_temp : une table permanente du même nom dans le search_path n'est jamais touchée
+    temporaire = f"pg_temp.etl_{table}"
+    curseur.execute(f"DROP TABLE IF EXISTS {temporaire}")
+    curseur.execute(f"CREATE TEMP TABLE {temporaire} ON COMMIT DROP AS SELECT {colonnes} FROM {table} WITH NO DATA")
+    copier_dataframe(curseur, temporaire, df)
+
+    if mise_a_jour:
+        affectations = ', '.join(f"{c} = EXCLUDED.{c}" for c in mise_a_jour)
+        anciennes = ', '.join(f"{table}.{c}" for c in mise_a_jour)
+        nouvelles = ', '.join(f"EXCLUDED.{c}" for c in mise_a_jour)
+        conflit = f"DO UPDATE SET {affectations} WHERE ({anciennes}) IS DISTINCT FROM ({nouvelles})"
+    else:
+        conflit = "DO NOTHING"
+
+    # DISTINCT ON : une même clé présente deux fois dans la source ne doit être écrite qu'une fois
+    curseur.execute(
+        f"INSERT INTO {table} ({colonnes}) "
+        f"SELECT DISTINCT ON ({cles}) {colonnes} FROM {temporaire} "
+        f"ON CONFLICT ({cles}) {conflit}"
+    )
+    return curseur.rowcount
+
+
+def empreinte_sources(chemins):
+    """Empreinte unique du contenu d'un ensemble de fichiers (sha1 des sha1, dans l'ordre des chemins)."""
+    sha1 = hashlib.sha1()
+    for chemin in sorted(chemins):
+        sha1.update(f"{chemin}:{hash_fichier(chemin)}\n".encode('utf-8'))
+    return sha1.hexdigest()
+
+
+def _ids(curseur, requete):
+    curseur.execute(requete)
+    return [row[0] for row in curseur.fetchall()]
+
+
+def _dataframe(curseur, requete, colonnes):
+    curseur.execute(requete)
+    return pd.DataFrame(curseur.fetchall(), columns=colonnes)
+
+
+def _est_vide(curseur, table):
+    curseur.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {table})")
+    return curseur.fetchone()[0]
+
+
+def charger_base(zonage_path, routes_path, forcer=False):
+    """
+    Chargement incrémental et idempotent des données statiques, en une seule transaction :
+    - zones, routes et lignes de bus ne sont retraitées que si l'empreinte de leurs fichiers sources
+      a changé depuis le dernier chargement (table etl_sources), puis écrites par upsert sur leur clé naturelle ;
+    - les tables de référence sont complétées sans doublon ;
+    - les données simulées ne sont générées que pour les tables vides (et la population des nouvelles zones).
+    Relancer le script sans changement des sources n'écrit rien. `forcer` retraite toutes les sources.
+    """
+    connexion = get_engine().raw_connection()
+    debut = time.perf_counter()
+    try:
+        curseur = connexion.cursor()
+        # Les clés étrangères DEFERRABLE (base.sql) ne sont vérifiées qu'au COMMIT
+        curseur.execute("SET CONSTRAINTS ALL DEFERRED")
+
+        curseur.execute("SELECT nom, empreinte FROM etl_sources")
+        empreintes_connues = dict(curseur.fetchall())
+        empreintes = {}
+
+        def a_jour(etape, chemins):
+            """Vrai si les sources de l'étape n'ont pas changé depuis le dernier chargement."""
+            empreintes[etape] = empreinte_sources(chemins)
+            if not forcer and empreintes_connues.get(etape) == empreintes[etape]:
+                print(f"Sources inchangées pour {etape}, étape ignorée.")
+                return True
+            return False
+
+        def ecrire(table, n):
+            print(f"{n} enregistrements insérés ou mis à jour dans la table {table}.")
+
+        # Tables de référence : quelques lignes fixes, complétées si besoin
+        ecrire('types_vehicules', upsert_dataframe(curseur, 'types_vehicules', donnees_vehicules(), ['id']))
+        ecrire('activite', upsert_dataframe(curseur, 'activite', donnees_activite(), ['nom_activite']))
+        ecrire('hierarchie_fonctionnelle', upsert_dataframe(
+            curseur, 'hierarchie_fonctionnelle', donnees_hierarchie_fonctionnelle(), ['nom_niveau']))
+        ecrire('typologie_modale', upsert_dataframe(
+            curseur, 'typologie_modale', donnees_typologie_modale(), ['nom_mode'],
+            mise_a_jour=['description', 'vitesse_moyenne', 'capacite']))
+
+        if not a_jour('zones', [zonage_path]):
+            ecrire('zones', upsert_dataframe(curseur, 'zones', donnees_zones(zonage_path),
+                                             ['identifiant_commune'], mise_a_jour=['nom']))
+
+        if not a_jour('routes', [routes_path]):
+            curseur.execute("SELECT id, nom_niveau FROM hierarchie_fonctionnelle")
+            hierarchie_mapping = {nom_niveau: id_niveau for id_niveau, nom_niveau in curseur.fetchall()}
+            ecrire('route', upsert_dataframe(curseur, 'route', donnees_routes(routes_path, hierarchie_mapping),
+                                             ['id_osm'], mise_a_jour=['id_hierarchie']))
+
+        # Les correspondances ligne-route dépendent aussi des routes
+        if not a_jour('lignes', lister_sources(LIGNES_PATH) + [routes_path]):
+            lignes = getAllLigne()
+            if lignes is not None:
+                ecrire('lignebus', upsert_dataframe(curseur, 'lignebus', donnees_ligne_bus(lignes), ['numero_ligne']))
+                routes_df = _dataframe(curseur, "SELECT id, id_osm FROM route", ['id', 'id_osm'])
+                lignes_bus_df = _dataframe(curseur, "SELECT id, numero_ligne FROM lignebus", ['id', 'numero_ligne'])
+                ecrire('ligneroute', upsert_dataframe(curseur, 'ligneroute',
+                                                      donnees_ligne_route(lignes, routes_df, lignes_bus_df),
+                                                      ['id_ligne', 'id_route']))
+
+        # Données simulées : population des zones qui n'en ont pas encore, autres tables seulement si vides
+        idzones = _ids(curseur, "SELECT id FROM zones")
+        zones_sans_population = _ids(
+            curseur, "SELECT z.id FROM zones z WHERE NOT EXISTS (SELECT 1 FROM population p WHERE p.id_zone = z.id)"
+        )
+        tranche_ages = _ids(curseur, "SELECT id FROM tranche_age")
+        ecrire('population', copier_dataframe(curseur, 'population',
+                                              donnees_population(zones_sans_population, tranche_ages)))
+
+        idroutes = _ids(curseur, "SELECT id FROM route")
+        idmodes = _ids(curseur, "SELECT id FROM typologie_modale")
+        simulees = [
+            ('matrice_od', lambda: donnees_matrice_od(idzones, _ids(curseur, "SELECT id FROM types_vehicules"))),
+            ('zone_activite', lambda: donnees_zone_activite(idzones, _ids(curseur, "SELECT id FROM activite"))),
+            ('menage', lambda: donnees_menage(idzones, idmodes)),
+            ('revenu', lambda: donnees_revenu(idzones)),
+            ('emploi', lambda: donnees_emploi(idzones)),
+            ('flux_trafic', lambda: donnees_flux_trafic(idroutes, idmodes,
+                                                        _ids(curseur, "SELECT id FROM periodes_temps"))),
+            ('iri', lambda: donnees_iri(idroutes)),
+            ('debit_vitesse', lambda: donnees_debit_vitesse(idroutes)),
+        ]
+        for table, donnees in simulees:
+            if _est_vide(curseur, table):
+                ecrire(table, copier_dataframe(curseur, table, donnees()))
+
+        # Enregistrer les empreintes avec les données : elles ne sont visibles qu'après le COMMIT
+        for etape, empreinte in empreintes.items():
+            curseur.execute(
+                "INSERT INTO etl_sources (nom, empreinte, date_chargement) VALUES (%s, %s, now()) "
+                "ON CONFLICT (nom) DO UPDATE SET empreinte = EXCLUDED.empreinte, date_chargement = now()",
+                (etape, empreinte)
+            )
+
+        connexion.commit()
+        print(f"Chargement terminé en {time.perf_counter() - debut:.1f} s.")
+    except Exception as e:
+        connexion.rollback()
+        print(f"Erreur lors du chargement, aucune donnée n'a été écrite : {e}")
+        raise
+    finally:
+        connexion.close()
+
+    # Les vues matérialisées du tableau de bord reflètent les nouvelles données
+    rafraichir_vues_materialisees()
@@ -0,0 +1,84 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+
+
+def coordonnees_polylignes(geometries):
+    """
+    Coordonnées de toutes les LineString/MultiLineString d'une GeoSeries en un seul passage vectorisé.
+    Retourne lon, lat (float64, NaN entre chaque ligne pour couper le tracé Plotly) et l'indice
+    de la géométrie d'origine de chaque point (séparateurs compris).
+    """
+    parts, idx_geom = shapely.get_parts(np.asarray(geometries, dtype=object), return_index=True)
+    coords, idx_part = shapely.get_coordinates(parts, return_index=True)
+
+    # Chaque point est décalé d'un séparateur par ligne qui le précède
+    total = len(coords) + len(parts)
+    positions = np.arange(len(coords)) + idx_part
+    separateurs = np.cumsum(np.bincount(idx_part, minlength=len(parts))) + np.arange(len(parts))
+
+    lons = np.full(total, np.nan)
+    lats = np.full(total, np.nan)
+    lons[positions] = coords[:, 0]
+    lats[positions] = coords[:, 1]
+
+    idx_points = np.empty(total, dtype=np.intp)
+    idx_points[positions] = idx_geom[idx_part]
+    idx_points[separateurs] = idx_geom
+
+    return lons, lats, idx_points
+
+
+def polylignes(geometries):
+    """Latitudes et longitudes séparées par NaN, prêtes pour un seul go.Scattermapbox."""
+    lons, lats, _ = coordonnees_polylignes(geometries)
+    return lats, lons
+
+
+# Niveaux de simplification du zonage : (zoom mapbox minimal, tolérance en degrés).
+# Un degré vaut ~110 km : 0.005 ≈ 500 m à l'échelle de l'agglomération, 0.0002 ≈ 20 m à l'échelle du quartier.
+NIVEAUX_ZOOM = (
+    (0, 0.005),
+    (11, 0.001),
+    (13, 0.0002),
+)
+
+# 5 décimales ≈ 1 m : au-delà, les coordonnées n'apportent rien à l'affichage et alourdissent le JSON
+PRECISION_COORDONNEES = 5
+
+
+def simplifier_couverture(geometries, tolerance, precision=PRECISION_COORDONNEES):
+    """
+    Simplifie un ensemble de polygones jointifs en conservant les frontières communes
+    (les zones voisines restent collées), puis arrondit les coordonnées.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    if tolerance > 0:
+        if hasattr(shapely, 'coverage_simplify'):
+            geometries = shapely.coverage_simplify(geometries, tolerance)
+        else:
+            # GEOS < 3.12 : simplification zone par zone, les frontières peuvent légèrement diverger
+            geometries = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    return shapely.transform(geometries, lambda coords: np.round(coords, precision))
+
+
+def geojson_simplifie(gdf, colonnes, tolerance):
+    """GeoJSON (dict) d'un GeoDataFrame simplifié, réduit aux seules propriétés utilisées par les figures."""
+    gdf_simplifie = gpd.GeoDataFrame(
+        gdf[list(colonnes)], geometry=simplifier_couverture(gdf.geometry.values, tolerance), crs=gdf.crs
+    )
+    return gdf_simplifie.to_geo_dict(drop_id=True)
+
+
+def geojson_par_niveau(gdf, colonnes, niveaux=NIVEAUX_ZOOM):
+    """Pré-calcule le GeoJSON simplifié de chaque niveau de zoom (une fois au démarrage)."""
+    return [geojson_simplifie(gdf, colonnes, tolerance) for _, tolerance in niveaux]
+
+
+def niveau_pour_zoom(zoom, niveaux=NIVEAUX_ZOOM):
+    """Indice du niveau de simplification adapté au zoom mapbox."""
+    niveau = 0
+    for i, (zoom_min, _) in enumerate(niveaux):
+        if zoom is not None and zoom >= zoom_min:
+            niveau = i
+    return niveau
@@ -8,38 +8,49 @@ from sqlalchemy.exc import SQLAlchemyError
 import datetime
 
 from src.data.traitement_data_bus import getAllLigne
+from src.data.zones import identifiant_zone
+
+
+# Les fonctions donnees_* préparent le DataFrame d'une table sans toucher à la base :
+# elles sont partagées par les insert_* ci-dessous et par le chargement en bloc (src/data/etl.py).
+# Les générateurs de données fictives prennent le nombre d'enregistrements à produire (20 par défaut).
+
+def donnees_zones(geojson_path):
+    # Charger le fichier GeoJSON
+    with open(geojson_path, 'r') as f:
+        geojson_dict = json.load(f)
+
+    zones = []
+    for feature in geojson_dict['features']:
+        zone_name = feature['properties'].get('ensemble_1', 'Inconnu')
+        ensemble_d = feature['properties'].get('ensemble d', '')
+        # Identifiant normalisé (minuscules) : même forme que les identifiants des cartes
+        identifiant_commune = identifiant_zone(ensemble_d, zone_name)
+        zones.append({
+            "nom": zone_name,
+            "identifiant_commune": identifiant_commune
+        })
+
+    # Convertir en DataFrame pour l'insertion
+    zones_df = pd.DataFrame(zones)
+
+    # Assurez-vous que les colonnes sont du bon type
+    zones_df['nom'] = zones_df['nom'].astype(str)
+    zones_df['identifiant_commune'] = zones_df['identifiant_commune'].astype(str, errors='ignore')
+    return zones_df
 
 
 def insert_zones(geojson_path):
     session = get_session()
 
     try:
-        # Charger le fichier GeoJSON
-        with open(geojson_path, 'r') as f:
-            geojson_dict = json.load(f)
-
-        zones = []
-        for feature in geojson_dict['features']:
-            zone_name = feature['properties'].get('ensemble_1', 'Inconnu')
-            ensemble_d = feature['properties'].get('ensemble d', '')
-            identifiant_commune = f"{ensemble_d}_{zone_name}"
-            zones.append({
-                "nom": zone_name,
-                "identifiant_commune": identifiant_commune
-            })
-
-        # Convertir en DataFrame pour l'insertion
-        zones_df = pd.DataFrame(zones)
-
-        # Assurez-vous que les colonnes sont du bon type
-        zones_df['nom'] = zones_df['nom'].astype(str)
-        zones_df['identifiant_commune'] = zones_df['identifiant_commune'].astype(str, errors='ignore')
+        zones_df = donnees_zones(geojson_path)
 
         # Insérer les données dans la table ZONES
         zones_df.to_sql('zones', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(zones)} zones ont été insérées dans la table ZONES.")
+        print(f"{len(zones_df)} zones ont été insérées dans la table ZONES.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Une erreur est survenue lors de l'insertion dans la base de données : {str(e)}")
@@ -51,12 +62,30 @@ def insert_zones(geojson_path):
     finally:
         session.close()
 
+def donnees_population(idzones, tranche_ages):
+    # Créer un DataFrame pour les données de population
+    population_data = []
+
+    # Générer des données de population pour chaque zone et chaque tranche d'âge
+    for idzone in idzones:
+        for tranche_age_id in tranche_ages:
+            feminine = random.randint(100, 1000)  # Générer un nombre aléatoire pour la population féminine
+            masculine = random.randint(100, 1000)  # Générer un nombre aléatoire pour la population masculine
+            population_data.append({
+                "id_zone": idzone,
+                "id_tranche_age": tranche_age_id,
+                "population_masculine": masculine,
+                "population_feminine": feminine,
+                "annee": datetime.datetime.now().year
+            })
+
+    # Convertir en DataFrame pour l'insertion
+    return pd.DataFrame(population_data)
+
+
 def insert_random_population():
     session = get_session()
     try:
-        # Créer un DataFrame pour les données de population
-        population_data = []
-
         # Récupérer tous les IDZONE de la table zones
         result = session.execute(text("SELECT id FROM zones"))
         idzones = [row[0] for row in result]  # Accéder aux éléments du tuple par leur index
@@ -65,27 +94,13 @@ def insert_random_population():
         result = session.execute(text("SELECT id FROM tranche_age"))
         tranche_ages = [row[0] for row in result]  # Accéder aux éléments du tuple par leur index
 
-        # Générer des données de population pour chaque zone et chaque tranche d'âge
-        for idzone in idzones:
-            for tranche_age_id in tranche_ages:
-                feminine = random.randint(100, 1000)  # Générer un nombre aléatoire pour la population féminine
-                masculine = random.randint(100, 1000)  # Générer un nombre aléatoire pour la population masculine
-                population_data.append({
-                    "id_zone": idzone,
-                    "id_tranche_age": tranche_age_id,
-                    "population_masculine": masculine,
-                    "population_feminine": feminine,
-                    "annee": datetime.datetime.now().year
-                })
-
-        # Convertir en DataFrame pour l'insertion
-        population_df = pd.DataFrame(population_data)
+        population_df = donnees_population(idzones, tranche_ages)
 
         # Insérer les données dans la table POPULATION
         population_df.to_sql('population', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(population_data)} enregistrements de population ont été insérés dans la table POPULATION.")
+        print(f"{len(population_df)} enregistrements de population ont été insérés dans la table POPULATION.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Une erreur est survenue lors de l'insertion dans la base de données : {str(e)}")
@@ -119,6 +134,29 @@ def insert_random_population():
 #     except Exception as e:
 #         print(f"Une erreur inattendue est survenue : {str(e)}")
 
+def donnees_matrice_od(idzones, idvehicules, nb_enregistrements=20):
+    matrice_od_data = []
+
+    for _ in range(nb_enregistrements):  # Enregistrements fictifs
+        id_origine = random.choice(idzones)
+        id_destination = random.choice(idzones)
+        while id_origine == id_destination:  # Assurez-vous que l'origine et la destination ne sont pas identiques
+            id_destination = random.choice(idzones)
+
+        id_type_vehicule = random.choice(idvehicules)
+        nombre = random.randint(1, 100)  # Générer un nombre aléatoire de déplacements
+
+        matrice_od_data.append({
+            "id_origine": id_origine,
+            "id_destination": id_destination,
+            "id_type_vehicule": id_type_vehicule,
+            "nombre": nombre
+        })
+
+    # Convertir en DataFrame pour l'insertion
+    return pd.DataFrame(matrice_od_data)
+
+
 def insert_matriceOD():
     session = get_session()  # Fonction qui doit retourner une session SQLAlchemy
     try:
@@ -126,32 +164,13 @@ def insert_matriceOD():
         idzones = [row[0] for row in session.execute(text("SELECT id FROM zones"))]
         idvehicules = [row[0] for row in session.execute(text("SELECT id FROM types_vehicules"))]
 
-        matrice_od_data = []
-
-        for _ in range(20):  # Insérer 20 enregistrements fictifs
-            id_origine = random.choice(idzones)
-            id_destination = random.choice(idzones)
-            while id_origine == id_destination:  # Assurez-vous que l'origine et la destination ne sont pas identiques
-                id_destination = random.choice(idzones)
-
-            id_type_vehicule = random.choice(idvehicules)
-            nombre = random.randint(1, 100)  # Générer un nombre aléatoire de déplacements
-
-            matrice_od_data.append({
-                "id_origine": id_origine,
-                "id_destination": id_destination,
-                "id_type_vehicule": id_type_vehicule,
-                "nombre": nombre
-            })
-
-        # Convertir en DataFrame pour l'insertion
-        matrice_od_df = pd.DataFrame(matrice_od_data)
+        matrice_od_df = donnees_matrice_od(idzones, idvehicules)
 
         # Insérer les données dans la table matrice_od
         matrice_od_df.to_sql('matrice_od', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(matrice_od_data)} enregistrements ont été insérés dans la table matrice_od.")
+        print(f"{len(matrice_od_df)} enregistrements ont été insérés dans la table matrice_od.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Une erreur est survenue lors de l'insertion dans la base de données : {str(e)}")
@@ -163,24 +182,28 @@ def insert_matriceOD():
     finally:
         session.close()
 
+def donnees_vehicules():
+    # Liste des types de véhicules à insérer
+    vehicules = [
+        {"id": 1, "nom_type": "Voiture"},
+        {"id": 2, "nom_type": "Moto"},
+        {"id": 3, "nom_type": "Bus"},
+    ]
+
+    # Convertir en DataFrame pour l'insertion
+    return pd.DataFrame(vehicules)
+
+
 def insert_vehicules():
     session = get_session()
     try:
-        # Liste des types de véhicules à insérer
-        vehicules = [
-            {"id": 1, "nom_type": "Voiture"},
-            {"id": 2, "nom_type": "Moto"},
-            {"id": 3, "nom_type": "Bus"},
-        ]
-
-        # Convertir en DataFrame pour l'insertion
-        vehicules_df = pd.DataFrame(vehicules)
+        vehicules_df = donnees_vehicules()
 
         # Insérer les données dans la table TYPEVEHICULE
         vehicules_df.to_sql('types_vehicules', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(vehicules)} types de véhicules ont été insérés dans la table TYPEVEHICULE.")
+        print(f"{len(vehicules_df)} types de véhicules ont été insérés dans la table TYPEVEHICULE.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Une erreur est survenue lors de l'insertion dans la base de données : {str(e)}")
@@ -192,19 +215,23 @@ def insert_vehicules():
     finally:
         session.close()
 
+def donnees_activite():
+    activites = ["Commerciale", "Industrielle", "Résidentielle", "Agricole", "Touristique"]
+    activite_data = [{"nom_activite": act} for act in activites]
+
+    return pd.DataFrame(activite_data)
+
+
 def insert_activite():
     session = get_session()
     try:
-        activites = ["Commerciale", "Industrielle", "Résidentielle", "Agricole", "Touristique"]
-        activite_data = [{"nom_activite": act} for act in activites]
-
-        activite_df = pd.DataFrame(activite_data)
+        activite_df = donnees_activite()
 
         # Insérer les données dans la table 'activite'
         activite_df.to_sql('activite', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(activite_data)} activités ont été insérées dans la table activite.")
+        print(f"{len(activite_df)} activités ont été insérées dans la table activite.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table activite : {str(e)}")
@@ -212,6 +239,23 @@ def insert_activite():
     finally:
         session.close()
 
+def donnees_zone_activite(idzones, idactivites, nb_enregistrements=20):
+    zone_activite_data = []
+
+    for _ in range(nb_enregistrements):
+        id_zone = random.choice(idzones)
+        id_activite = random.choice(idactivites)
+        pourcentage = round(random.uniform(10, 100), 2)  # Générer un pourcentage aléatoire entre 10 et 100
+
+        zone_activite_data.append({
+            "id_zone": id_zone,
+            "id_activite": id_activite,
+            "pourcentage": pourcentage
+        })
+
+    return pd.DataFrame(zone_activite_data)
+
+
 def insert_zone_activite():
     session = get_session()
     try:
@@ -219,26 +263,13 @@ def insert_zone_activite():
         idzones = [row[0] for row in session.execute(text("SELECT id FROM zones"))]
         idactivites = [row[0] for row in session.execute(text("SELECT id FROM activite"))]
 
-        zone_activite_data = []
-
-        for _ in range(20):
-            id_zone = random.choice(idzones)
-            id_activite = random.choice(idactivites)
-            pourcentage = round(random.uniform(10, 100), 2)  # Générer un pourcentage aléatoire entre 10 et 100
-
-            zone_activite_data.append({
-                "id_zone": id_zone,
-                "id_activite": id_activite,
-                "pourcentage": pourcentage
-            })
-
-        zone_activite_df = pd.DataFrame(zone_activite_data)
+        zone_activite_df = donnees_zone_activite(idzones, idactivites)
 
         # Insérer les données dans la table 'zone_activite'
         zone_activite_df.to_sql('zone_activite', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(zone_activite_data)} enregistrements ont été insérés dans la table zone_activite.")
+        print(f"{len(zone_activite_df)} enregistrements ont été insérés dans la table zone_activite.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table zone_activite : {str(e)}")
@@ -246,41 +277,44 @@ def insert_zone_activite():
     finally:
         session.close()
 
+def donnees_menage(idzones, id_typologies_modales, nb_enregistrements=20):
+    annee_courante = datetime.datetime.now().year
+    menage_data = []
+
+    for _ in range(nb_enregistrements):
+        id_zone = random.choice(idzones)
+        annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
+        id_typologie_modale = random.choice(id_typologies_modales)  # Sélectionner aléatoirement une typologie modale
+        total_menages = random.randint(50, 5000)  # Nombre aléatoire de ménages
+        taille_moyenne_menage = round(random.uniform(2.5, 6.0), 2)  # Taille moyenne des ménages
+        vehicules_par_menage = round(random.uniform(0.5, 3.0), 2)  # Nombre moyen de véhicules par ménage
+
+        menage_data.append({
+            "id_zone": id_zone,
+            "annee": annee,
+            "id_typologie_modale": id_typologie_modale,
+            "total_menages": total_menages,
+            "taille_moyenne_menage": taille_moyenne_menage,
+            "vehicules_par_menage": vehicules_par_menage
+        })
+
+    return pd.DataFrame(menage_data)
+
+
 def insert_menage():
     session = get_session()
     try:
-        annee_courante = datetime.datetime.now().year
-
         # Récupérer tous les ID des zones et typologies modales
         idzones = [row[0] for row in session.execute(text("SELECT id FROM zones"))]
         id_typologies_modales = [row[0] for row in session.execute(text("SELECT id FROM typologie_modale"))]
 
-        menage_data = []
-
-        for _ in range(20):
-            id_zone = random.choice(idzones)
-            annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
-            id_typologie_modale = random.choice(id_typologies_modales)  # Sélectionner aléatoirement une typologie modale
-            total_menages = random.randint(50, 5000)  # Nombre aléatoire de ménages
-            taille_moyenne_menage = round(random.uniform(2.5, 6.0), 2)  # Taille moyenne des ménages
-            vehicules_par_menage = round(random.uniform(0.5, 3.0), 2)  # Nombre moyen de véhicules par ménage
-
-            menage_data.append({
-                "id_zone": id_zone,
-                "annee": annee,
-                "id_typologie_modale": id_typologie_modale,
-                "total_menages": total_menages,
-                "taille_moyenne_menage": taille_moyenne_menage,
-                "vehicules_par_menage": vehicules_par_menage
-            })
-
-        menage_df = pd.DataFrame(menage_data)
+        menage_df = donnees_menage(idzones, id_typologies_modales)
 
         # Insérer les données dans la table 'menage'
         menage_df.to_sql('menage', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(menage_data)} enregistrements ont été insérés dans la table menage.")
+        print(f"{len(menage_df)} enregistrements ont été insérés dans la table menage.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table menage : {str(e)}")
@@ -288,36 +322,40 @@ def insert_menage():
     finally:
         session.close()
 
+def donnees_revenu(idzones, nb_enregistrements=20):
+    annee_courante = datetime.datetime.now().year
+    revenu_data = []
+
+    for _ in range(nb_enregistrements):
+        id_zone = random.choice(idzones)
+        annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
+        revenu_moyen = round(random.uniform(15000, 80000), 2)  # Revenu moyen aléatoire
+        revenu_median = round(random.uniform(10000, 70000), 2)  # Revenu médian aléatoire
+        taux_pauvrete = round(random.uniform(5.0, 40.0), 2)  # Taux de pauvreté aléatoire
+
+        revenu_data.append({
+            "id_zone": id_zone,
+            "annee": annee,
+            "revenu_moyen": revenu_moyen,
+            "revenu_median": revenu_median,
+            "taux_pauvrete": taux_pauvrete
+        })
+
+    return pd.DataFrame(revenu_data)
+
+
 def insert_revenu():
     session = get_session()
     try:
-        annee_courante = datetime.datetime.now().year
         idzones = [row[0] for row in session.execute(text("SELECT id FROM zones"))]
 
-        revenu_data = []
-
-        for _ in range(20):
-            id_zone = random.choice(idzones)
-            annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
-            revenu_moyen = round(random.uniform(15000, 80000), 2)  # Revenu moyen aléatoire
-            revenu_median = round(random.uniform(10000, 70000), 2)  # Revenu médian aléatoire
-            taux_pauvrete = round(random.uniform(5.0, 40.0), 2)  # Taux de pauvreté aléatoire
-
-            revenu_data.append({
-                "id_zone": id_zone,
-                "annee": annee,
-                "revenu_moyen": revenu_moyen,
-                "revenu_median": revenu_median,
-                "taux_pauvrete": taux_pauvrete
-            })
-
-        revenu_df = pd.DataFrame(revenu_data)
+        revenu_df = donnees_revenu(idzones)
 
         # Insérer les données dans la table 'revenu'
         revenu_df.to_sql('revenu', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(revenu_data)} enregistrements ont été insérés dans la table revenu.")
+        print(f"{len(revenu_df)} enregistrements ont été insérés dans la table revenu.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table revenu : {str(e)}")
@@ -325,34 +363,38 @@ def insert_revenu():
     finally:
         session.close()
 
+def donnees_emploi(idzones, nb_enregistrements=20):
+    annee_courante = datetime.datetime.now().year
+    emploi_data = []
+
+    for _ in range(nb_enregistrements):
+        id_zone = random.choice(idzones)
+        annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
+        taux_chomage = round(random.uniform(5.0, 25.0), 2)  # Taux de chômage aléatoire
+        taux_participation = round(random.uniform(50.0, 75.0), 2)  # Taux de participation aléatoire
+
+        emploi_data.append({
+            "id_zone": id_zone,
+            "annee": annee,
+            "taux_chomage": taux_chomage,
+            "taux_participation": taux_participation,
+        })
+
+    return pd.DataFrame(emploi_data)
+
+
 def insert_emploi():
     session = get_session()
     try:
-        annee_courante = datetime.datetime.now().year
         idzones = [row[0] for row in session.execute(text("SELECT id FROM zones"))]
 
-        emploi_data = []
-
-        for _ in range(20):
-            id_zone = random.choice(idzones)
-            annee = random.choice(range(annee_courante - 5, annee_courante + 1))  # Années de données
-            taux_chomage = round(random.uniform(5.0, 25.0), 2)  # Taux de chômage aléatoire
-            taux_participation = round(random.uniform(50.0, 75.0), 2)  # Taux de participation aléatoire
-
-            emploi_data.append({
-                "id_zone": id_zone,
-                "annee": annee,
-                "taux_chomage": taux_chomage,
-                "taux_participation": taux_participation,
-            })
-
-        emploi_df = pd.DataFrame(emploi_data)
+        emploi_df = donnees_emploi(idzones)
 
         # Insérer les données dans la table 'emploi'
         emploi_df.to_sql('emploi', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(emploi_data)} enregistrements ont été insérés dans la table emploi.")
+        print(f"{len(emploi_df)} enregistrements ont été insérés dans la table emploi.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table emploi : {str(e)}")
@@ -360,19 +402,23 @@ def insert_emploi():
     finally:
         session.close()
 
+def donnees_hierarchie_fonctionnelle():
+    niveaux = ["primary", "secondary", "tertiary"]
+    hierarchie_data = [{"nom_niveau": niveau} for niveau in niveaux]
+
+    return pd.DataFrame(hierarchie_data)
+
+
 def insert_hierarchie_fonctionnelle():
     session = get_session()
     try:
-        niveaux = ["primary", "secondary", "tertiary"]
-        hierarchie_data = [{"nom_niveau": niveau} for niveau in niveaux]
-
-        hierarchie_df = pd.DataFrame(hierarchie_data)
+        hierarchie_df = donnees_hierarchie_fonctionnelle()
 
         # Insérer les données dans la table 'hierarchie_fonctionnelle'
         hierarchie_df.to_sql('hierarchie_fonctionnelle', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(hierarchie_data)} enregistrements ont été insérés dans la table hierarchie_fonctionnelle.")
+        print(f"{len(hierarchie_df)} enregistrements ont été insérés dans la table hierarchie_fonctionnelle.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table hierarchie_fonctionnelle : {str(e)}")
@@ -380,36 +426,36 @@ def insert_hierarchie_fonctionnelle():
     finally:
         session.close()
 
+def donnees_routes(geojson_path, hierarchie_mapping):
+    # Charger le fichier GeoJSON
+    with open(geojson_path, 'r') as f:
+        geojson_dict = json.load(f)
+
+    # Propriétés de toutes les features, puis correspondance highway -> id de la hiérarchie en une opération
+    proprietes = pd.DataFrame(
+        [feature['properties'] for feature in geojson_dict['features']], columns=['osm_id', 'highway']
+    )
+    route_df = pd.DataFrame({
+        "id_hierarchie": proprietes['highway'].map(hierarchie_mapping),
+        "id_osm": proprietes['osm_id'],
+    })
+
+    # Garder les routes dont l'osm_id et le niveau hiérarchique sont connus
+    route_df = route_df.dropna(subset=['id_hierarchie', 'id_osm'])
+    route_df['id_hierarchie'] = route_df['id_hierarchie'].astype(int)
+    return route_df.reset_index(drop=True)
+
+
 def insert_routes_from_geojson_with_hierarchy(geojson_path):
     session = get_session()
     try:
-        # Charger le fichier GeoJSON
-        with open(geojson_path, 'r') as f:
-            geojson_dict = json.load(f)
-
         # Exécuter la requête pour obtenir le mapping de la hiérarchie fonctionnelle
         result = session.execute(text("SELECT id, nom_niveau FROM hierarchie_fonctionnelle"))
 
         # Créer un dictionnaire de mapping entre 'nom_niveau' et 'id'
         hierarchie_mapping = {row[1]: row[0] for row in result}  # row[1] est 'nom_niveau', row[0] est 'id'
 
-        route_data = []
-
-        # Parcourir les features du GeoJSON pour extraire les informations nécessaires
-        for feature in geojson_dict['features']:
-            id_OSM = feature['properties'].get('osm_id')
-            nom_niveau = feature['properties'].get('highway')
-            id_hierarchie = hierarchie_mapping.get(nom_niveau)
-
-            # Ajouter les données à la liste si les conditions sont remplies
-            if id_OSM is not None and id_hierarchie is not None:
-                route_data.append({
-                    "id_hierarchie": id_hierarchie,
-                    "id_osm": id_OSM
-                })
-
-        # Convertir la liste en DataFrame pour l'insertion dans la base de données
-        route_df = pd.DataFrame(route_data)
+        route_df = donnees_routes(geojson_path, hierarchie_mapping)
 
         # Insérer les données dans la table 'route'
         route_df.to_sql('route', session.bind, if_exists='append', index=False)
@@ -433,6 +479,37 @@ def insert_routes_from_geojson_with_hierarchy(geojson_path):
         # Fermer la session
         session.close()
 
+def donnees_flux_trafic(idroute, idmodes, idperiodes, nb_enregistrements=20):
+    flux_data = []
+
+    for _ in range(nb_enregistrements):
+        id_origine = random.choice(idroute)
+        id_destination = random.choice(idroute)
+        while id_origine == id_destination:
+            id_destination = random.choice(idroute)
+        id_mode = random.choice(idmodes)
+        id_periode_temps = random.choice(idperiodes)
+        volume = random.randint(50, 1000)
+        date = datetime.datetime.now().date()
+        vitesse_moyenne = round(random.uniform(30.0, 120.0), 2)
+        temps_de_trajet = round(random.uniform(5.0, 60.0), 2)
+        distance = round(random.uniform(1.0, 100.0), 2)
+
+        flux_data.append({
+            "id_departed": id_origine,
+            "id_arrived": id_destination,
+            "id_typologie_modale": id_mode,
+            "id_periode_temps": id_periode_temps,
+            "volume": volume,
+            "date": date,
+            "vitesse_moyenne": vitesse_moyenne,
+            "temps_de_trajet": temps_de_trajet,
+            "distance": distance
+        })
+
+    return pd.DataFrame(flux_data)
+
+
 def insert_flux_trafic():
     session = get_session()
     try:
@@ -440,40 +517,13 @@ def insert_flux_trafic():
         idmodes = [row[0] for row in session.execute(text("SELECT id FROM typologie_modale"))]
         idperiodes = [row[0] for row in session.execute(text("SELECT id FROM periodes_temps"))]
 
-        flux_data = []
-
-        for _ in range(20):
-            id_origine = random.choice(idroute)
-            id_destination = random.choice(idroute)
-            while id_origine == id_destination:
-                id_destination = random.choice(idroute)
-            id_mode = random.choice(idmodes)
-            id_periode_temps = random.choice(idperiodes)
-            volume = random.randint(50, 1000)
-            date = datetime.datetime.now().date()
-            vitesse_moyenne = round(random.uniform(30.0, 120.0), 2)
-            temps_de_trajet = round(random.uniform(5.0, 60.0), 2)
-            distance = round(random.uniform(1.0, 100.0), 2)
-
-            flux_data.append({
-                "id_departed": id_origine,
-                "id_arrived": id_destination,
-                "id_typologie_modale": id_mode,
-                "id_periode_temps": id_periode_temps,
-                "volume": volume,
-                "date": date,
-                "vitesse_moyenne": vitesse_moyenne,
-                "temps_de_trajet": temps_de_trajet,
-                "distance": distance
-            })
-
-        flux_df = pd.DataFrame(flux_data)
+        flux_df = donnees_flux_trafic(idroute, idmodes, idperiodes)
 
         # Insérer les données dans la table 'flux_trafic'
         flux_df.to_sql('flux_trafic', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(flux_data)} enregistrements ont été insérés dans la table flux_trafic.")
+        print(f"{len(flux_df)} enregistrements ont été insérés dans la table flux_trafic.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table flux_trafic : {str(e)}")
@@ -481,36 +531,41 @@ def insert_flux_trafic():
     finally:
         session.close()
 
+def donnees_debit_vitesse(idroutes, nb_enregistrements=20):
+    debit_vitesse_data = []
+
+    for _ in range(nb_enregistrements):
+        id_route = random.choice(idroutes)
+        vitesse_moyenne = round(random.uniform(30.0, 120.0), 2)
+        vitesse_maximale = round(random.uniform(80.0, 130.0), 2)
+        vitesse_minimale = round(random.uniform(10.0, 50.0), 2)
+        debit_trafic = round(random.uniform(100.0, 10000.0), 2)
+        date_observation = datetime.datetime.now()
+
+        debit_vitesse_data.append({
+            "id_route": id_route,
+            "vitesse_moyenne": vitesse_moyenne,
+            "vitesse_maximale": vitesse_maximale,
+            "vitesse_minimale": vitesse_minimale,
+            "debit_trafic": debit_trafic,
+            "date_observation": date_observation
+        })
+
+    return pd.DataFrame(debit_vitesse_data)
+
+
 def insert_debit_vitesse():
     session = get_session()
     try:
         idroutes = [row[0] for row in session.execute(text("SELECT id FROM route"))]
-        debit_vitesse_data = []
-
-        for _ in range(20):
-            id_route = random.choice(idroutes)
-            vitesse_moyenne = round(random.uniform(30.0, 120.0), 2)
-            vitesse_maximale = round(random.uniform(80.0, 130.0), 2)
-            vitesse_minimale = round(random.uniform(10.0, 50.0), 2)
-            debit_trafic = round(random.uniform(100.0, 10000.0), 2)
-            date_observation = datetime.datetime.now()
-
-            debit_vitesse_data.append({
-                "id_route": id_route,
-                "vitesse_moyenne": vitesse_moyenne,
-                "vitesse_maximale": vitesse_maximale,
-                "vitesse_minimale": vitesse_minimale,
-                "debit_trafic": debit_trafic,
-                "date_observation": date_observation
-            })
 
-        debit_vitesse_df = pd.DataFrame(debit_vitesse_data)
+        debit_vitesse_df = donnees_debit_vitesse(idroutes)
 
         # Insérer les données dans la table 'debit_vitesse'
         debit_vitesse_df.to_sql('debit_vitesse', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(debit_vitesse_data)} enregistrements ont été insérés dans la table debit_vitesse.")
+        print(f"{len(debit_vitesse_df)} enregistrements ont été insérés dans la table debit_vitesse.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table debit_vitesse : {str(e)}")
@@ -518,31 +573,35 @@ def insert_debit_vitesse():
     finally:
         session.close()
 
+def donnees_iri(idroutes, nb_enregistrements=20):
+    iri_data = []
+
+    for _ in range(nb_enregistrements):
+        id_route = random.choice(idroutes)
+        valeur_iri = round(random.uniform(1.0, 10.0), 2)  # IRI values usually range from 1 to 10 m/km
+        date_observation = datetime.datetime.now()
+
+        iri_data.append({
+            "id_route": id_route,
+            "valeur_iri": valeur_iri,
+            "date_observation": date_observation
+        })
+
+    return pd.DataFrame(iri_data)
+
+
 def insert_iri():
     session = get_session()
     try:
         idroutes = [row[0] for row in session.execute(text("SELECT id FROM route"))]
 
-        iri_data = []
-
-        for _ in range(20):
-            id_route = random.choice(idroutes)
-            valeur_iri = round(random.uniform(1.0, 10.0), 2)  # IRI values usually range from 1 to 10 m/km
-            date_observation = datetime.datetime.now()
-
-            iri_data.append({
-                "id_route": id_route,
-                "valeur_iri": valeur_iri,
-                "date_observation": date_observation
-            })
-
-        iri_df = pd.DataFrame(iri_data)
+        iri_df = donnees_iri(idroutes)
 
         # Insérer les données dans la table 'iri'
         iri_df.to_sql('iri', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(iri_data)} enregistrements ont été insérés dans la table iri.")
+        print(f"{len(iri_df)} enregistrements ont été insérés dans la table iri.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table iri : {str(e)}")
@@ -550,25 +609,29 @@ def insert_iri():
     finally:
         session.close()
 
+def donnees_typologie_modale():
+    modes_transport = [
+        {"nom_mode": "Bus", "description": "Transport en commun par bus", "vitesse_moyenne": 40.0, "capacite": 50},
+        {"nom_mode": "Vélo", "description": "Transport individuel par vélo", "vitesse_moyenne": 15.0, "capacite": 1},
+        {"nom_mode": "Voiture", "description": "Transport individuel ou partagé par voiture", "vitesse_moyenne": 60.0, "capacite": 5},
+        {"nom_mode": "Tramway", "description": "Transport en commun par tramway", "vitesse_moyenne": 25.0, "capacite": 200},
+        {"nom_mode": "Train", "description": "Transport longue distance par train", "vitesse_moyenne": 100.0, "capacite": 500},
+        {"nom_mode": "Marche", "description": "Déplacement à pied", "vitesse_moyenne": 5.0, "capacite": 1}
+    ]
+
+    return pd.DataFrame(modes_transport)
+
+
 def insert_typologie_modale():
     session = get_session()
     try:
-        modes_transport = [
-            {"nom_mode": "Bus", "description": "Transport en commun par bus", "vitesse_moyenne": 40.0, "capacite": 50},
-            {"nom_mode": "Vélo", "description": "Transport individuel par vélo", "vitesse_moyenne": 15.0, "capacite": 1},
-            {"nom_mode": "Voiture", "description": "Transport individuel ou partagé par voiture", "vitesse_moyenne": 60.0, "capacite": 5},
-            {"nom_mode": "Tramway", "description": "Transport en commun par tramway", "vitesse_moyenne": 25.0, "capacite": 200},
-            {"nom_mode": "Train", "description": "Transport longue distance par train", "vitesse_moyenne": 100.0, "capacite": 500},
-            {"nom_mode": "Marche", "description": "Déplacement à pied", "vitesse_moyenne": 5.0, "capacite": 1}
-        ]
-
-        typologie_modale_df = pd.DataFrame(modes_transport)
+        typologie_modale_df = donnees_typologie_modale()
 
         # Insérer les données dans la table 'typologie_modale'
         typologie_modale_df.to_sql('typologie_modale', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(modes_transport)} enregistrements ont été insérés dans la table typologie_modale.")
+        print(f"{len(typologie_modale_df)} enregistrements ont été insérés dans la table typologie_modale.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Erreur lors de l'insertion dans la table typologie_modale : {str(e)}")
@@ -577,9 +640,43 @@ def insert_typologie_modale():
         session.close()
 
 
+def donnees_ligne_bus(combined_dataframe):
+    # Extraire les numéros de ligne de bus (taxibe_lin) uniques et renseignés
+    lignes_bus = combined_dataframe['taxibe_lin'].dropna().unique()
+
+    # Convertir en DataFrame pour l'insertion
+    lignes_df = pd.DataFrame({"numero_ligne": lignes_bus})
+
+    # Assurez-vous que les colonnes sont du bon type
+    lignes_df['numero_ligne'] = lignes_df['numero_ligne'].astype(str)
+    return lignes_df
+
+
+def donnees_ligne_route(combined_dataframe, routes_df, lignes_bus_df):
+    """
+    Correspondances ligne-route par jointure : osm_id des segments de ligne -> route(id_osm),
+    taxibe_lin -> ligneBus(numero_ligne). routes_df : (id, id_osm), lignes_bus_df : (id, numero_ligne).
+    """
+    segments = combined_dataframe[['osm_id', 'taxibe_lin']].dropna(subset=['osm_id'])
+    segments = segments.assign(osm_id=segments['osm_id'].astype(str))
+
+    routes = routes_df.rename(columns={'id': 'id_route'}).assign(id_osm=routes_df['id_osm'].astype(str))
+    lignes = lignes_bus_df.rename(columns={'id': 'id_ligne'})
+
+    ligne_route_df = (segments
+                      .merge(routes, left_on='osm_id', right_on='id_osm', how='inner')
+                      .merge(lignes, left_on='taxibe_lin', right_on='numero_ligne', how='inner'))
+
+    non_trouves = len(combined_dataframe) - len(ligne_route_df)
+    if non_trouves:
+        print(f"{non_trouves} segments sans route ou ligne de bus correspondante")
+
+    return ligne_route_df[['id_ligne', 'id_route']].astype(int).reset_index(drop=True)
+
+
 def insert_ligne_bus():
     """
-    Insère les lignes de bus dans la table ligneBus à partir des fichiers GeoJSON, tout en évitant les doublons.
+    Insère les lignes de bus dans la table ligneBus à partir des fichiers GeoJSON.
     """
     session = get_session()
 
@@ -591,26 +688,13 @@ def insert_ligne_bus():
             print("Aucune donnée à insérer.")
             return
 
-        # Extraire les numéros de ligne de bus (taxibe_lin) uniques
-        lignes_bus = combined_dataframe['taxibe_lin'].unique()
-
-        # Convertir en DataFrame pour l'insertion
-        lignes_df = pd.DataFrame({"numero_ligne": lignes_bus})
+        lignes_df = donnees_ligne_bus(combined_dataframe)
 
-        # Assurez-vous que les colonnes sont du bon type
-        lignes_df['numero_ligne'] = lignes_df['numero_ligne'].astype(str)
-
-        # Insérer les données dans la table ligneBus en évitant les doublons
-        for numero_ligne in lignes_df['numero_ligne']:
-            if pd.notna(numero_ligne):  # Vérifier que le numéro de ligne n'est pas NaN
-                # Utiliser une requête SQL pour insérer les lignes en évitant les doublons
-                session.execute(text("""
-                    INSERT INTO ligneBus (numero_ligne)
-                    VALUES (:numero_ligne) ;
-                """), {"numero_ligne": numero_ligne})
+        # Insérer les données dans la table ligneBus
+        lignes_df.to_sql('lignebus', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(lignes_bus)} lignes de bus ont été insérées dans la table ligneBus.")
+        print(f"{len(lignes_df)} lignes de bus ont été insérées dans la table ligneBus.")
     except SQLAlchemyError as e:
         session.rollback()
         print(f"Une erreur est survenue lors de l'insertion dans la base de données : {str(e)}")
@@ -637,68 +721,17 @@ def insert_ligne_route():
             print("Aucune donnée à traiter.")
             return
 
-        # Récupérer les routes existantes de la base de données
-        result = session.execute(text("SELECT id, id_osm FROM route")).mappings()
-        routes = {row['id_osm']: row['id'] for row in result}  # Dictionnaire des routes par osm_id
-
-        # Récupérer les lignes de bus existantes de la base de données
-        result = session.execute(text("SELECT id, numero_ligne FROM ligneBus")).mappings()
-        lignes_bus = {row['numero_ligne']: row['id'] for row in
-                      result}  # Dictionnaire des lignes de bus par numero_ligne
-
-        # Liste pour stocker les données à insérer dans la table ligneRoute
-        ligne_route_data = []
-        i=0
-
-        # Boucler à travers le DataFrame pour trouver les correspondances osm_id
-        for _, row in combined_dataframe.iterrows():
-            osm_id = row['osm_id']
-            numero_ligne = row['taxibe_lin']
-
-            if pd.notna(osm_id) and osm_id in routes and numero_ligne in lignes_bus:
-                # Récupérer les IDs correspondants
-                id_route = routes[osm_id]
-                id_ligne = lignes_bus[numero_ligne]
-
-                ligne_route_data.append({
-                    'id_ligne': int(id_ligne),  # Conversion explicite en int
-                    'id_route': int(id_route)  # Conversion explicite en int
-                })
-            else:
-                i=i+1
-                print(i, 'id OSM qui ne se trouve pas le table route')
-
-        # Convertir en DataFrame pour l'insertion
-        ligne_route_df = pd.DataFrame(ligne_route_data)
-        print(ligne_route_df.shape[0])
-
-        # Assurez-vous que les colonnes sont du bon type
-        ligne_route_df['id_ligne'] = ligne_route_df['id_ligne'].astype(int)
-        ligne_route_df['id_route'] = ligne_route_df['id_route'].astype(int)
+        # Récupérer les routes et les lignes de bus existantes de la base de données
+        routes_df = pd.read_sql(text("SELECT id, id_osm FROM route"), session.bind)
+        lignes_bus_df = pd.read_sql(text("SELECT id, numero_ligne FROM ligneBus"), session.bind)
+
+        ligne_route_df = donnees_ligne_route(combined_dataframe, routes_df, lignes_bus_df)
 
         # Insérer les données dans la table ligneRoute
-        for index, row in ligne_route_df.iterrows():
-            try:
-                # Convertir chaque valeur de type numpy en type natif avant l'insertion
-                id_ligne = int(row['id_ligne'])
-                id_route = int(row['id_route'])
-
-                session.execute(text("""
-                            INSERT INTO ligneRoute (id_ligne, id_route)
-                            VALUES (:id_ligne, :id_route)
-                        """), {"id_ligne": id_ligne, "id_route": id_route})
-
-            except SQLAlchemyError as e:
-                # Afficher le message d'erreur spécifique pour l'insertion échouée
-                print(f"Erreur lors de l'insertion de id_ligne={id_ligne}, id_route={id_route} : {str(e)}")
-                session.rollback()
-            except Exception as e:
-                # Afficher tout autre type d'erreur
-                print(f"Erreur inattendue lors de l'insertion de id_ligne={id_ligne}, id_route={id_route} : {str(e)}")
-                session.rollback()
+        ligne_route_df.to_sql('ligneroute', session.bind, if_exists='append', index=False)
 
         session.commit()
-        print(f"{len(ligne_route_data)} correspondances ligne-route ont été insérées dans la table ligneRoute.")
+        print(f"{len(ligne_route_df)} correspondances ligne-route ont été insérées dans la table ligneRoute.")
 
     except SQLAlchemyError as e:
         session.rollback()
@@ -709,4 +742,4 @@ def insert_ligne_route():
         print(f"Une erreur inattendue est survenue : {str(e)}")
         raise
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
@@ -0,0 +1,61 @@
+from src.data.arrets_bus import ArretsBus, loadArretsBus
+from src.data.geometrie import NIVEAUX_ZOOM, geojson_par_niveau, geojson_simplifie, niveau_pour_zoom
+from src.data.localisation import LocalisateurZones
+from src.data.registre import registre, partager_tableau
+from src.data.traitement_data_bus import IndexLignes
+from src.data.traitement_data_spatiale import loadPopulationCarte, loadRepartitionZonale, loadRevenuCarte, \
+    get_congestion_point
+from src.data.utils import extract_lat_lon
+from src.figure.bus_graph import loadLignesPreparees, precalculer_traces_lignes
+from src.figure.carte import load_and_prepare_traffic_data
+
+# Jeux de données du tableau de bord, lus depuis le cache disque (python -m src.data.cache pour le construire)
+# et chargés via le registre : rien n'est lu à l'import, chaque jeu l'est au premier accès ou par le
+# préchargement en arrière-plan (registre.prechauffer) ; avec gunicorn, une fois dans le maître avant le fork.
+
+# Zoom de la carte des lignes de bus
+ZOOM_BUS = 12
+
+
+def _routes():
+    # Plus gros tableaux de l'application : coordonnées des routes en memory-map, une copie pour tous les workers
+    lats, lons = extract_lat_lon()
+    return partager_tableau('routes_lats', lats), partager_tableau('routes_lons', lons)
+
+
+def _trafic():
+    return load_and_prepare_traffic_data(
+        geojson_path=r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson",
+        traffic_data_function=get_congestion_point
+    )
+
+
+def _zonage_bus():
+    # Zonage simplifié au niveau de détail du zoom de la carte des lignes
+    _, tolerance = NIVEAUX_ZOOM[niveau_pour_zoom(ZOOM_BUS)]
+    return geojson_simplifie(registre.obtenir('repartition_zonale'), ['combined'], tolerance)
+
+
+def _centre_lignes():
+    lignes = registre.obtenir('lignes_preparees')
+    return dict(lat=lignes['centroid_lat'].mean(), lon=lignes['centroid_lon'].mean())
+
+
+registre.enregistrer('lignes_preparees', loadLignesPreparees)
+registre.enregistrer('index_lignes', lambda: IndexLignes(registre.obtenir('lignes_preparees')))
+registre.enregistrer('population_carte', loadPopulationCarte)
+registre.enregistrer('localisateur_zones', lambda: LocalisateurZones(registre.obtenir('population_carte')))
+registre.enregistrer('repartition_zonale', loadRepartitionZonale)
+registre.enregistrer('revenu_carte', loadRevenuCarte)
+registre.enregistrer('congestion', get_congestion_point)
+registre.enregistrer('routes', _routes)
+registre.enregistrer('trafic', _trafic)
+registre.enregistrer('arrets_bus', lambda: ArretsBus(loadArretsBus(), registre.obtenir('lignes_preparees')))
+
+# Jeux dérivés, calculés une seule fois à partir des précédents
+registre.enregistrer('zonage_communes', lambda: geojson_par_niveau(registre.obtenir('population_carte'),
+                                                                   ['identifiant_commune', 'ensemble_concat']))
+registre.enregistrer('zonage_defaut', lambda: geojson_par_niveau(registre.obtenir('repartition_zonale'), ['combined']))
+registre.enregistrer('zonage_bus', _zonage_bus)
+registre.enregistrer('traces_lignes', lambda: precalculer_traces_lignes(registre.obtenir('lignes_preparees')))
+registre.enregistrer('centre_lignes', _centre_lignes)
@@ -0,0 +1,40 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+class LocalisateurZones:
+    """
+    Retrouve la zone contenant un point (lat, lon) grâce à un R-tree (STRtree) sur les polygones préparés.
+    À construire une seule fois au démarrage ; chaque recherche est en O(log n).
+    """
+
+    def __init__(self, gdf_communes, colonne='identifiant_commune'):
+        self.geometries = np.asarray(gdf_communes.geometry.values, dtype=object)
+        shapely.prepare(self.geometries)
+        self.identifiants = gdf_communes[colonne].to_numpy(dtype=object)
+        self.arbre = STRtree(self.geometries)
+
+    def localiser(self, lat, lon):
+        """Identifiant de la zone contenant le point, ou None."""
+        return self.localiser_points([lat], [lon])[0]
+
+    def localiser_points(self, lats, lons):
+        """Identifiants des zones pour un lot de points, en un seul appel vectorisé (None hors zonage)."""
+        points = shapely.points(np.asarray(lons, dtype='float64'), np.asarray(lats, dtype='float64'))
+        zones = np.full(len(points), None, dtype=object)
+
+        idx_points, idx_zones = self.arbre.query(points, predicate='within')
+        if len(idx_points):
+            # Si un point touche plusieurs zones, garder la première dans l'ordre du GeoDataFrame
+            ordre = np.lexsort((idx_zones, idx_points))
+            idx_points, idx_zones = idx_points[ordre], idx_zones[ordre]
+            premiers = np.unique(idx_points, return_index=True)[1]
+            zones[idx_points[premiers]] = self.identifiants[idx_zones[premiers]]
+
+        return zones
+
+    def localiser_geometries(self, geometries):
+        """Zones des centroïdes d'une GeoSeries en EPSG:4326 (arrêts de bus, segments de route, ...)."""
+        coords = shapely.get_coordinates(shapely.centroid(np.asarray(geometries, dtype=object)))
+        return self.localiser_points(coords[:, 1], coords[:, 0])
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.config import MOTEUR_OD_CONFIG
+from src.data.database import session_scope
+from src.data.zones import IndexZones
+
+# Version des tables lues par le moteur, comparée à l'identique (toute différence recharge le moteur) :
+# - compteurs d'écritures de chaque table, pris séparément (et non leur somme) ;
+# - date de remise à zéro des statistiques de la base (pg_stat_reset) : après une remise à zéro,
+#   les compteurs peuvent revenir à une valeur déjà vue ;
+# - empreintes des sources chargées par l'ETL (etl_sources), indépendantes des statistiques.
+REQUETE_VERSION = text(
+    "SELECT "
+    "(SELECT string_agg(concat_ws(':', relname, n_tup_ins, n_tup_upd, n_tup_del), ',' ORDER BY relname) "
+    " FROM pg_stat_user_tables WHERE relname IN ('matrice_od', 'zones', 'types_vehicules')), "
+    "(SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()), "
+    "(SELECT string_agg(concat_ws(':', nom, empreinte, date_chargement), ',' ORDER BY nom) FROM etl_sources)"
+)
+
+
+class MoteurOD:
+    """
+    Matrice OD en mémoire : tableau NumPy dense zone d'origine x zone de destination x type de véhicule,
+    indexé par position des zones. Les requêtes des pages de détail (Sankey, tableau, répartition par type)
+    deviennent des sélections dans ce tableau, sans aller-retour vers PostgreSQL ni pivot pandas.
+    """
+
+    def __init__(self, df_zones, df_types, df_od):
+        self.index_zones = IndexZones(df_zones)
+        self.ids_zones = df_zones['id'].to_numpy()
+        self.noms_zones = df_zones['identifiant_commune'].to_numpy(dtype=object)
+        # Types dans l'ordre alphabétique : même ordre de colonnes que pivot_table
+        df_types = df_types.sort_values('nom_type')
+        self.noms_types = df_types['nom_type'].tolist()
+
+        positions_zones = pd.Index(self.ids_zones)
+        o = positions_zones.get_indexer(df_od['id_origine'])
+        d = positions_zones.get_indexer(df_od['id_destination'])
+        t = pd.Index(df_types['id']).get_indexer(df_od['id_type_vehicule'])
+        # Comme vue_matrice : les lignes dont la zone ou le type n'existe pas sont ignorées
+        valides = (o >= 0) & (d >= 0) & (t >= 0)
+        o, d, t = o[valides], d[valides], t[valides]
+
+        nb_zones = len(self.ids_zones)
+        self.od = np.zeros((nb_zones, nb_zones, len(self.noms_types)), dtype='int64')
+        np.add.at(self.od, (o, d, t), df_od['nombre'].to_numpy(dtype='int64')[valides])
+        self.total = self.od.sum(axis=2)
+        self.total_origine = self.total.sum(axis=1)
+
+        # Couples et zones présents dans matrice_od (les vues ne listent que ceux-ci)
+        self.presents = np.zeros((nb_zones, nb_zones), dtype=bool)
+        self.presents[o, d] = True
+        self.est_origine = self.presents.any(axis=1)
+        self.est_destination = self.presents.any(axis=0)
+
+    @classmethod
+    def depuis_base(cls):
+        with session_scope() as session:
+            def lire(requete, colonnes):
+                return pd.DataFrame(session.execute(text(requete)).fetchall(), columns=colonnes)
+
+            return cls(
+                lire("SELECT id, nom, identifiant_commune FROM zones ORDER BY id", ['id', 'nom', 'identifiant_commune']),
+                lire("SELECT id, nom_type FROM types_vehicules", ['id', 'nom_type']),
+                lire("SELECT id_origine, id_destination, id_type_vehicule, SUM(nombre) FROM matrice_od "
+                     "GROUP BY id_origine, id_destination, id_type_vehicule",
+                     ['id_origine', 'id_destination', 'id_type_vehicule', 'nombre']),
+            )
+
+    def _masque_origines(self, noms_zones):
+        masque = np.zeros(len(self.ids_zones), dtype=bool)
+        positions = pd.Index(self.ids_zones).get_indexer(self.index_zones.ids_zones(noms_zones))
+        masque[positions[positions >= 0]] = True
+        return masque
+
+    def _ordre(self, o, d, valeurs):
+        """Ordre décroissant (valeur, id origine, id destination) : même tri que les classements SQL."""
+        return np.lexsort((-self.ids_zones[d], -self.ids_zones[o], -valeurs))
+
+    def od_count(self, noms_zones=None, limite=10):
+        """Équivalent de get_od_count : couples OD des zones sélectionnées, sinon les `limite` premiers."""
+        presents = self.presents & self._masque_origines(noms_zones)[:, None] if noms_zones else self.presents
+        o, d = np.nonzero(presents)
+        ordre = self._ordre(o, d, self.total[o, d])
+        if not noms_zones:
+            ordre = ordre[:limite]
+        o, d = o[ordre], d[ordre]
+        return pd.DataFrame({
+            'id_origine': self.ids_zones[o],
+            'nom_origine': self.noms_zones[o],
+            'id_destination': self.ids_zones[d],
+            'nom_destination': self.noms_zones[d],
+            'nombre_deplacements': self.total[o, d],
+            'somme_totale_par_origine': self.total_origine[o],
+        })
+
+    def matrice(self, noms_zones=None, limite=10):
+        """Équivalent de create_od_matrix(get_od_count(...)) : origines en lignes, destinations en colonnes."""
+        df = self.od_count(noms_zones, limite)
+        lignes = np.sort(df['nom_origine'].unique())
+        colonnes = np.sort(df['nom_destination'].unique())
+        valeurs = np.zeros((len(lignes), len(colonnes)), dtype='int64')
+        valeurs[np.searchsorted(lignes, df['nom_origine']), np.searchsorted(colonnes, df['nom_destination'])] = \
+            df['nombre_deplacements'].to_numpy()
+        matrice = pd.DataFrame(valeurs, columns=pd.Index(colonnes, name='nom_destination'))
+        matrice.insert(0, 'nom_origine', lignes)
+        return matrice
+
+    def pivot_vehicule_count_od(self, noms_zones=None, limite=11):
+        """
+        Équivalent de pivot_vehicule_count_od : une ligne par couple OD (toutes les destinations des origines
+        sélectionnées) et une colonne par type de véhicule. Sans sélection, les premiers couples couvrant
+        `limite` lignes de la matrice complète (un couple = une ligne par type).
+        """
+        origines = self.est_origine & self._masque_origines(noms_zones) if noms_zones else self.est_origine
+        o, d = np.meshgrid(np.flatnonzero(origines), np.flatnonzero(self.est_destination), indexing='ij')
+        o, d = o.ravel(), d.ravel()
+        ordre = self._ordre(o, d, self.total[o, d])
+        if not noms_zones:
+            ordre = ordre[:math.ceil(limite / max(len(self.noms_types), 1))]
+        o, d = o[ordre], d[ordre]
+
+        df = pd.DataFrame({'origine': self.noms_zones[o], 'destination': self.noms_zones[d]})
+        for t, nom_type in enumerate(self.noms_types):
+            df[nom_type] = self.od[o, d, t]
+        df['nombre_total_somme_vehicule'] = self.total[o, d]
+        return df
+
+
+_moteur = None
+_version = None
+_derniere_verification = 0.0
+_lock = threading.Lock()
+
+
+def _lire_version():
+    with session_scope() as session:
+        return tuple(session.execute(REQUETE_VERSION).one())
+
+
+def get_moteur_od():
+    """
+    Moteur OD du processus, chargé au premier appel puis rechargé quand les tables sources ont changé
+    (vérifié au plus une fois par MOTEUR_OD_CONFIG['verification'] secondes). None si le moteur est désactivé.
+    """
+    global _moteur, _version, _derniere_verification
+    if not MOTEUR_OD_CONFIG['actif']:
+        return None
+
+    maintenant = time.monotonic()
+    if _moteur is not None and maintenant - _derniere_verification < MOTEUR_OD_CONFIG['verification']:
+        return _moteur
+
+    with _lock:
+        if _moteur is None or maintenant - _derniere_verification >= MOTEUR_OD_CONFIG['verification']:
+            version = _lire_version()
+            if _moteur is None or version != _version:
+                # Le nouveau moteur remplace l'ancien d'un bloc : les lectures en cours gardent l'ancien
+                _moteur = MoteurOD.depuis_base()
+                _version = version
+            _derniere_verification = maintenant
+    return _moteur
+
+
+def invalider_moteur_od():
+    """Force le rechargement de la matrice OD au prochain appel (ex : après un chargement de données)."""
+    global _moteur
+    with _lock:
+        _moteur = None
@@ -0,0 +1,158 @@
+import gc
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.config import CACHE_CONFIG
+from src.data.cache import _ecrire_atomique
+from src.data.database import dispose_engine
+
+
+class Registre:
+    """
+    Registre des jeux de données de l'application : chaque jeu est chargé une seule fois par processus,
+    au premier accès ou par precharger() dans le processus maître avant le fork des workers gunicorn.
+    """
+
+    def __init__(self):
+        self._chargeurs = {}
+        self._donnees = {}
+        # Réentrant : un chargeur peut obtenir() les jeux dont il dépend
+        self._lock = threading.RLock()
+        self._prechauffage = None
+        self._apres_prechauffage = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._apres_fork)
+
+    def enregistrer(self, nom, chargeur):
+        self._chargeurs[nom] = chargeur
+
+    def obtenir(self, nom):
+        donnees = self._donnees.get(nom)
+        if donnees is not None:
+            return donnees
+        with self._lock:
+            if nom not in self._donnees:
+                debut = time.perf_counter()
+                self._donnees[nom] = self._chargeurs[nom]()
+                print(f"Jeu de données {nom} chargé en {time.perf_counter() - debut:.2f} s (pid {os.getpid()}).")
+            return self._donnees[nom]
+
+    def precharger(self, noms=None):
+        """Charge tous les jeux (ou `noms`) ; à appeler dans le processus maître avant le fork."""
+        for nom in noms or list(self._chargeurs):
+            self.obtenir(nom)
+
+    def prechauffer(self, apres=None):
+        """
+        Charge tous les jeux dans un thread d'arrière-plan : le serveur répond tout de suite (pages statiques,
+        /health) et les callbacks qui demandent un jeu pas encore chargé attendent simplement sa fin.
+        `apres` est appelé une fois tout chargé (ex : sante.marquer_pret).
+        """
+        def prechauffer():
+            restants = list(self._chargeurs)
+            while True:
+                for nom in list(restants):
+                    try:
+                        self.obtenir(nom)
+                        restants.remove(nom)
+                    except Exception as e:
+                        # Base indisponible au démarrage : les autres jeux sont chargés, celui-ci sera réessayé
+                        print(f"Préchargement de {nom} impossible : {e}")
+                if not restants:
+                    break
+                print(f"Nouvel essai de préchargement dans {DELAI_NOUVEL_ESSAI} s ({', '.join(restants)}).")
+                time.sleep(DELAI_NOUVEL_ESSAI)
+            if apres is not None:
+                apres()
+
+        self._apres_prechauffage = apres
+        self._prechauffage = threading.Thread(target=prechauffer, name='prechauffage', daemon=True)
+        self._prechauffage.start()
+        return self._prechauffage
+
+    def attendre(self, delai=None):
+        """Attend la fin du préchargement en arrière-plan (au plus `delai` secondes) ; True s'il est terminé."""
+        if self._prechauffage is not None:
+            self._prechauffage.join(delai)
+        return self._prechauffage is None or not self._prechauffage.is_alive()
+
+    def _apres_fork(self):
+        # Seul le thread qui a forké existe dans l'enfant : un verrou tenu par le thread de préchargement
+        # ne serait jamais relâché. Nouveau verrou, et préchargement relancé s'il n'était pas terminé.
+        self._lock = threading.RLock()
+        en_cours = self._prechauffage is not None and self._prechauffage.is_alive()
+        self._prechauffage = None
+        if en_cours:
+            # Le thread du parent avait peut-être une connexion en cours : ne pas la fermer depuis l'enfant
+            dispose_engine(close=False)
+            self.prechauffer(self._apres_prechauffage)
+
+    def recharger(self, noms=None):
+        """Relit les jeux (tous par défaut) et vide les caches construits à partir des anciennes données."""
+        from src.figure.cache_figure import invalider_caches_figures
+
+        with self._lock:
+            for nom in noms or list(self._donnees):
+                self._donnees.pop(nom, None)
+            self.precharger(noms)
+        invalider_caches_figures()
+
+
+# Attente entre deux tentatives de préchargement quand la base est indisponible (secondes)
+DELAI_NOUVEL_ESSAI = 10
+
+registre = Registre()
+
+
+def _repertoire_partage():
+    return os.path.join(CACHE_CONFIG['repertoire'], 'partage')
+
+
+def partager_tableau(nom, tableau):
+    """
+    Copie un grand tableau NumPy dans un fichier .npy et le relit en memory-map, en lecture seule :
+    les workers lisent les mêmes pages du cache système au lieu d'en garder chacun une copie
+    (et une écriture accidentelle lève une erreur au lieu de dupliquer la page).
+    """
+    tableau = np.ascontiguousarray(tableau)
+    try:
+        os.makedirs(_repertoire_partage(), exist_ok=True)
+        chemin = os.path.join(_repertoire_partage(), f"{nom}.npy")
+
+        def ecrire(tmp):
+            # Fichier ouvert explicitement : np.save ajouterait '.npy' au nom temporaire
+            with open(tmp, 'wb') as f:
+                np.save(f, tableau, allow_pickle=False)
+
+        _ecrire_atomique(chemin, ecrire)
+        return np.load(chemin, mmap_mode='r')
+    except OSError as e:
+        # Le partage est une optimisation mémoire : en cas d'erreur, garder le tableau en mémoire
+        print(f"Impossible de partager le tableau {nom} : {e}")
+        tableau.flags.writeable = False
+        return tableau
+
+
+# Le préchargement n'est attendu qu'avant le premier fork (voir preparer_fork)
+_premier_fork = True
+
+
+def preparer_fork(delai=None):
+    """
+    À appeler dans le processus maître avant chaque fork (gunicorn.conf.py) : attend le préchargement
+    avant le premier fork seulement (au plus `delai` secondes, au-delà chaque worker termine le chargement
+    lui-même), ferme les connexions du pool, qui ne doivent pas être partagées, et gèle les objets déjà chargés
+    pour que le ramasse-miettes des workers ne les parcoure pas (ce qui écrirait dans leurs pages et annulerait
+    la copie sur écriture).
+    """
+    global _premier_fork
+    # pre_fork s'exécute dans l'arbitre, aussi pour chaque worker remplacé (max_requests) : ne jamais le
+    # bloquer à nouveau, sinon un jeu qui échoue en boucle gèlerait le maître à chaque fork
+    registre.attendre(delai if _premier_fork else 0)
+    _premier_fork = False
+    dispose_engine()
+    gc.collect()
+    gc.freeze()
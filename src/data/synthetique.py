@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import SYNTHETIQUE_CONFIG
+from src.data.arrets_bus import CRS_METRIQUE
+from src.data.database import get_engine
+from src.data.etl import copier_dataframe, TAILLE_LOT_COPY, _dataframe
+from src.data.utils import loadZonage
+from src.data.vues_materialisees import rafraichir_vues_materialisees
+from src.data.zones import identifiant_zone
+
+# Générateur vectorisé de données fictives réalistes pour les tests de charge : des millions de lignes
+# de matrice_od et de flux_trafic, produites par lots NumPy et chargées par COPY.
+
+
+def _parts(parts, noms):
+    """Probabilités alignées sur `noms` (les noms absents de la configuration ont une part nulle)."""
+    poids = np.array([parts.get(nom, 0.0) for nom in noms], dtype='float64')
+    if poids.sum() == 0:
+        poids[:] = 1.0
+    return poids / poids.sum()
+
+
+def distances_zones(identifiants):
+    """Distances (km) entre les centroïdes des zones, dans l'ordre de `identifiants` (identifiant_commune)."""
+    zonage = loadZonage()
+    zonage = zonage.assign(identifiant_commune=[
+        identifiant_zone(code, nom) for code, nom in zip(zonage['ensemble d'], zonage['ensemble_1'])
+    ])
+    centroides = zonage.to_crs(CRS_METRIQUE).drop_duplicates('identifiant_commune').set_index('identifiant_commune')
+    centroides = centroides.geometry.centroid.reindex(identifiants)
+
+    x = centroides.x.to_numpy() / 1000
+    y = centroides.y.to_numpy() / 1000
+    distances = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    # Zone absente du zonage : distance médiane aux autres zones
+    return np.where(np.isnan(distances), np.nanmedian(distances), distances)
+
+
+def probabilites_gravitaires(masses, distances, beta):
+    """Modèle gravitaire P(i, j) ∝ m_i · m_j · exp(-beta · d_ij), sans déplacement interne (i = j)."""
+    masses = np.asarray(masses, dtype='float64')
+    probabilites = np.outer(masses, masses) * np.exp(-beta * distances)
+    np.fill_diagonal(probabilites, 0.0)
+    return probabilites / probabilites.sum()
+
+
+def generer_matrice_od(rng, idzones, probabilites, idvehicules, parts_vehicules, nb, nombre_moyen):
+    """`nb` enregistrements de matrice_od : couples tirés selon le modèle gravitaire, type selon les parts."""
+    nb_zones = len(idzones)
+    couples = rng.choice(nb_zones * nb_zones, size=nb, p=probabilites.ravel())
+    idzones = np.asarray(idzones)
+    return pd.DataFrame({
+        'id_origine': idzones[couples // nb_zones],
+        'id_destination': idzones[couples % nb_zones],
+        'id_type_vehicule': rng.choice(idvehicules, size=nb, p=parts_vehicules),
+        'nombre': 1 + rng.poisson(nombre_moyen - 1, size=nb),
+    })
+
+
+def generer_flux_trafic(rng, routes, modes, periodes, nb, date_debut, duree_campagne):
+    """
+    `nb` comptages de flux_trafic. Les routes sont tirées selon leur hiérarchie (les axes primaires sont
+    plus souvent comptés et plus chargés), le mode selon les parts modales, la période selon le profil
+    des pointes ; la vitesse baisse avec la charge et le temps de trajet en découle.
+    """
+    n_routes = len(routes)
+    depart = rng.choice(n_routes, size=nb, p=routes['poids'].to_numpy())
+    arrivee = rng.choice(n_routes, size=nb, p=routes['poids'].to_numpy())
+    # Départ et arrivée distincts : décaler l'arrivée d'une route quand les deux tirages coïncident
+    arrivee = np.where(arrivee == depart, (arrivee + 1) % n_routes, arrivee)
+
+    mode = rng.choice(len(modes), size=nb, p=modes['part'].to_numpy())
+    periode = rng.choice(len(periodes), size=nb, p=periodes['part'].to_numpy())
+
+    volume_moyen = routes['volume'].to_numpy()[depart] * periodes['facteur'].to_numpy()[periode]
+    volume = np.maximum(1, rng.lognormal(np.log(volume_moyen), 0.4)).astype('int64')
+
+    # Congestion : jusqu'à -60 % de la vitesse du mode pour les comptages les plus chargés
+    charge = np.minimum(volume / (2 * routes['volume'].max()), 1.0)
+    vitesse = modes['vitesse_moyenne'].to_numpy(dtype='float64')[mode] * (1 - 0.6 * charge)
+    vitesse = np.clip(vitesse * rng.normal(1.0, 0.1, size=nb), 2.0, 999.0)
+    distance = np.clip(rng.lognormal(np.log(3.0), 0.7, size=nb), 0.2, 99.0)
+    temps = np.minimum(distance / vitesse * 60, 999.0)
+
+    jours = rng.integers(0, duree_campagne, size=nb)
+    return pd.DataFrame({
+        'id_departed': routes['id'].to_numpy()[depart],
+        'id_arrived': routes['id'].to_numpy()[arrivee],
+        'id_typologie_modale': modes['id'].to_numpy()[mode],
+        'id_periode_temps': periodes['id'].to_numpy()[periode],
+        'volume': volume,
+        'date': np.datetime64(date_debut, 'D') + jours.astype('timedelta64[D]'),
+        'vitesse_moyenne': vitesse.round(2),
+        'temps_de_trajet': temps.round(2),
+        'distance': distance.round(2),
+    })
+
+
+def _par_lots(nb, taille_lot):
+    for debut in range(0, nb, taille_lot):
+        yield min(taille_lot, nb - debut)
+
+
+def charger_synthetique(nb_od=0, nb_flux=0, graine=None, taille_lot=TAILLE_LOT_COPY, config=SYNTHETIQUE_CONFIG):
+    """
+    Ajoute `nb_od` lignes à matrice_od et `nb_flux` lignes à flux_trafic, générées par lots et chargées
+    par COPY en une seule transaction, puis rafraîchit les vues matérialisées.
+    Les zones, routes et tables de référence doivent déjà être chargées (insertionStatique.py).
+    """
+    rng = np.random.default_rng(graine)
+    connexion = get_engine().raw_connection()
+    debut = time.perf_counter()
+    try:
+        curseur = connexion.cursor()
+
+        if nb_od:
+            zones = _dataframe(curseur, "SELECT z.id, z.identifiant_commune, COALESCE(SUM("
+                                        "p.population_masculine + p.population_feminine), 0) FROM zones z "
+                                        "LEFT JOIN population p ON p.id_zone = z.id GROUP BY z.id ORDER BY z.id",
+                               ['id', 'identifiant_commune', 'population'])
+            # Masse d'une zone : sa population (1 pour les zones sans population connue)
+            masses = np.maximum(zones['population'].to_numpy(dtype='float64'), 1.0)
+            probabilites = probabilites_gravitaires(masses, distances_zones(zones['identifiant_commune']),
+                                                    config['beta_distance'])
+            vehicules = _dataframe(curseur, "SELECT id, nom_type FROM types_vehicules ORDER BY id", ['id', 'nom_type'])
+            parts_vehicules = _parts(config['parts_vehicules'], vehicules['nom_type'])
+
+            for n in _par_lots(nb_od, taille_lot):
+                df = generer_matrice_od(rng, zones['id'].to_numpy(), probabilites, vehicules['id'].to_numpy(),
+                                        parts_vehicules, n, config['nombre_moyen_od'])
+                copier_dataframe(curseur, 'matrice_od', df, taille_lot)
+            print(f"{nb_od} enregistrements insérés dans la table matrice_od.")
+
+        if nb_flux:
+            routes = _dataframe(curseur, "SELECT r.id, h.nom_niveau FROM route r "
+                                         "LEFT JOIN hierarchie_fonctionnelle h ON h.id = r.id_hierarchie ORDER BY r.id",
+                                ['id', 'nom_niveau'])
+            volume_hierarchie = config['volume_hierarchie']
+            routes['volume'] = routes['nom_niveau'].map(volume_hierarchie).fillna(min(volume_hierarchie.values()))
+            # Attractivité propre à chaque route autour de celle de son niveau hiérarchique
+            poids = routes['volume'].to_numpy() * rng.lognormal(0.0, 0.5, size=len(routes))
+            routes['poids'] = poids / poids.sum()
+
+            modes = _dataframe(curseur, "SELECT id, nom_mode, vitesse_moyenne FROM typologie_modale ORDER BY id",
+                               ['id', 'nom_mode', 'vitesse_moyenne'])
+            modes['part'] = _parts(config['parts_modales'], modes['nom_mode'])
+            periodes = _dataframe(curseur, "SELECT id, nom_periode FROM periodes_temps ORDER BY id",
+                                  ['id', 'nom_periode'])
+            periodes['part'] = _parts({nom: part for nom, (part, _) in config['periodes'].items()},
+                                      periodes['nom_periode'])
+            periodes['facteur'] = [config['periodes'].get(nom, (0.0, 1.0))[1] for nom in periodes['nom_periode']]
+
+            date_debut = datetime.date.today() - datetime.timedelta(days=config['duree_campagne'])
+            for n in _par_lots(nb_flux, taille_lot):
+                df = generer_flux_trafic(rng, routes, modes, periodes, n, date_debut, config['duree_campagne'])
+                copier_dataframe(curseur, 'flux_trafic', df, taille_lot)
+            print(f"{nb_flux} enregistrements insérés dans la table flux_trafic.")
+
+        connexion.commit()
+        duree = time.perf_counter() - debut
+        print(f"Génération et chargement terminés en {duree:.1f} s ({(nb_od + nb_flux) / duree:.0f} lignes/s).")
+    except Exception as e:
+        connexion.rollback()
+        print(f"Erreur lors de la génération, aucune donnée n'a été écrite : {e}")
+        raise
+    finally:
+        connexion.close()
+
+    rafraichir_vues_materialisees()
+
+
+if __name__ == '__main__':
+    # Ex : python -m src.data.synthetique --od 1000000 --flux 5000000 --graine 42
+    parser = argparse.ArgumentParser(description="Charge des données fictives pour les tests de charge.")
+    parser.add_argument('--od', type=int, default=0, help="Lignes à ajouter à matrice_od")
+    parser.add_argument('--flux', type=int, default=0, help="Lignes à ajouter à flux_trafic")
+    parser.add_argument('--graine', type=int, default=None, help="Graine du générateur (reproductibilité)")
+    args = parser.parse_args()
+
+    charger_synthetique(args.od, args.flux, args.graine)
@@ -2,26 +2,25 @@ import os
 import geopandas as gpd
 import pandas as pd
 from pyproj import CRS
-from src.data.database import get_session
-from sqlalchemy import MetaData, Table, select, func
+from src.data.cache import charger_depuis_cache, lister_sources
+from src.data.database import session_scope
+from src.data.vues import select_vue
 
-def getAllLigneDB():
-    metadata = MetaData()
-    session = get_session()
+LIGNES_PATH = r"data/Ligne"
 
-    try:
-        vue = Table('lignebus', metadata, autoload_with=session.bind)
-        query = select(vue)
-        result = session.execute(query)
+def getAllLigneDB():
+    with session_scope() as session:
+        result = session.execute(select_vue('lignebus'))
         df = pd.DataFrame(result.fetchall(), columns=result.keys())
         options = [{'label': row['numero_ligne'], 'value': row['numero_ligne']} for _, row in df.iterrows()]
         return options
 
-    finally:
-        session.close()
+def getAllLigne(forcer=False):
+    # Les fichiers GeoJSON ne sont relus que si leur contenu a changé depuis la dernière mise en cache
+    return charger_depuis_cache('lignes_bus', lister_sources(LIGNES_PATH), lambda: lireLignes(LIGNES_PATH), forcer)
 
-def getAllLigne():
-    directory_path = r"data/Ligne"
+
+def lireLignes(directory_path):
     # Initialiser une liste vide pour stocker chaque GeoDataFrame
     gdf_list = []
 
@@ -66,64 +65,70 @@ def convert_utm_to_latlon(gdf, utm_crs):
     return gdf
 
 
-# Fonction pour extraire les coordonnées de latitude et longitude uniquement pour les LineString
-def extract_lat_lon(geom):
-    lats, lons = [], []
-    if geom.geom_type == 'LineString':
-        lons.extend([coord[0] for coord in geom.coords] + [None])
-        lats.extend([coord[1] for coord in geom.coords] + [None])
-    return lats, lons
+# Vitesse moyenne supposée des taxibe (km/h)
+VITESSE_MOYENNE_BUS = 20
 
-def getLigneByOsmId(osm_id):
-    try:
-        # Obtenir toutes les lignes de bus via une fonction externe
-        combined_gdf = getAllLigne()
 
-        if combined_gdf is not None and osm_id is not None:
-            # Filtrer le GeoDataFrame combiné par osm_id pour obtenir les lignes de bus associées
-            filtered_gdf_by_osm = combined_gdf[combined_gdf['osm_id'] == osm_id]
+class IndexLignes:
+    """
+    Index en mémoire des lignes de bus, construit une seule fois au démarrage :
+    osm_id -> lignes qui l'empruntent, et ligne -> distance totale / durée du trajet.
+    """
 
-            if not filtered_gdf_by_osm.empty:
-                # Obtenir toutes les lignes de bus uniques associées à l'osm_id
-                lignes_bus = filtered_gdf_by_osm['taxibe_lin'].unique()
+    def __init__(self, dataframe):
+        lignes = dataframe[['osm_id', 'taxibe_lin', 'km']].dropna(subset=['taxibe_lin'])
 
-                # Créer un DataFrame pour stocker les résultats
-                results = pd.DataFrame(columns=['taxibe_lin', 'km', 'vitesse_moyenne', 'duree_trajet_minutes'])
+        # Distance totale par ligne de bus
+        km = pd.to_numeric(lignes['km'], errors='coerce').fillna(0)
+        km_par_ligne = km.groupby(lignes['taxibe_lin']).sum()
 
-                # Boucle sur chaque ligne de bus pour effectuer les calculs
-                for ligne in lignes_bus:
-                    # Filtrer le DataFrame pour la ligne de bus courante
-                    filtered_gdf_by_line = combined_gdf[combined_gdf['taxibe_lin'] == ligne]
+        self.stats_lignes = {
+            ligne: {
+                'taxibe_lin': ligne,
+                'km': float(total_km),
+                'vitesse_moyenne': VITESSE_MOYENNE_BUS,
+                'duree_trajet': float(total_km) / VITESSE_MOYENNE_BUS * 60,
+            }
+            for ligne, total_km in km_par_ligne.items()
+        }
 
-                    # Assurer que la colonne 'km' soit bien numérique et traiter les valeurs manquantes
-                    km_df = filtered_gdf_by_line[['km', 'taxibe_lin']].copy()
-                    km_df['km'] = pd.to_numeric(km_df['km'], errors='coerce').fillna(0)
+        # Lignes de bus uniques (dans l'ordre d'apparition) pour chaque osm_id
+        self.lignes_par_osm = {
+            osm_id: list(dict.fromkeys(groupe))
+            for osm_id, groupe in lignes.dropna(subset=['osm_id']).groupby('osm_id', sort=False)['taxibe_lin']
+        }
 
-                    # Grouper par ligne de bus et sommer les kilomètres
-                    grouped_km = km_df.groupby('taxibe_lin').agg({'km': 'sum'}).reset_index()
+    def lignes_pour_osm(self, osm_id):
+        """Statistiques des lignes passant par le segment osm_id, ou None si aucune."""
+        lignes = self.lignes_par_osm.get(osm_id)
+        if not lignes:
+            return None
+        return [self.stats_lignes[ligne] for ligne in lignes]
 
-                    # Ajouter la vitesse moyenne fixe de 20 km/h
-                    grouped_km['vitesse_moyenne'] = 20  # Vitesse moyenne supposée
 
-                    # Calculer la durée du trajet en minutes
-                    grouped_km['duree_trajet'] = (grouped_km['km'] / grouped_km['vitesse_moyenne']) * 60
+_index_lignes = None
 
-                    # Supprimer les colonnes vides ou entièrement NA avant la concaténation
-                    grouped_km = grouped_km.dropna(axis=1, how='all')
 
-                    results = results.dropna(axis=1, how='all')
-                    # Ajouter les résultats au DataFrame final
-                    results = pd.concat([results, grouped_km], ignore_index=True)
+def getIndexLignes():
+    global _index_lignes
+    if _index_lignes is None:
+        _index_lignes = IndexLignes(getAllLigne())
+    return _index_lignes
 
-                # Supprimer les colonnes vides ou entièrement NA dans le DataFrame final
-                return results
-            else:
-                print(f"Aucune ligne de bus trouvée pour osm_id: {osm_id}")
-                return None
-        else:
-            print("Données non disponibles ou osm_id non fourni.")
+
+def getLigneByOsmId(osm_id, index_lignes=None):
+    try:
+        if osm_id is None:
+            print("osm_id non fourni.")
             return None
 
+        lignes = (index_lignes or getIndexLignes()).lignes_pour_osm(osm_id)
+        if lignes is None:
+            print(f"Aucune ligne de bus trouvée pour osm_id: {osm_id}")
+            return None
+
+        return pd.DataFrame(lignes)
+
     except Exception as e:
         print(f"Erreur lors du traitement des lignes de bus pour osm_id {osm_id}: {e}")
         return None
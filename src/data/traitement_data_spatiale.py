@@ -3,22 +3,20 @@ from decimal import Decimal
 import pandas as pd
 import geopandas as gpd
 
-from src.data.database import get_session
-from sqlalchemy import MetaData, Table, select, func  # Pour interagir avec la base de données
+from src.data.database import get_session, session_scope
+from src.data.vues import get_vue, select_vue, select_revenu
 
-from src.data.utils import loadGeojson
+from src.data.utils import loadGeojson, loadZonage, loadCentroidesRoutes
 
 def loadPopulationCarte():
     gdf_geojson = loadGeojson()  # Charger les données GeoJSON
-    session = get_session()  # Ouvrir une session
-    metadata = MetaData()  # Métadonnées pour la table
 
-    # Charger la vue population_view depuis la base de données
-    population_view = Table('population_view', metadata, autoload_with=session.bind)
-    query = select(population_view)
+    # Vue population_view (métadonnées réfléchies une seule fois par processus)
+    population_view = get_vue('population_view')
 
     # Exécuter la requête et récupérer les résultats
-    result = session.execute(query).fetchall()
+    with session_scope() as session:
+        result = session.execute(select_vue('population_view')).fetchall()
 
     # Convertir les résultats en DataFrame
     df_population = pd.DataFrame(result, columns=population_view.columns.keys())
@@ -29,9 +27,6 @@ def loadPopulationCarte():
     # Fusionner les données GeoJSON et population
     gdf_merged = gdf_geojson.merge(df_population, how='inner', left_on='ensemble_concat', right_on='identifiant_commune')
 
-    # Fermer la session
-    session.close()
-
     # Vérifier et convertir les objets de type Decimal en float pour éviter l'erreur JSON
     for col in gdf_merged.select_dtypes(include=['object']).columns:
         if gdf_merged[col].apply(lambda x: isinstance(x, Decimal)).any():
@@ -40,15 +35,8 @@ def loadPopulationCarte():
     return gdf_merged
 
 def loadRepartitionZonale():
-    # Exemple de chemin d'accès au fichier GeoJSON (à adapter en figure de votre fichier réel)
-    geojson_path = r"data/Zonage_interne_externe_PMUD.geojson"
-
-    # Charger le GeoDataFrame à partir du fichier GeoJSON
-    gdf_geojson = gpd.read_file(geojson_path)
-
-    # Vérification des systèmes de coordonnées
-    if gdf_geojson.crs != "EPSG:4326":
-        gdf_geojson = gdf_geojson.to_crs(epsg=4326)
+    # Charger le zonage (déjà en EPSG:4326) depuis le cache disque
+    gdf_geojson = loadZonage()
 
     # Ajouter une nouvelle colonne qui combine 'ensemble_1' et 'ensemble d'
     gdf_geojson = gdf_geojson.assign(combined=gdf_geojson['ensemble_1'] + " " + gdf_geojson['ensemble d'].astype(str))
@@ -60,20 +48,10 @@ def loadRepartitionZonale():
 def loadRevenuCarte():
     gdf_geojson = loadGeojson()
 
-    metadata = MetaData()
     session = get_session()
     try:
-        revenu_view = Table('revenu_view', metadata, autoload_with=session.bind)
-
-        # Requête pour obtenir les données de la vue revenu_view
-        query = select(
-            revenu_view.c.revenu_median,
-            revenu_view.c.taux_pauvrete,
-            revenu_view.c.identifiant_commune
-        )
-
-        # Exécuter la requête et récupérer les résultats
-        result = session.execute(query).fetchall()
+        # Requête pré-construite sur la vue revenu_view
+        result = session.execute(select_revenu()).fetchall()
         df_revenu = pd.DataFrame(result, columns=['revenu_median', 'taux_pauvrete', 'identifiant_commune'])
 
         df_revenu['identifiant_commune'] = df_revenu['identifiant_commune'].astype(str).str.lower()
@@ -104,22 +82,19 @@ def loadRevenuCarte():
 
 
 
-def get_congestion_point():
-    metadata = MetaData()
-    session = get_session()
+def requete_congestion():
+    vue = get_vue('mv_congestion')
+    return select_vue('mv_congestion').order_by(vue.c.total_traffic_volume.desc())
 
+
+def get_congestion_point():
     try:
-        vue = Table('congestion', metadata, autoload_with=session.bind)
-        query = select(vue)
-        result = session.execute(query)
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        with session_scope() as session:
+            result = session.execute(requete_congestion())
+            df = pd.DataFrame(result.fetchall(), columns=result.keys())
         df['id_osm'] = df['id_osm'].astype('int32')
-        gdf = gpd.read_file(r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson")
-        gdf.loc[:, 'osm_id'] = gdf['osm_id'].astype('int32')
-        gdf = gdf.to_crs(epsg=3857)
-        gdf['centroid'] = gdf.centroid
-        gdf_centroids = gdf[['osm_id', 'centroid']].copy()  # Créer une copie explicite
-        gdf_centroids.loc[:, 'centroid'] = gdf_centroids['centroid'].to_crs(epsg=4326)
+        centroides = loadCentroidesRoutes()
+        gdf_centroids = pd.DataFrame({'osm_id': centroides['osm_id'], 'centroid': centroides.geometry})
         df = df.merge(gdf_centroids, left_on='id_osm', right_on='osm_id', how='left')
 
         return df
@@ -1,62 +1,69 @@
 import pandas as pd
 
-from src.data.database import get_session
-from sqlalchemy import MetaData, Table, select, func
+from src.data.database import session_scope
+from src.data.vues import get_vue, select_vue, select_population_par_tranche, page_triee
+from src.data.zones import get_index_zones
+from src.data.moteur_od import get_moteur_od
+
+# Vue lue par chaque chargeur -> (colonne id de zone filtrée, colonnes du classement décroissant) ;
+# la dernière colonne de tri rend l'ordre unique pour la pagination par clé
+CLASSEMENTS = {
+    'vue_productions_attractions': ('zone_id', ('total_volume', 'zone_id')),
+    'mv_resultat_jointure': ('zone_id', ('nombre_total', 'zone_id', 'type_vehicule_id')),
+    'mv_vue_matrice_od': ('id_origine', ('nombre_deplacements', 'id_origine', 'id_destination')),
+    'mv_vue_matrice_complete': ('id_origine', ('nombre_total_somme_vehicule', 'id_origine', 'id_destination',
+                                              'id_type_vehicule')),
+}
 
 # Ce fonction permet d'avoir le nombre de population (par genre,par tranche d'age)
 def get_population():
-    metadata = MetaData()
-    session = get_session()
-    try:
-        population_view = Table('population_par_tranche_age', metadata, autoload_with=session.bind)
-        query = select(population_view.c.tranche,
-                       population_view.c.population_masculine_totale,
-                       population_view.c.population_feminine_totale)
-        result = session.execute(query)
+    with session_scope() as session:
+        result = session.execute(select_population_par_tranche())
         df = pd.DataFrame(result.fetchall(),
                           columns=['tranche', 'population_masculine_totale', 'population_feminine_totale'])
         return df
 
-    finally:
-        session.close()
 
+def requete_classement(nom_vue, noms_zones=None, limite=10, apres=None, index_zones=None):
+    """
+    Avec des zones sélectionnées : toutes leurs lignes (sans troncature), filtrées par id de zone.
+    Sans sélection : une page de `limite` lignes du classement, après la clé `apres` (voir vues.page_triee).
+    """
+    colonne_zone, colonnes_tri = CLASSEMENTS[nom_vue]
+    if noms_zones:
+        vue = get_vue(nom_vue)
+        ids = (index_zones or get_index_zones()).ids_zones(noms_zones)
+        return select_vue(nom_vue).where(vue.c[colonne_zone].in_(ids)).order_by(
+            *[vue.c[colonne].desc() for colonne in colonnes_tri])
+    return page_triee(nom_vue, colonnes_tri, limite, apres)
 
-# Ce fonction permet d'avoir le volume de deplacement par zone(entrée et sortie)
-def get_volume_deplacements(noms_zones=None):
-    session = get_session()
-    metadata = MetaData()
 
-    try:
-        vue = Table('vue_productions_attractions', metadata, autoload_with=session.bind)
-        if noms_zones:
-            query = select(vue).where(func.lower(vue.c.zone_nom).in_([nom.lower() for nom in noms_zones]))
+# Les requete_* construisent les requêtes des chargeurs : elles sont aussi exécutées
+# par le harnais de plans d'exécution (src/test/harnais_plans.py)
+def requete_volume_deplacements(noms_zones=None, limite=8, apres=None, index_zones=None):
+    return requete_classement('vue_productions_attractions', noms_zones, limite, apres, index_zones)
+
 
-        else:
-            query = select(vue).order_by(vue.c.total_volume.desc()).limit(8)
+# Ce fonction permet d'avoir le volume de deplacement par zone(entrée et sortie)
+def get_volume_deplacements(noms_zones=None, limite=8, apres=None):
+    query = requete_volume_deplacements(noms_zones, limite, apres)
+    with session_scope() as session:
         result = session.execute(query)
         df = pd.DataFrame(result.fetchall(), columns=result.keys())
         return df
-    finally:
-        session.close()
+
+def requete_nombre_vehicules_par_zone(noms_zones=None, limite=8, apres=None, index_zones=None):
+    return requete_classement('mv_resultat_jointure', noms_zones, limite, apres, index_zones)
+
 
 # Ce fonction permet d'avoir le nombre de vehicule par type et  par zone
-def get_nombre_vehicules_par_zone(noms_zones=None):
-    metadata = MetaData()
-    session = get_session()
-
-    try:
-        vue = Table('resultat_jointure', metadata, autoload_with=session.bind)
-        if noms_zones:
-            query = select(vue).where(func.lower(vue.c.zone_nom).in_([nom.lower() for nom in noms_zones]))
-        else:
-            query = select(vue).order_by(vue.c.nombre_total.desc()).limit(8)
+def get_nombre_vehicules_par_zone(noms_zones=None, limite=8, apres=None):
+    query = requete_nombre_vehicules_par_zone(noms_zones, limite, apres)
+    with session_scope() as session:
         result = session.execute(query)
         df = pd.DataFrame(result.fetchall(), columns=result.keys())
         return df
 
-    finally:
-        session.close()
-
 
 
 def create_od_matrix(df_matrice):
@@ -68,43 +75,46 @@ def create_od_matrix(df_matrice):
     ).reset_index()
     return od_matrix
 
+def requete_od_count(noms_zones=None, limite=10, apres=None, index_zones=None):
+    return requete_classement('mv_vue_matrice_od', noms_zones, limite, apres, index_zones)
+
+
 # fonction pour avoir le nombre de deplacement entre origine destination
-def get_od_count(noms_zones=None):
-    metadata = MetaData()
-    session = get_session()
-    try:
-        vue = Table('vue_matrice_od', metadata, autoload_with=session.bind)
-        if noms_zones:
-            query = select(vue).where(func.lower(vue.c.nom_origine).in_([nom.lower() for nom in noms_zones]))
-        else:
-            query = select(vue).order_by(vue.c.nombre_deplacements.desc()).limit(10)
+def get_od_count(noms_zones=None, limite=10, apres=None):
+    # Matrice OD en mémoire si elle est active (la pagination par clé reste servie par PostgreSQL)
+    moteur = get_moteur_od() if apres is None else None
+    if moteur is not None:
+        return moteur.od_count(noms_zones, limite)
+    query = requete_od_count(noms_zones, limite, apres)
+    with session_scope() as session:
         result = session.execute(query)
         df = pd.DataFrame(result.fetchall(), columns=result.keys())
         return df
 
-    finally:
-        session.close()
+def requete_vehicule_count_od(noms_zones=None, limite=11, apres=None, index_zones=None):
+    return requete_classement('mv_vue_matrice_complete', noms_zones, limite, apres, index_zones)
+
 
 # fonction pour avoir le matrice le nombre par type de vehicule sur un origine destination
-def get_vehicule_count_od(noms_zones=None):
-    metadata = MetaData()
-    session = get_session()
-
-    try:
-        vue = Table('vue_matrice_complete', metadata, autoload_with=session.bind)
-        if noms_zones:
-            query = select(vue).where(func.lower(vue.c.nom_origine).in_([nom.lower() for nom in noms_zones]))
-        else:
-            query = select(vue).order_by(vue.c.nombre_total_somme_vehicule.desc()).limit(11)
+def get_vehicule_count_od(noms_zones=None, limite=11, apres=None):
+    query = requete_vehicule_count_od(noms_zones, limite, apres)
+    with session_scope() as session:
         result = session.execute(query)
         df = pd.DataFrame(result.fetchall(), columns=result.keys())
         return df
 
-    finally:
-        session.close()
+
+def get_od_matrix(noms_zones=None, limite=10):
+    moteur = get_moteur_od()
+    if moteur is not None:
+        return moteur.matrice(noms_zones, limite)
+    return create_od_matrix(get_od_count(noms_zones, limite))
 
 
 def pivot_vehicule_count_od(noms_zones=None):
+    moteur = get_moteur_od()
+    if moteur is not None:
+        return moteur.pivot_vehicule_count_od(noms_zones)
     df = get_vehicule_count_od(noms_zones)
     if df.empty:
         return df
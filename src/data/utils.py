@@ -1,30 +1,49 @@
-from shapely import Point
 import geopandas as gpd
 
+from src.data.cache import charger_depuis_cache
+from src.data.geometrie import polylignes
 from src.data.traitement_data_bus import getAllLigne
 
-gdf = gpd.read_file(r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson")
-def find_zone_by_coordinates(lat, lon, gdf_communes):
-    point = Point(lon, lat)
-    for _, row in gdf_communes.iterrows():
-        if row['geometry'].contains(point):
-            return row['identifiant_commune']
-    return None
+ZONAGE_PATH = r"data/Zonage_interne_externe_PMUD.geojson"
+ROUTES_PATH = r"data/Antananarivo_voiries_primaires-secondaires-tertiaire.geojson"
+
+
+def loadZonage(forcer=False):
+    """Zonage PMUD en EPSG:4326, lu depuis le cache disque tant que le GeoJSON n'a pas changé."""
+    def lire():
+        gdf_geojson = gpd.read_file(ZONAGE_PATH)
+        if gdf_geojson.crs != "EPSG:4326":
+            gdf_geojson = gdf_geojson.to_crs(epsg=4326)
+        return gdf_geojson
+
+    return charger_depuis_cache('zonage', [ZONAGE_PATH], lire, forcer)
+
+
+def loadRoutesPrincipales(geojson_path=ROUTES_PATH, forcer=False):
+    """Routes primaires, secondaires et tertiaires en EPSG:4326, depuis le cache disque."""
+    def lire():
+        gdf = gpd.read_file(geojson_path)
+        gdf_filtered = gdf[gdf['highway'].isin(['primary', 'secondary', 'tertiary'])]
+        return gdf_filtered.to_crs(epsg=4326)
+
+    return charger_depuis_cache('routes_principales', [geojson_path], lire, forcer)
+
+
+def loadCentroidesRoutes(forcer=False):
+    """Centroïdes (EPSG:4326) de toutes les routes, indexés par osm_id, depuis le cache disque."""
+    def lire():
+        gdf = gpd.read_file(ROUTES_PATH)
+        gdf['osm_id'] = gdf['osm_id'].astype('int32')
+        # Calculer les centroïdes dans un CRS projeté puis revenir en latitude/longitude
+        centroids = gdf.to_crs(epsg=3857).centroid.to_crs(epsg=4326)
+        return gpd.GeoDataFrame({'osm_id': gdf['osm_id']}, geometry=centroids)
+
+    return charger_depuis_cache('routes_centroides', [ROUTES_PATH], lire, forcer)
+
 
 def extract_lat_lon():
-    gdf_filtered = gdf[gdf['highway'].isin(['primary', 'secondary', 'tertiary'])]
-    gdf_filtered = gdf_filtered.to_crs(epsg=3857)
-    gdf_filtered = gdf_filtered.to_crs(epsg=4326)
-    lats, lons = [], []
-    for geom in gdf_filtered.geometry:
-        if geom.geom_type == 'MultiLineString':
-            for line in geom.geoms:
-                lons.extend([coord[0] for coord in line.coords] + [None])
-                lats.extend([coord[1] for coord in line.coords] + [None])
-        elif geom.geom_type == 'LineString':
-            lons.extend([coord[0] for coord in geom.coords] + [None])
-            lats.extend([coord[1] for coord in geom.coords] + [None])
-    return lats, lons
+    gdf_filtered = loadRoutesPrincipales()
+    return polylignes(gdf_filtered.geometry.values)
 
 def calculate_centroids_by_zone():
     gdf_geojson = loadGeojson()
@@ -37,12 +56,9 @@ def calculate_centroids_by_zone():
     return df_centroids
 
 def loadGeojson():
-    geojson_path = r"data/Zonage_interne_externe_PMUD.geojson"
-    gdf_geojson = gpd.read_file(geojson_path)
+    gdf_geojson = loadZonage()
     gdf_geojson['ensemble_concat'] = gdf_geojson['ensemble d'].astype(str) + '_' + gdf_geojson['ensemble_1'].astype(
         str).str.lower()
-    if gdf_geojson.crs != "EPSG:4326":
-        gdf_geojson = gdf_geojson.to_crs(epsg=4326)
 
     return gdf_geojson
 
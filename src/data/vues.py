@@ -0,0 +1,96 @@
+import threading
+from functools import lru_cache
+
+from sqlalchemy import MetaData, select, tuple_
+
+from src.data.database import get_engine
+
+# Vues (et tables) de base.sql lues par les chargeurs du tableau de bord
+VUES = (
+    'population_view',
+    'revenu_view',
+    'population_par_tranche_age',
+    'vue_productions_attractions',
+    'vue_nombre_vehicules_par_zone',
+    'vue_matrice',
+    'lignebus',
+    # Vues matérialisées (migrations/002_vues_materialisees.sql)
+    'mv_resultat_jointure',
+    'mv_vue_matrice_od',
+    'mv_vue_matrice_complete',
+    'mv_congestion',
+)
+
+_metadata = None
+_lock = threading.Lock()
+
+
+def get_metadata():
+    """Métadonnées des vues, réfléchies en une seule fois au premier appel puis mémorisées pour le processus."""
+    global _metadata
+    if _metadata is None:
+        with _lock:
+            if _metadata is None:
+                metadata = MetaData()
+                metadata.reflect(bind=get_engine(), views=True, only=list(VUES))
+                _metadata = metadata
+    return _metadata
+
+
+def invalider_metadata():
+    """À appeler après une migration du schéma : la prochaine requête réfléchira à nouveau les vues."""
+    global _metadata
+    with _lock:
+        _metadata = None
+        select_vue.cache_clear()
+        select_population_par_tranche.cache_clear()
+        select_revenu.cache_clear()
+
+
+def get_vue(nom):
+    return get_metadata().tables[nom]
+
+
+@lru_cache(maxsize=None)
+def select_vue(nom):
+    """SELECT * pré-construit sur une vue ; les filtres dynamiques s'ajoutent avec .where()."""
+    return select(get_vue(nom))
+
+
+@lru_cache(maxsize=None)
+def select_population_par_tranche():
+    vue = get_vue('population_par_tranche_age')
+    return select(vue.c.tranche,
+                  vue.c.population_masculine_totale,
+                  vue.c.population_feminine_totale)
+
+
+@lru_cache(maxsize=None)
+def select_revenu():
+    vue = get_vue('revenu_view')
+    return select(vue.c.revenu_median,
+                  vue.c.taux_pauvrete,
+                  vue.c.identifiant_commune)
+
+
+def page_triee(nom, colonnes_tri, limite, apres=None):
+    """
+    Page d'une vue triée par `colonnes_tri` décroissantes (la dernière colonne doit rendre le tri unique).
+    `apres` : valeurs de tri de la dernière ligne de la page précédente (pagination par clé, servie par
+    l'index (colonnes_tri DESC) de la vue : pas d'OFFSET qui relirait les pages précédentes).
+    """
+    vue = get_vue(nom)
+    colonnes = [vue.c[colonne] for colonne in colonnes_tri]
+    requete = select_vue(nom)
+    if apres is not None:
+        requete = requete.where(tuple_(*colonnes) < tuple_(*apres))
+    return requete.order_by(*[colonne.desc() for colonne in colonnes]).limit(limite)
+
+
+def cle_page(df, colonnes_tri):
+    """Valeurs de tri de la dernière ligne d'une page, à passer en `apres` pour la page suivante (None si vide)."""
+    if df.empty:
+        return None
+    derniere = df.iloc[-1]
+    # Scalaires Python (et non NumPy) pour les paramètres de la requête suivante
+    return tuple(getattr(derniere[colonne], 'item', lambda: derniere[colonne])() for colonne in colonnes_tri)
@@ -0,0 +1,59 @@
+import time
+
+from sqlalchemy import text
+
+from src.data.database import get_engine
+
+# Vue analytique de base.sql -> vue matérialisée lue par le tableau de bord
+VUES_MATERIALISEES = {
+    'congestion': 'mv_congestion',
+    'vue_matrice_od': 'mv_vue_matrice_od',
+    'vue_matrice_complete': 'mv_vue_matrice_complete',
+    'resultat_jointure': 'mv_resultat_jointure',
+}
+
+
+def rafraichir_vues_materialisees(noms=None, concurrent=True):
+    """
+    Rafraîchit les vues matérialisées (toutes par défaut) après un chargement de données.
+    En mode concurrent, les lectures du tableau de bord ne sont pas bloquées pendant le recalcul ;
+    une vue jamais remplie est rafraîchie normalement (CONCURRENTLY l'interdit).
+    Retourne la durée de rafraîchissement de chaque vue, en secondes.
+    """
+    noms = list(noms or VUES_MATERIALISEES.values())
+    durees = {}
+
+    with get_engine().connect() as connexion:
+        remplies = {
+            row[0]: row[1] for row in connexion.execute(
+                text("SELECT matviewname, ispopulated FROM pg_matviews WHERE matviewname = ANY(:noms)"),
+                {'noms': noms}
+            )
+        }
+        connexion.commit()
+
+        for nom in noms:
+            if nom not in remplies:
+                print(f"Vue matérialisée {nom} absente : appliquer migrations/002_vues_materialisees.sql")
+                continue
+
+            mode = "CONCURRENTLY " if concurrent and remplies[nom] else ""
+            debut = time.perf_counter()
+            # Une transaction par vue : une vue en erreur n'annule pas le rafraîchissement des autres
+            try:
+                with connexion.begin():
+                    connexion.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{nom}"))
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement de {nom} : {e}")
+                continue
+            durees[nom] = time.perf_counter() - debut
+            print(f"Vue {nom} rafraîchie en {durees[nom]:.2f} s.")
+
+    return durees
+
+
+if __name__ == '__main__':
+    # À planifier après les chargements (cron, tâche planifiée) : python -m src.data.vues_materialisees
+    import sys
+
+    rafraichir_vues_materialisees(concurrent='--bloquant' not in sys.argv)
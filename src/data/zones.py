@@ -0,0 +1,61 @@
+import re
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.data.database import session_scope
+
+
+def normaliser_zone(nom):
+    """Forme canonique d'un identifiant de zone : minuscules, espaces superflus retirés."""
+    return re.sub(r'\s+', ' ', str(nom)).strip().lower()
+
+
+def identifiant_zone(code, nom):
+    """identifiant_commune d'une zone du zonage : '<ensemble d>_<ensemble_1>' normalisé ('74_arivonimamo ii')."""
+    return normaliser_zone(f"{code}_{nom}")
+
+
+class IndexZones:
+    """
+    Correspondance nom de zone -> id de la table zones, pour filtrer les vues par id (index B-tree).
+    Accepte les deux formes envoyées par les cartes : identifiant_commune ('74_arivonimamo ii', cartes
+    de densité et de revenu) et 'combined' ('Arivonimamo II 74', carte par défaut).
+    """
+
+    def __init__(self, df_zones):
+        self.ids = {}
+        for id_zone, nom, identifiant in df_zones[['id', 'nom', 'identifiant_commune']].itertuples(index=False):
+            identifiant = normaliser_zone(identifiant)
+            self.ids[identifiant] = id_zone
+            code = identifiant.split('_', 1)[0]
+            self.ids.setdefault(normaliser_zone(f"{nom} {code}"), id_zone)
+
+    def ids_zones(self, noms_zones):
+        """Ids des zones nommées, dans l'ordre et sans doublon ; les noms inconnus sont ignorés."""
+        ids = [self.ids.get(normaliser_zone(nom)) for nom in noms_zones or []]
+        return list(dict.fromkeys(id_zone for id_zone in ids if id_zone is not None))
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index_zones():
+    """Index des zones, lu une seule fois par processus (les zones ne changent qu'au chargement des données)."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                with session_scope() as session:
+                    result = session.execute(text("SELECT id, nom, identifiant_commune FROM zones"))
+                    _index = IndexZones(pd.DataFrame(result.fetchall(), columns=['id', 'nom', 'identifiant_commune']))
+    return _index
+
+
+def invalider_index_zones():
+    """À appeler après un rechargement des zones."""
+    global _index
+    with _lock:
+        _index = None
@@ -1,13 +1,16 @@
 import json
 import os
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from pyproj import CRS
 from dash import Dash, dcc, html
 import plotly.express as px  # Pour obtenir une palette de couleurs
-import xml.etree.ElementTree as ET
-from src.data.traitement_data_bus import convert_utm_to_latlon, extract_lat_lon
+from src.data.arrets_bus import ArretsBus, lireArretsXml
+from src.data.cache import charger_depuis_cache, lister_sources
+from src.data.geometrie import coordonnees_polylignes
+from src.data.traitement_data_bus import convert_utm_to_latlon, getAllLigne, LIGNES_PATH
 
 
 def prepare_dataframe(combined_dataframe):
@@ -36,52 +39,70 @@ def prepare_dataframe(combined_dataframe):
 
     return combined_dataframe
 
-def generate_map(prepared_dataframe,bus_lines):
-    """Crée une carte Mapbox en utilisant les données préparées et les lignes de bus spécifiées."""
 
-    # Filtrer le DataFrame selon les lignes de bus spécifiées
+def loadLignesPreparees(forcer=False):
+    """Lignes de bus reprojetées avec leurs centroïdes, depuis le cache disque."""
+    return charger_depuis_cache('lignes_preparees', lister_sources(LIGNES_PATH),
+                                lambda: prepare_dataframe(getAllLigne()), forcer)
+
+def precalculer_traces_lignes(prepared_dataframe):
+    """
+    Tracé de chaque ligne de bus (lon, lat séparés par NaN et osm_id de chaque point), calculé
+    une seule fois au démarrage pour toutes les lignes en un seul passage vectorisé.
+    """
+    lignes = prepared_dataframe[prepared_dataframe['taxibe_lin'].notna()]
+    # Tri stable par ligne : les points d'une même ligne sont contigus après l'extraction
+    lignes = lignes.sort_values('taxibe_lin', kind='mergesort')
+
+    lons, lats, idx_points = coordonnees_polylignes(lignes.geometry.values)
+    noms = lignes['taxibe_lin'].to_numpy(dtype=object)
+    osm_ids = lignes['osm_id'].to_numpy(dtype=object)
+
+    # Début de chaque ligne dans les lignes triées, puis dans les tableaux de points
+    noms_uniques, debuts = np.unique(noms, return_index=True)
+    bornes = np.searchsorted(idx_points, np.append(debuts, len(noms)))
+
+    return {
+        taxibe_lin: {
+            'lon': lons[debut:fin],
+            'lat': lats[debut:fin],
+            'customdata': osm_ids[idx_points[debut:fin]],  # osm_id de chaque point de la ligne
+        }
+        for taxibe_lin, debut, fin in zip(noms_uniques, bornes[:-1], bornes[1:])
+    }
+
+
+def generate_map(traces_lignes, bus_lines):
+    """Crée les traces Mapbox des lignes de bus spécifiées à partir des tracés pré-calculés."""
+
+    # Filtrer selon les lignes de bus spécifiées (dans l'ordre alphabétique des lignes)
     if bus_lines:
-        filtered_dataframe = prepared_dataframe[prepared_dataframe['taxibe_lin'].isin(bus_lines)]
+        demandees = set(bus_lines)
+        selection = [taxibe_lin for taxibe_lin in traces_lignes if taxibe_lin in demandees]
     else:
-        filtered_dataframe = prepared_dataframe
+        selection = list(traces_lignes)
 
-    # Si le DataFrame filtré est vide, ne pas générer de carte
-    if filtered_dataframe.empty:
+    # Si aucune ligne ne correspond, ne pas générer de carte
+    if not selection:
         print("Aucune donnée disponible pour les lignes de bus spécifiées.")
         return None
 
     # Palette de couleurs
     colors = px.colors.qualitative.Plotly  # Obtenir une palette de couleurs
 
-    # Créer la liste des traces de lignes de bus pour Mapbox
+    # Une trace par ligne de bus, assemblée à partir des tableaux pré-calculés
     ligne = []
-
-    # Grouper par ligne de bus ('taxibe_lin') et ajouter un tracé par groupe
-    grouped = filtered_dataframe.groupby('taxibe_lin')
-
-    for idx, (taxibe_lin, group) in enumerate(grouped):
-        lats, lons = [], []
-        text_info = []  # Liste pour stocker les informations de texte pour chaque segment
-        customdata = []  # Liste pour stocker les données supplémentaires comme osm_id
-
-        for _, row in group.iterrows():
-            lat, lon = extract_lat_lon(row['geometry'])
-            lats.extend(lat)
-            lons.extend(lon)
-
-            # Ajouter une information de texte personnalisée pour chaque segment
-            text_info.extend([f"Ligne {taxibe_lin}" for _ in range(len(lat))])
-            customdata.extend([row['osm_id']] * len(lat))  # Ajouter osm_id pour chaque point de la ligne
-
+    for idx, taxibe_lin in enumerate(selection):
+        trace = traces_lignes[taxibe_lin]
         ligne.append(go.Scattermapbox(
-            lon=lons,
-            lat=lats,
+            lon=trace['lon'],
+            lat=trace['lat'],
             mode='lines',
             line=dict(width=2, color=colors[idx % len(colors)]),  # Couleur unique pour chaque ligne de bus
             name=f"Bus Route {taxibe_lin}",
             hoverinfo='text',
-            text=text_info,
-            customdata=customdata,  # Inclure osm_id pour chaque point
+            text=f"Ligne {taxibe_lin}",  # Même texte pour tous les points de la ligne
+            customdata=trace['customdata'],  # Inclure osm_id pour chaque point
         ))
 
     return ligne
@@ -125,39 +146,20 @@ def create_bus_stops_map(bus_stops):
         name='Bus Stops'
     )
 
-def create_bus_stops_map_from_xml(xml_path):
-    # Lire le fichier XML
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    # Extraire les informations des arrêts de bus
-    bus_stops = []
-    for route in root.findall('route'):
-        for stop in route.findall('stop'):
-            name = stop.get('name')
-            coordinates = stop.get('coordinates')
-            osm_id = stop.get('osm_id')
-
-            # Vérifier si les coordonnées sont valides (non 'None')
-            if coordinates and coordinates.lower() != 'none':
-                lon, lat = map(float, coordinates.split(', '))
-                bus_stops.append({
-                    'name': name,
-                    'coordinates': (lon, lat),
-                    'osm_id': osm_id
-                })
-
-    # Extraire les coordonnées et les noms
-    latitudes = [stop['coordinates'][1] for stop in bus_stops]
-    longitudes = [stop['coordinates'][0] for stop in bus_stops]
-    names = [stop['name'] if stop['name'] else f"Bus Stop: {stop['osm_id']}" for stop in bus_stops]
+def create_bus_stops_map_from_depot(arrets_bus, bus_lines=None):
+    """Trace des arrêts servie depuis le dépôt en mémoire, limitée aux arrêts des lignes demandées."""
+    indices = arrets_bus.indices(bus_lines)
 
     # Créer une seule trace pour tous les arrêts
     return go.Scattermapbox(
-        lon=longitudes,  # Liste des longitudes
-        lat=latitudes,  # Liste des latitudes
+        lon=arrets_bus.lons[indices],
+        lat=arrets_bus.lats[indices],
         mode='markers',
         marker=go.scattermapbox.Marker(size=9, color='blue'),  # Couleur uniforme pour tous les markers
-        text=names,  # Nom de l'arrêt de bus
+        text=arrets_bus.textes[indices],  # Nom de l'arrêt de bus
         name='Bus Stops'
-    )
\ No newline at end of file
+    )
+
+def create_bus_stops_map_from_xml(xml_path):
+    # Relit le XML à chaque appel : préférer create_bus_stops_map_from_depot avec un ArretsBus construit au démarrage
+    return create_bus_stops_map_from_depot(ArretsBus(lireArretsXml(xml_path)))
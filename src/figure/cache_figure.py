@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+
+# Nombre de combinaisons de thématiques gardées en mémoire
+TAILLE_CACHE_FIGURES = 16
+
+
+class CacheFigures:
+    """
+    Cache LRU de figures déjà validées et converties en dictionnaire JSON Plotly.
+    Une figure en cache est renvoyée telle quelle par le callback, sans reconstruire les traces
+    ni repasser par la validation de go.Figure.
+    """
+
+    def __init__(self, taille_max=TAILLE_CACHE_FIGURES):
+        self.taille_max = taille_max
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrémenté à chaque invalidation : permet de savoir si un client affiche une figure périmée
+        self.generation = 0
+
+    def obtenir(self, cle, construire):
+        with self._lock:
+            if cle in self._figures:
+                self._figures.move_to_end(cle)
+                return self._figures[cle]
+
+        # Construire hors du verrou : les autres sélections restent servies pendant ce temps
+        figure = construire().to_plotly_json()
+
+        with self._lock:
+            self._figures[cle] = figure
+            self._figures.move_to_end(cle)
+            while len(self._figures) > self.taille_max:
+                self._figures.popitem(last=False)
+        return figure
+
+    def invalider(self):
+        with self._lock:
+            self._figures.clear()
+            self.generation += 1
+
+
+# Caches enregistrés, vidés ensemble lors d'un rechargement des données
+_caches = []
+
+
+def nouveau_cache_figures(taille_max=TAILLE_CACHE_FIGURES):
+    cache = CacheFigures(taille_max)
+    _caches.append(cache)
+    return cache
+
+
+def invalider_caches_figures():
+    """À appeler après un rechargement des données : toutes les figures seront reconstruites."""
+    for cache in _caches:
+        cache.invalider()
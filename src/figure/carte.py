@@ -1,10 +1,14 @@
 # src/map_creation.py
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 import matplotlib.cm as cm
 import matplotlib.colors as mcolors
 
+from src.data.geometrie import coordonnees_polylignes
+from src.data.utils import loadRoutesPrincipales
+
 
 
 def create_density_map(density, gdf_merged):
@@ -40,10 +44,10 @@ def create_revenue_map(density,df):
         showscale=False
     )
 
-def create_default_map(gdf_geojson):
-    """Crée une carte par défaut avec un thème grisé."""
+def create_default_map(gdf_geojson, geojson=None):
+    """Crée une carte par défaut avec un thème grisé (geojson : zonage simplifié, sinon pleine résolution)."""
     return go.Choroplethmapbox(
-        geojson=gdf_geojson.__geo_interface__,
+        geojson=geojson if geojson is not None else gdf_geojson.__geo_interface__,
         locations=gdf_geojson['combined'],
         z=[0] * len(gdf_geojson),
         colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0,0,0,0)']],
@@ -121,19 +125,12 @@ def create_traffic_density_map(df):
 
 def load_and_prepare_traffic_data(geojson_path, traffic_data_function):
 
-    # Charger les données géographiques
-    gdf = gpd.read_file(geojson_path)
-
     # Charger les données de trafic
     df_traffic = traffic_data_function()  # Cette fonction doit retourner un DataFrame avec les volumes de trafic
     df_traffic['id_osm'] = df_traffic['id_osm'].astype('int32')  # Assurez-vous que les types sont cohérents
 
-    # Filtrer les routes principales, secondaires et tertiaires
-    gdf_filtered = gdf[gdf['highway'].isin(['primary', 'secondary', 'tertiary'])]
-
-    # Convertir en système de coordonnées approprié
-    gdf_filtered = gdf_filtered.to_crs(epsg=3857)
-    gdf_filtered = gdf_filtered.to_crs(epsg=4326)
+    # Routes principales, secondaires et tertiaires déjà filtrées et reprojetées (cache disque)
+    gdf_filtered = loadRoutesPrincipales(geojson_path)
 
     # Fusionner les données géographiques avec les volumes de trafic
     gdf_filtered = gdf_filtered.merge(df_traffic[['id_osm', 'total_traffic_volume']], left_on='osm_id',
@@ -143,93 +140,77 @@ def load_and_prepare_traffic_data(geojson_path, traffic_data_function):
     gdf_filtered['total_traffic_volume'] = gdf_filtered['total_traffic_volume'].fillna(0)
 
     return gdf_filtered
-def create_route_with_traffic(gdf_filtered):
+# Nombre de classes de volume pour les couches de trafic : une seule trace par classe
+NB_CLASSES_TRAFIC = 10
+
+
+def _traces_trafic_par_classe(gdf_filtered, style_classe):
+    """Regroupe les segments de route en NB_CLASSES_TRAFIC classes de volume et crée une trace par classe."""
+    volumes = pd.to_numeric(gdf_filtered['total_traffic_volume'], errors='coerce').fillna(0)
+    gdf_trafic = gdf_filtered[volumes > 0]
+    if gdf_trafic.empty:
+        return []
+
+    volumes = volumes[volumes > 0].to_numpy(dtype='float64')
+    osm_ids = pd.to_numeric(gdf_trafic['osm_id'], errors='coerce').to_numpy(dtype='float64')
+    lons, lats, idx_points = coordonnees_polylignes(gdf_trafic.geometry.values)
+
+    # Classes de largeur égale entre le volume minimal et le volume maximal
+    bornes = np.linspace(volumes.min(), volumes.max(), NB_CLASSES_TRAFIC + 1)
+    classes = np.digitize(volumes, bornes[1:-1])
+    classes_points = classes[idx_points]
+
+    # Données de survol portées par chaque point : osm_id et volume du segment
+    customdata = np.column_stack((osm_ids[idx_points], volumes[idx_points]))
+
     traces = []
-    for _, row in gdf_filtered.iterrows():
-        lats, lons = [], []
-        geom = row['geometry']
-        if geom.geom_type == 'MultiLineString':
-            for line in geom.geoms:
-                lons.extend([coord[0] for coord in line.coords] + [None])
-                lats.extend([coord[1] for coord in line.coords] + [None])
-        elif geom.geom_type == 'LineString':
-            lons.extend([coord[0] for coord in geom.coords] + [None])
-            lats.extend([coord[1] for coord in geom.coords] + [None])
-
-        if row['total_traffic_volume'] > 0:
-            hover_text = (
-                f"Route ID: {row['osm_id']}<br>"
-                f"Volume de trafic: {row['total_traffic_volume']}"
-            )
-            traces.append(go.Scattermapbox(
-                lat=lats,
-                lon=lons,
-                mode='lines',
-                line=dict(
-                    width=max(row['total_traffic_volume'] / 50, 1),  # Ajuster la largeur des lignes selon le volume
-                    color='blue'  # Vous pouvez ajuster la couleur ici ou ajouter une échelle de couleurs
-                ),
-                opacity=min(row['total_traffic_volume'] / 1000, 1),  # Ajuster l'opacité au niveau de la trace
-                hoverinfo='text',
-                hovertext=hover_text,
-                name=row['osm_id']
-            ))
+    for classe in np.unique(classes):
+        masque = classes_points == classe
+        traces.append(go.Scattermapbox(
+            lat=lats[masque],
+            lon=lons[masque],
+            mode='lines',
+            customdata=customdata[masque],
+            hovertemplate="Route ID: %{customdata[0]}<br>Volume de trafic: %{customdata[1]}<extra></extra>",
+            **style_classe(volumes[classes == classe].mean())
+        ))
 
-    # Créer la figure
     return traces
 
 
-def create_route_with_traffic_colored(gdf_filtered):
-    traces = []
+def create_route_with_traffic(gdf_filtered):
+    def style_classe(volume):
+        return dict(
+            line=dict(
+                width=max(volume / 50, 1),  # Ajuster la largeur des lignes selon le volume
+                color='blue'
+            ),
+            opacity=min(volume / 1000, 1),  # Ajuster l'opacité au niveau de la trace
+            name=f"Congestion {volume:.0f}"
+        )
+
+    return _traces_trafic_par_classe(gdf_filtered, style_classe)
+
 
-    # Définir l'échelle de couleurs du jaune au rouge
+def create_route_with_traffic_colored(gdf_filtered):
+    # Définir l'échelle de couleurs du bleu clair au noir
     # reds_orange_yellow = mcolors.LinearSegmentedColormap.from_list('RedsOrangeYellow', ['#ffffb2', '#fd8d3c', '#de2d26'])
     reds_orange_yellow = mcolors.LinearSegmentedColormap.from_list('BlueVioletBlack',
                                                             ['#cce5ff', '#003366', '#663399', '#000000'])
-    # Vérifier les types de données et convertir si nécessaire
-    gdf_filtered['total_traffic_volume'] = pd.to_numeric(gdf_filtered['total_traffic_volume'], errors='coerce')
-
-    # Remplacer les NaN par zéro ou une autre valeur selon le contexte de votre application
-    gdf_filtered['total_traffic_volume'].fillna(0, inplace=True)
-
-    max_traffic_volume = gdf_filtered['total_traffic_volume'].max()
-
-    for _, row in gdf_filtered.iterrows():
-        lats, lons = [], []
-        geom = row['geometry']
-        if geom.geom_type == 'MultiLineString':
-            for line in geom.geoms:
-                lons.extend([coord[0] for coord in line.coords] + [None])
-                lats.extend([coord[1] for coord in line.coords] + [None])
-        elif geom.geom_type == 'LineString':
-            lons.extend([coord[0] for coord in geom.coords] + [None])
-            lats.extend([coord[1] for coord in geom.coords] + [None])
-
-        if row['total_traffic_volume'] > 0:
-            hover_text = (
-                f"Route ID: {row['osm_id']}<br>"
-                f"Volume de trafic: {row['total_traffic_volume']}"
-            )
+    max_traffic_volume = pd.to_numeric(gdf_filtered['total_traffic_volume'], errors='coerce').max()
+
+    def style_classe(volume):
+        # Calculer la couleur en fonction du volume de trafic
+        color = mcolors.to_hex(reds_orange_yellow(volume / max_traffic_volume))
+        return dict(
+            line=dict(width=3, color=color),
+            opacity=1,
+            name=f"Itinéraire {volume:.0f}"
+        )
 
-            # Calculer la couleur en fonction du volume de trafic
-            color_scale_value = row['total_traffic_volume'] / max_traffic_volume
-            color = mcolors.to_hex(reds_orange_yellow(color_scale_value))
+    return _traces_trafic_par_classe(gdf_filtered, style_classe)
 
-            traces.append(go.Scattermapbox(
-                lat=lats,
-                lon=lons,
-                mode='lines',
-                line=dict(
-                    width=3,  # Ajuster la largeur des lignes selon le volume
-                    color=color  # Utiliser la couleur calculée
-                ),
-                opacity=1,  # Ajuster l'opacité au niveau de la trace
-                hoverinfo='text',
-                hovertext=hover_text,
-                name=row['osm_id']
-            ))
 
-    return traces
 def create_contour_map(gdf_merged):
     # Obtenir la population minimale et maximale pour normaliser les couleurs
     min_pop = gdf_merged['population_totale'].min()
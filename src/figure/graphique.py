@@ -4,12 +4,9 @@ import pandas as pd
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 
-from src.data.traitement_data_spatiale import loadPopulationCarte
 from src.data.traitement_data_visualisation import get_volume_deplacements, \
     get_nombre_vehicules_par_zone, get_od_count, get_population
 
-# Chargement des données
-gdf_merged = loadPopulationCarte()
 
 # Ce fonction permet de genere un graphique de densite
 def generate_graph_density():
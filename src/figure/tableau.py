@@ -1,11 +1,11 @@
 import dash_bootstrap_components as dbc
 from dash import html
 
-from src.data.traitement_data_visualisation import create_od_matrix, get_od_count, get_population
+from src.data.traitement_data_visualisation import get_od_matrix, get_population
 
 
 def table_od_matrix():
-    dff = create_od_matrix(get_od_count())
+    dff = get_od_matrix()
     table = dbc.Table.from_dataframe(dff, striped=True, bordered=True, hover=True)
     content = html.Div(
         table,
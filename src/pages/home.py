@@ -7,6 +7,7 @@ from src.components.accueil.sidebar import sidebar
 def layout(app: Dash):
     return dbc.Container([
         dcc.Store(id='selected-thematiques', data=[]),
+        dcc.Store(id='map-couches', data=None),  # Couches déjà envoyées à la carte (mises à jour partielles)
         dbc.Row([
             dbc.Col(
                 sidebar(app),
@@ -0,0 +1,37 @@
+import os
+import time
+
+from flask import jsonify
+from sqlalchemy import text
+
+from src.data.database import get_engine, get_pool_stats
+
+# Sondes de vivacité (/health) et de disponibilité (/ready) pour le répartiteur de charge ou l'orchestrateur
+_etat = {'pret': False, 'demarrage': time.time()}
+
+
+def marquer_pret():
+    """À appeler une fois les données de l'application chargées."""
+    _etat['pret'] = True
+
+
+def enregistrer_sante(server):
+    @server.route('/health')
+    def health():
+        # Le processus répond : aucune dépendance vérifiée, pour ne pas redémarrer un worker si la base tombe
+        return jsonify(statut='ok', pid=os.getpid(), uptime=round(time.time() - _etat['demarrage']))
+
+    @server.route('/ready')
+    def ready():
+        # Prêt à recevoir du trafic : données chargées et base joignable
+        if not _etat['pret']:
+            return jsonify(statut='demarrage', pid=os.getpid()), 503
+        try:
+            with get_engine().connect() as connexion:
+                connexion.execute(text("SELECT 1"))
+        except Exception as e:
+            return jsonify(statut='base indisponible', erreur=str(e), pid=os.getpid()), 503
+
+        pool = get_pool_stats()
+        return jsonify(statut='pret', pid=os.getpid(),
+                       connexions_empruntees=pool.get('connexions_empruntees'), overflow=pool.get('overflow'))
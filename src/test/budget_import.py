@@ -0,0 +1,82 @@
+# Budget de temps d'import de l'application.
+#
+# Importe app.py dans un processus neuf avec python -X importtime, sans base de données joignable :
+# l'import doit réussir (aucune donnée n'est lue à l'import, tout passe par le registre de
+# src/data/jeux_donnees.py), rester sous le budget total, et aucun module du projet ne doit dépasser
+# le seuil de temps propre (signe d'un chargement de données ou d'un calcul au niveau du module).
+#
+# À lancer depuis la racine du projet :
+#   python -m src.test.budget_import [--budget 3.0] [--repetitions 3]
+import argparse
+import os
+import subprocess
+import sys
+
+# Durée maximale de l'import de app.py, bibliothèques comprises (s)
+BUDGET_TOTAL_S = 3.0
+# Temps propre maximal d'un module du projet (s) : au-delà, il fait plus que définir des fonctions
+SEUIL_MODULE_S = 0.1
+
+# Base injoignable : un accès aux données pendant l'import le fait échouer
+IMPORT_APP = (
+    "from src.config import DATABASE_CONFIG; "
+    "DATABASE_CONFIG.update(host='127.0.0.1', port='1'); "
+    "import app"
+)
+
+
+def parser_arguments():
+    parser = argparse.ArgumentParser(description="Vérifie le temps d'import de l'application.")
+    parser.add_argument('--budget', type=float, default=BUDGET_TOTAL_S, help="Budget total (s)")
+    parser.add_argument('--repetitions', type=int, default=3,
+                        help="Nombre d'imports mesurés (le plus rapide est retenu)")
+    return parser.parse_args()
+
+
+def mesurer_import():
+    """Temps (propre, cumulé) en secondes de chaque module importé par app.py, dans un processus neuf."""
+    resultat = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT_APP],
+                              capture_output=True, text=True, cwd=os.getcwd())
+    if resultat.returncode != 0:
+        raise RuntimeError(f"L'import de app.py a échoué sans base de données :\n{resultat.stderr[-2000:]}")
+
+    temps = {}
+    for ligne in resultat.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not ligne.startswith('import time:') or 'self [us]' in ligne:
+            continue
+        propre, cumule, module = ligne[len('import time:'):].split('|')
+        temps[module.strip()] = (int(propre) / 1e6, int(cumule) / 1e6)
+    return temps
+
+
+def main():
+    args = parser_arguments()
+    try:
+        mesures = [mesurer_import() for _ in range(args.repetitions)]
+    except RuntimeError as e:
+        print(f"ÉCHEC {e}")
+        return 1
+    # Le plus rapide des imports : les autres sont ralentis par le cache disque ou la machine
+    temps = min(mesures, key=lambda t: t['app'][1])
+
+    total = temps['app'][1]
+    anomalies = []
+    if total > args.budget:
+        anomalies.append(f"import de app.py en {total:.2f} s > {args.budget:.2f} s")
+    for module, (propre, _) in sorted(temps.items(), key=lambda m: -m[1][0]):
+        if (module == 'app' or module.startswith('src.')) and propre > SEUIL_MODULE_S:
+            anomalies.append(f"{module} : {propre:.2f} s de temps propre > {SEUIL_MODULE_S:.2f} s")
+
+    print(f"Import de app.py : {total:.2f} s (budget {args.budget:.2f} s)")
+    print("Modules les plus lents (cumulé) :")
+    for module, (propre, cumule) in sorted(temps.items(), key=lambda m: -m[1][1])[1:11]:
+        print(f"  {cumule:6.2f} s  {module}")
+
+    for anomalie in anomalies:
+        print(f"ÉCHEC {anomalie}")
+    return 1 if anomalies else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
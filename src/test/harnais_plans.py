@@ -0,0 +1,237 @@
+# Harnais de non-régression des plans d'exécution des requêtes du tableau de bord.
+#
+# Charge des données fictives à 10x / 100x le volume de base avec les générateurs de src/data/insertion.py,
+# rafraîchit les vues matérialisées, puis exécute EXPLAIN (ANALYZE) sur chaque requête des chargeurs
+# et vérifie le plan (pas de sous-plan corrélé, vues matérialisées parcourues par index) et la durée.
+# Tout est fait dans une seule transaction annulée à la fin : la base n'est pas modifiée.
+#
+# À lancer sur une base créée avec base.sql et les migrations, depuis la racine du projet :
+#   python -m src.test.harnais_plans [--base mob_harnais] [--echelle 10 100] [--graine 42]
+import argparse
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from src.config import DATABASE_CONFIG
+from src.data.zones import IndexZones
+
+# Nombre d'enregistrements par table simulée à l'échelle 1 (matrice_od, flux_trafic, ...)
+VOLUME_BASE = 1000
+# Nombre de routes fictives à l'échelle 1 (le fichier des routes n'est pas nécessaire)
+ROUTES_BASE = 200
+
+ECHELLES = (10, 100)
+
+# Au-delà de ce nombre de lignes, une vue matérialisée filtrée ou triée doit être lue par un index
+SEUIL_LIGNES_INDEX = 10_000
+
+# Durée maximale d'exécution (ms) par requête, à l'échelle 100 ; les vues non matérialisées
+# agrègent des tables entières à chaque appel. Aux autres échelles, le seuil est proportionnel au volume,
+# avec un plancher : aux petits volumes, le coût fixe de chaque requête domine
+SEUIL_MS_DEFAUT = 50
+FACTEUR_SEUIL_MIN = 0.2
+SEUILS_MS = {
+    'population_view': 500,
+    'revenu_view': 500,
+    'population_par_tranche_age': 500,
+    'vue_productions_attractions': 2000,
+}
+
+ZONAGE_PATH = r"data/Zonage_interne_externe_PMUD.geojson"
+
+
+def parser_arguments():
+    parser = argparse.ArgumentParser(description="Vérifie les plans d'exécution des requêtes du tableau de bord.")
+    parser.add_argument('--base', default='mob_harnais', help="Base de test (créée avec base.sql et les migrations)")
+    parser.add_argument('--echelle', type=int, nargs='+', default=list(ECHELLES))
+    parser.add_argument('--graine', type=int, default=42,
+                        help="Graine des générateurs : deux exécutions comparent des plans sur les mêmes données")
+    return parser.parse_args()
+
+
+def requetes_application(noms_zones, index_zones):
+    """
+    (nom, vue lue, requête SQLAlchemy, sélective) pour chaque requête exécutée par les chargeurs du tableau de bord.
+    Une requête sélective (filtre ou premiers N) ne lit qu'une partie de la vue : elle doit passer par un index.
+    """
+    from src.data.vues import select_vue, select_population_par_tranche, select_revenu
+    from src.data.traitement_data_spatiale import requete_congestion
+    from src.data.traitement_data_visualisation import requete_volume_deplacements, \
+        requete_nombre_vehicules_par_zone, requete_od_count, requete_vehicule_count_od
+
+    requetes = [
+        ('population_view', 'population_view', select_vue('population_view'), False),
+        ('revenu_view', 'revenu_view', select_revenu(), False),
+        ('population_par_tranche_age', 'population_par_tranche_age', select_population_par_tranche(), False),
+        ('congestion', 'mv_congestion', requete_congestion(), False),
+    ]
+    chargeurs = [
+        ('volume_deplacements', 'vue_productions_attractions', requete_volume_deplacements),
+        ('nombre_vehicules_par_zone', 'mv_resultat_jointure', requete_nombre_vehicules_par_zone),
+        ('od_count', 'mv_vue_matrice_od', requete_od_count),
+        ('vehicule_count_od', 'mv_vue_matrice_complete', requete_vehicule_count_od),
+    ]
+    # Chaque chargeur a deux modes : premiers N sans filtre, et filtre sur les zones sélectionnées
+    for nom, vue, requete in chargeurs:
+        requetes.append((f"{nom} (top N)", vue, requete(), True))
+        requetes.append((f"{nom} (zones)", vue, requete(noms_zones, index_zones=index_zones), True))
+    return requetes
+
+
+def sql_litteral(requete):
+    """Texte SQL de la requête avec ses paramètres en littéraux, pour EXPLAIN."""
+    return str(requete.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def _ids(curseur, requete):
+    curseur.execute(requete)
+    return [row[0] for row in curseur.fetchall()]
+
+
+def charger_donnees(curseur, echelle):
+    """Complète la base avec les données fictives à l'échelle donnée (dans la transaction courante)."""
+    from src.data.etl import copier_dataframe, upsert_dataframe, _est_vide
+    from src.data.insertion import donnees_zones, donnees_population, donnees_vehicules, donnees_activite, \
+        donnees_hierarchie_fonctionnelle, donnees_typologie_modale, donnees_matrice_od, donnees_zone_activite, \
+        donnees_menage, donnees_revenu, donnees_emploi, donnees_flux_trafic, donnees_iri, donnees_debit_vitesse
+
+    upsert_dataframe(curseur, 'types_vehicules', donnees_vehicules(), ['id'])
+    upsert_dataframe(curseur, 'activite', donnees_activite(), ['nom_activite'])
+    upsert_dataframe(curseur, 'hierarchie_fonctionnelle', donnees_hierarchie_fonctionnelle(), ['nom_niveau'])
+    upsert_dataframe(curseur, 'typologie_modale', donnees_typologie_modale(), ['nom_mode'])
+
+    # Les zones restent celles du zonage : mv_vue_matrice_complete est un produit zones x zones x types
+    if _est_vide(curseur, 'zones'):
+        copier_dataframe(curseur, 'zones', donnees_zones(ZONAGE_PATH))
+    # Combinaisons zone x type de véhicule lues par mv_resultat_jointure (remplies par base.sql à la création)
+    curseur.execute(
+        "INSERT INTO zone_vehicules (zone_id, type_vehicule_id) SELECT z.id, tv.id "
+        "FROM zones z CROSS JOIN types_vehicules tv WHERE NOT EXISTS "
+        "(SELECT 1 FROM zone_vehicules zv WHERE zv.zone_id = z.id AND zv.type_vehicule_id = tv.id)"
+    )
+    zones_sans_population = _ids(
+        curseur, "SELECT z.id FROM zones z WHERE NOT EXISTS (SELECT 1 FROM population p WHERE p.id_zone = z.id)"
+    )
+    copier_dataframe(curseur, 'population',
+                     donnees_population(zones_sans_population, _ids(curseur, "SELECT id FROM tranche_age")))
+
+    hierarchies = _ids(curseur, "SELECT id FROM hierarchie_fonctionnelle")
+    nb_routes = ROUTES_BASE * echelle
+    copier_dataframe(curseur, 'route', pd.DataFrame({
+        'id_hierarchie': [random.choice(hierarchies) for _ in range(nb_routes)],
+        'id_osm': [f"harnais_{echelle}_{i}" for i in range(nb_routes)],
+    }))
+
+    idzones = _ids(curseur, "SELECT id FROM zones")
+    idroutes = _ids(curseur, "SELECT id FROM route")
+    idmodes = _ids(curseur, "SELECT id FROM typologie_modale")
+    n = VOLUME_BASE * echelle
+    simulees = {
+        'matrice_od': donnees_matrice_od(idzones, _ids(curseur, "SELECT id FROM types_vehicules"), n),
+        'zone_activite': donnees_zone_activite(idzones, _ids(curseur, "SELECT id FROM activite"), n),
+        'menage': donnees_menage(idzones, idmodes, n),
+        'revenu': donnees_revenu(idzones, n),
+        'emploi': donnees_emploi(idzones, n),
+        'flux_trafic': donnees_flux_trafic(idroutes, idmodes, _ids(curseur, "SELECT id FROM periodes_temps"), n),
+        'iri': donnees_iri(idroutes, n),
+        'debit_vitesse': donnees_debit_vitesse(idroutes, n),
+    }
+    for table, df in simulees.items():
+        copier_dataframe(curseur, table, df)
+
+    # Rafraîchissement bloquant : CONCURRENTLY est interdit dans une transaction
+    from src.data.vues_materialisees import VUES_MATERIALISEES
+    for vue in VUES_MATERIALISEES.values():
+        curseur.execute(f"REFRESH MATERIALIZED VIEW {vue}")
+    curseur.execute("ANALYZE")
+
+
+def noeuds(plan):
+    yield plan
+    for enfant in plan.get('Plans', []):
+        yield from noeuds(enfant)
+
+
+def verifier_plan(curseur, vue, requete, selective, echelle):
+    """Exécute EXPLAIN (ANALYZE) de la requête ; retourne (durée en ms, liste des anomalies)."""
+    curseur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql_litteral(requete)}")
+    resultat = curseur.fetchone()[0][0]
+    plan = list(noeuds(resultat['Plan']))
+    duree = resultat['Execution Time']
+    anomalies = []
+
+    if any(noeud.get('Parent Relationship') == 'SubPlan' for noeud in plan):
+        anomalies.append("sous-plan corrélé (SubPlan)")
+
+    relations = {noeud['Relation Name'] for noeud in plan if 'Relation Name' in noeud}
+    if vue.startswith('mv_'):
+        # Une requête sur vue matérialisée ne doit jamais relire les tables sources
+        autres = relations - {vue}
+        if autres:
+            anomalies.append(f"tables sources lues : {', '.join(sorted(autres))}")
+
+        curseur.execute("SELECT reltuples FROM pg_class WHERE relname = %s", (vue,))
+        lignes = curseur.fetchone()[0]
+        parcours_sequentiel = any(
+            noeud['Node Type'] == 'Seq Scan' and noeud.get('Relation Name') == vue for noeud in plan
+        )
+        if selective and lignes > SEUIL_LIGNES_INDEX and parcours_sequentiel:
+            anomalies.append(f"parcours séquentiel de {vue} ({lignes:.0f} lignes)")
+
+    # Les seuils de durée sont donnés pour l'échelle 100
+    seuil = SEUILS_MS.get(vue, SEUIL_MS_DEFAUT) * max(echelle / 100, FACTEUR_SEUIL_MIN)
+    if duree > seuil:
+        anomalies.append(f"{duree:.1f} ms > {seuil:.0f} ms")
+
+    return duree, anomalies
+
+
+def executer_echelle(connexion, echelle, graine):
+    # Mêmes données à chaque exécution, quel que soit l'ordre des échelles (random : générateurs
+    # de src/data/insertion.py et hiérarchie des routes)
+    random.seed(graine + echelle)
+    np.random.seed(graine + echelle)
+    curseur = connexion.cursor()
+    curseur.execute("SET CONSTRAINTS ALL DEFERRED")
+    print(f"\n=== Échelle {echelle} ({VOLUME_BASE * echelle} enregistrements par table simulée) ===")
+    charger_donnees(curseur, echelle)
+
+    # Zones lues dans la transaction du harnais (l'index du processus ne verrait pas les zones de test)
+    curseur.execute("SELECT id, nom, identifiant_commune FROM zones ORDER BY id")
+    zones = pd.DataFrame(curseur.fetchall(), columns=['id', 'nom', 'identifiant_commune'])
+    noms_zones = zones['identifiant_commune'].head(3).tolist()
+
+    echecs = 0
+    for nom, vue, requete, selective in requetes_application(noms_zones, IndexZones(zones)):
+        duree, anomalies = verifier_plan(curseur, vue, requete, selective, echelle)
+        statut = 'OK ' if not anomalies else 'ÉCHEC'
+        print(f"{statut} {nom:<38} {duree:>9.2f} ms  {'; '.join(anomalies)}")
+        echecs += bool(anomalies)
+    return echecs
+
+
+def main():
+    args = parser_arguments()
+    # La base de test doit être choisie avant la création de l'engine
+    DATABASE_CONFIG['dbname'] = args.base
+    from src.data.database import get_engine
+
+    echecs = 0
+    for echelle in args.echelle:
+        connexion = get_engine().raw_connection()
+        try:
+            echecs += executer_echelle(connexion, echelle, args.graine)
+        finally:
+            # Aucune donnée de test n'est conservée
+            connexion.rollback()
+            connexion.close()
+
+    print(f"\n{echecs} requête(s) en échec.")
+    return 1 if echecs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,27 @@
-from src.test.scenari import app
+import os
+import shutil
 
-server = app.server  # Accès à l'application Flask sous-jacente
+from src.config import SERVEUR_CONFIG
+
+if __name__ == "__main__" and SERVEUR_CONFIG['serveur'] == 'gunicorn':
+    if shutil.which('gunicorn'):
+        # gunicorn importe lui-même wsgi:server dans le maître (preload_app, voir gunicorn.conf.py)
+        os.execvp('gunicorn', ['gunicorn', '--config', 'gunicorn.conf.py', 'wsgi:server'])
+    # gunicorn n'est pas installé (Windows notamment) : servir avec waitress plutôt que d'échouer
+    print("gunicorn introuvable, l'application est servie avec waitress.")
+
+from app import app
+
+server = app.server  # Accès à l'application Flask sous-jacente (sondes /health et /ready, voir src/sante.py)
 
 if __name__ == "__main__":
     from waitress import serve
-    print("server")
-    serve(server, host="0.0.0.0", port=8050)
+    from src.data.registre import registre
+    from src.sante import marquer_pret
+
+    # Le serveur répond tout de suite, les jeux de données se chargent en arrière-plan
+    registre.prechauffer(apres=marquer_pret)
+
+    # Un seul processus : les threads servent les callbacks en parallèle
+    serve(server, host=SERVEUR_CONFIG['hote'], port=SERVEUR_CONFIG['port'], threads=SERVEUR_CONFIG['threads'],
+          channel_timeout=SERVEUR_CONFIG['timeout'])